@@ -0,0 +1,13 @@
+package com.example.main;
+
+public class LoanProcessor {
+    private static final int MIN_BALANCE = 20000;
+    private static final int MIN_CREDIT_SCORE = 700;
+
+    public boolean approveLoan(int balance, int creditScore) {
+        if (balance < 0 || creditScore < 0) {
+            throw new IllegalArgumentException("Inputs must be non-negative");
+        }
+        return balance >= MIN_BALANCE && creditScore >= MIN_CREDIT_SCORE;
+    }
+}
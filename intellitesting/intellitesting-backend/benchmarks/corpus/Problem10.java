@@ -0,0 +1,567 @@
+package com.cm;
+import java.util.Scanner;
+
+public class Problem10 {
+
+   // Simulate global state variables
+    static int a1 = 23;
+    static int a19 = 9;
+    static int a10 = 0;
+    static int a12 = 0;
+    static int a4 = 14;
+
+// Auxiliary input variables 
+// (although not directly used in the logic, 
+// they are retained to match the original code structure)
+    static int inputC = 3;
+    static int inputD = 4;
+    static int inputE = 5;
+    static int inputF = 6;
+    static int inputB = 2;
+
+    /**
+    Core logic function
+    Goal: The AI ​​needs to generate a specific sequence of inputs that causes changes in the internal states (a1, a10, a19, etc.),
+    ultimately triggering an exception in verifyError.
+     */
+    public static int calculate_output(int input) {
+        // --- Phase 1: Error/Bug Checks ---
+        // Throw an exception if the state meets certain conditions.
+        // Covering these branches is the primary goal in test generation tasks.
+
+        if((((((a10==4) && (a12==0)) &&   ((38 < a1) && (218 >= a1)) ) && (a4==14)) && (a19==8))){
+            verifyError("error_57");
+        }
+        if((((((a10==2) && (a12==0)) &&   ((-13 < a1) && (38 >= a1)) ) && (a4==14)) && (a19==8))){
+            verifyError("error_48");
+        }
+        if((((((a10==0) && (a12==0)) &&  a1 <=  -13 ) && (a4==14)) && (a19==6))){
+            verifyError("globalError");
+        }
+        if((((((a10==2) && (a12==0)) &&  218 < a1 ) && (a4==14)) && (a19==8))){
+            verifyError("error_50");
+        }
+        if((((((a10==4) && (a12==0)) &&  a1 <=  -13 ) && (a4==14)) && (a19==6))){
+            verifyError("error_15");
+        }
+        if((((((a10==2) && (a12==0)) &&   ((-13 < a1) && (38 >= a1)) ) && (a4==14)) && (a19==7))){
+            verifyError("error_28");
+        }
+        if((((((a10==3) && (a12==0)) &&   ((-13 < a1) && (38 >= a1)) ) && (a4==14)) && (a19==6))){
+            verifyError("error_12");
+        }
+        if((((((a10==4) && (a12==0)) &&  218 < a1 ) && (a4==14)) && (a19==8))){
+            verifyError("error_58");
+        }
+        if((((((a10==1) && (a12==0)) &&   ((-13 < a1) && (38 >= a1)) ) && (a4==14)) && (a19==7))){
+            verifyError("error_24");
+        }
+        if((((((a10==2) && (a12==0)) &&   ((38 < a1) && (218 >= a1)) ) && (a4==14)) && (a19==7))){
+            verifyError("error_29");
+        }
+        if((((((a10==1) && (a12==0)) &&  218 < a1 ) && (a4==14)) && (a19==7))){
+            verifyError("error_26");
+        }
+        if((((((a10==0) && (a12==0)) &&  218 < a1 ) && (a4==14)) && (a19==8))){
+            verifyError("error_42");
+        }
+        if((((((a10==4) && (a12==0)) &&  a1 <=  -13 ) && (a4==14)) && (a19==8))){
+            verifyError("error_55");
+        }
+        if((((((a10==2) && (a12==0)) &&  a1 <=  -13 ) && (a4==14)) && (a19==8))){
+            verifyError("error_47");
+        }
+        if((((((a10==0) && (a12==0)) &&   ((38 < a1) && (218 >= a1)) ) && (a4==14)) && (a19==8))){
+            verifyError("error_41");
+        }
+        if((((((a10==1) && (a12==0)) &&  218 < a1 ) && (a4==14)) && (a19==8))){
+            verifyError("error_46");
+        }
+        if((((((a10==2) && (a12==0)) &&   ((38 < a1) && (218 >= a1)) ) && (a4==14)) && (a19==8))){
+            verifyError("error_49");
+        }
+        if((((((a10==4) && (a12==0)) &&   ((-13 < a1) && (38 >= a1)) ) && (a4==14)) && (a19==8))){
+            verifyError("error_56");
+        }
+        if((((((a10==1) && (a12==0)) &&  218 < a1 ) && (a4==14)) && (a19==6))){
+            verifyError("error_6");
+        }
+        if((((((a10==3) && (a12==0)) &&   ((-13 < a1) && (38 >= a1)) ) && (a4==14)) && (a19==7))){
+            verifyError("error_32");
+        }
+        if((((((a10==0) && (a12==0)) &&  a1 <=  -13 ) && (a4==14)) && (a19==8))){
+            verifyError("error_39");
+        }
+        if((((((a10==0) && (a12==0)) &&   ((38 < a1) && (218 >= a1)) ) && (a4==14)) && (a19==7))){
+            verifyError("error_21");
+        }
+        if((((((a10==0) && (a12==0)) &&   ((-13 < a1) && (38 >= a1)) ) && (a4==14)) && (a19==7))){
+            verifyError("error_20");
+        }
+        if((((((a10==0) && (a12==0)) &&  a1 <=  -13 ) && (a4==14)) && (a19==7))){
+            verifyError("error_19");
+        }
+        if((((((a10==4) && (a12==0)) &&   ((38 < a1) && (218 >= a1)) ) && (a4==14)) && (a19==6))){
+            verifyError("error_17");
+        }
+        if((((((a10==3) && (a12==0)) &&  218 < a1 ) && (a4==14)) && (a19==6))){
+            verifyError("error_14");
+        }
+        if((((((a10==4) && (a12==0)) &&  218 < a1 ) && (a4==14)) && (a19==7))){
+            verifyError("error_38");
+        }
+        if((((((a10==4) && (a12==0)) &&   ((-13 < a1) && (38 >= a1)) ) && (a4==14)) && (a19==6))){
+            verifyError("error_16");
+        }
+        if((((((a10==2) && (a12==0)) &&  218 < a1 ) && (a4==14)) && (a19==7))){
+            verifyError("error_30");
+        }
+        if((((((a10==1) && (a12==0)) &&  a1 <=  -13 ) && (a4==14)) && (a19==8))){
+            verifyError("error_43");
+        }
+        if((((((a10==1) && (a12==0)) &&  a1 <=  -13 ) && (a4==14)) && (a19==6))){
+             // error_3: {reach_error();abort();}
+             verifyError("error_3");
+        }
+        if((((((a10==0) && (a12==0)) &&  218 < a1 ) && (a4==14)) && (a19==7))){
+            verifyError("error_22");
+        }
+        if((((((a10==1) && (a12==0)) &&   ((38 < a1) && (218 >= a1)) ) && (a4==14)) && (a19==8))){
+            verifyError("error_45");
+        }
+        if((((((a10==4) && (a12==0)) &&   ((-13 < a1) && (38 >= a1)) ) && (a4==14)) && (a19==7))){
+            verifyError("error_36");
+        }
+        if((((((a10==2) && (a12==0)) &&   ((-13 < a1) && (38 >= a1)) ) && (a4==14)) && (a19==6))){
+            verifyError("error_8");
+        }
+        if((((((a10==3) && (a12==0)) &&   ((-13 < a1) && (38 >= a1)) ) && (a4==14)) && (a19==8))){
+            verifyError("error_52");
+        }
+        if((((((a10==3) && (a12==0)) &&   ((38 < a1) && (218 >= a1)) ) && (a4==14)) && (a19==8))){
+            verifyError("error_53");
+        }
+        if((((((a10==3) && (a12==0)) &&  a1 <=  -13 ) && (a4==14)) && (a19==7))){
+            verifyError("error_31");
+        }
+        if((((((a10==3) && (a12==0)) &&   ((38 < a1) && (218 >= a1)) ) && (a4==14)) && (a19==7))){
+            verifyError("error_33");
+        }
+        if((((((a10==2) && (a12==0)) &&  a1 <=  -13 ) && (a4==14)) && (a19==6))){
+            verifyError("error_7");
+        }
+        if((((((a10==1) && (a12==0)) &&  a1 <=  -13 ) && (a4==14)) && (a19==7))){
+            verifyError("error_23");
+        }
+        if((((((a10==0) && (a12==0)) &&   ((-13 < a1) && (38 >= a1)) ) && (a4==14)) && (a19==6))){
+            verifyError("error_0");
+        }
+        if((((((a10==2) && (a12==0)) &&  218 < a1 ) && (a4==14)) && (a19==6))){
+            verifyError("error_10");
+        }
+        if((((((a10==0) && (a12==0)) &&   ((-13 < a1) && (38 >= a1)) ) && (a4==14)) && (a19==8))){
+            verifyError("error_40");
+        }
+        if((((((a10==3) && (a12==0)) &&  a1 <=  -13 ) && (a4==14)) && (a19==8))){
+            verifyError("error_51");
+        }
+        if((((((a10==4) && (a12==0)) &&  a1 <=  -13 ) && (a4==14)) && (a19==7))){
+            verifyError("error_35");
+        }
+        if((((((a10==1) && (a12==0)) &&   ((38 < a1) && (218 >= a1)) ) && (a4==14)) && (a19==6))){
+            verifyError("error_5");
+        }
+        if((((((a10==0) && (a12==0)) &&   ((38 < a1) && (218 >= a1)) ) && (a4==14)) && (a19==6))){
+            verifyError("error_1");
+        }
+        if((((((a10==4) && (a12==0)) &&   ((38 < a1) && (218 >= a1)) ) && (a4==14)) && (a19==7))){
+            verifyError("error_37");
+        }
+        if((((((a10==3) && (a12==0)) &&   ((38 < a1) && (218 >= a1)) ) && (a4==14)) && (a19==6))){
+            verifyError("error_13");
+        }
+        if((((((a10==2) && (a12==0)) &&   ((38 < a1) && (218 >= a1)) ) && (a4==14)) && (a19==6))){
+            verifyError("error_9");
+        }
+        if((((((a10==1) && (a12==0)) &&   ((-13 < a1) && (38 >= a1)) ) && (a4==14)) && (a19==8))){
+            verifyError("error_44");
+        }
+        if((((((a10==4) && (a12==0)) &&  218 < a1 ) && (a4==14)) && (a19==6))){
+            verifyError("error_18");
+        }
+        if((((((a10==0) && (a12==0)) &&  218 < a1 ) && (a4==14)) && (a19==6))){
+            verifyError("error_2");
+        }
+        if((((((a10==2) && (a12==0)) &&  a1 <=  -13 ) && (a4==14)) && (a19==7))){
+            verifyError("error_27");
+        }
+        if((((((a10==3) && (a12==0)) &&  a1 <=  -13 ) && (a4==14)) && (a19==6))){
+            verifyError("error_11");
+        }
+        if((((((a10==3) && (a12==0)) &&  218 < a1 ) && (a4==14)) && (a19==8))){
+            verifyError("error_54");
+        }
+        if((((((a10==3) && (a12==0)) &&  218 < a1 ) && (a4==14)) && (a19==7))){
+            verifyError("error_34");
+        }
+        if((((((a10==1) && (a12==0)) &&   ((38 < a1) && (218 >= a1)) ) && (a4==14)) && (a19==7))){
+            verifyError("error_25");
+        }
+        if((((((a10==0) && (a12==0)) &&  a1 <=  -13 ) && (a4==14)) && (a19==9))){
+            verifyError("error_59");
+        }
+        if((((((a10==1) && (a12==0)) &&   ((-13 < a1) && (38 >= a1)) ) && (a4==14)) && (a19==6))){
+            verifyError("error_4");
+        }
+
+
+        // --- Phase 2: State Transitions ---
+        // Update variables based on the current state and input.
+        
+        if((((a10==4) && ( 218 < a1  && (((input == 4) && (a12==0)) && (a4==14)))) && (a19==9))){
+             a10 = 1; 
+             return 24;
+        } else if(((a4==14) && (((a12==0) && (((  ((-13 < a1) && (38 >= a1))  ||   ((38 < a1) && (218 >= a1)) ) && (input == 4)) && (a19==9))) && (a10==0)))){
+            a1 = (((a1 + -15535) - 211896) / 5);
+             a10 = 2; 
+             return 22;
+        } else if(((((a4==14) && ((a19==10) && ((a10==1) && (input == 2)))) && (a12==0)) &&  218 < a1 )){
+             a19 = 9; 
+             return 22;
+        } else if(((a12==0) && ((a19==9) && ((a10==1) && (( 218 < a1  && (input == 3)) && (a4==14)))))){
+             a19 = 10; 
+             return 25;
+        } else if(((a19==10) && (((a4==14) && (((((a10==0) &&   ((38 < a1) && (218 >= a1)) ) || ((a10==0) &&  218 < a1 )) || ((a10==1) &&  a1 <=  -13 )) && (input == 5))) && (a12==0)))){
+            a1 = (((((a1 - 0) * 9)/ 10) % 25)- -12);
+             a10 = 2; 
+             a19 = 8; 
+             return -1;
+        } else if(((a12==0) && ((a19==9) && (((a4==14) && ((input == 2) && (  ((-13 < a1) && (38 >= a1))  ||   ((38 < a1) && (218 >= a1)) ))) && (a10==3))))){
+            a1 = (((a1 + 513169) / 5) - -374179);
+             a10 = 0; 
+             return 26;
+        } else if(((a12==0) && ((((a4==14) && ((input == 3) && ( a1 <=  -13  ||   ((-13 < a1) && (38 >= a1)) ))) && (a10==2)) && (a19==9)))){
+            a1 = (((((a1 % 299993)+ -300005) * 1) + 533674) - 533676);
+             return 22;
+        } else if((((a12==0) && (  ((-13 < a1) && (38 >= a1))  && (((input == 3) && (a19==10)) && (a4==14)))) && (a10==1))){
+            a1 = ((((a1 - -221565) * 10)/ 9) / 5);
+             a19 = 9; 
+             return 22;
+        } else if((((a19==9) && (((input == 6) && (( 218 < a1  && (a10==0)) || ( a1 <=  -13  && (a10==1)))) && (a4==14))) && (a12==0))){
+            a1 = (((((a1 % 25)- -13) - 42605) / 5) - -8517);
+             a10 = 3; 
+             return 26;
+        } else if((  ((38 < a1) && (218 >= a1))  && (((a4==14) && ((a19==10) && ((a10==1) && (input == 4)))) && (a12==0)))){
+            a1 = ((((a1 * 57)/ 10) * 5) * 5);
+             a19 = 9; 
+             return 24;
+        } else if((((a4==14) && ((((  ((-13 < a1) && (38 >= a1))  ||   ((38 < a1) && (218 >= a1)) ) && (input == 5)) && (a19==9)) && (a12==0))) && (a10==0))){
+            a1 = (((a1 / 5) + 110755) + 220746);
+             a10 = 1; 
+             a19 = 8; 
+             return -1;
+        } else if((((a4==14) && ((((((a10==2) &&   ((38 < a1) && (218 >= a1)) ) || ((a10==2) &&  218 < a1 )) || ( a1 <=  -13  && (a10==3))) && (input == 2)) && (a19==9))) && (a12==0))){
+            a1 = (((((a1 % 299890)- -300108) + 0) + -140588) + 140590);
+             a10 = 0; 
+             return 26;
+        } else if((((a10==1) && (((a12==0) && ((input == 6) && (  ((-13 < a1) && (38 >= a1))  ||   ((38 < a1) && (218 >= a1)) ))) && (a4==14))) && (a19==9))){
+            a1 = ((((a1 / 5) - -367248) * 1) - 890938);
+             a10 = 0; 
+             a19 = 10; 
+             return 26;
+        } else if(((((((input == 5) && (a4==14)) &&  218 < a1 ) && (a10==4)) && (a19==9)) && (a12==0))){
+            a1 = (((((a1 % 25)+ -8) * 5) % 25)+ 13);
+             a10 = 1; 
+             a19 = 7; 
+             return -1;
+        } else if(((a19==10) && ((a4==14) && ((a12==0) && ((input == 4) && ((((a10==0) &&   ((38 < a1) && (218 >= a1)) ) || ( 218 < a1  && (a10==0))) || ((a10==1) &&  a1 <=  -13 ))))))){
+            a1 = ((((a1 % 299993)- 300005) * 1) + -3);
+             a10 = 2; 
+             a19 = 9; 
+             return 24;
+        } else if((((a12==0) && ((((a19==9) && (input == 4)) &&  218 < a1 ) && (a10==1))) && (a4==14))){
+             return 22;
+        } else if(((a10==1) && ((a4==14) && ((((a12==0) && (input == 2)) && (a19==9)) &&  218 < a1 )))){
+            a1 = ((((((a1 % 89)+ 74) - -21) * 5) % 89)- -118);
+             a19 = 10; 
+             return 25;
+        } else if((((a4==14) && (((input == 4) && (((  ((38 < a1) && (218 >= a1))  && (a10==2)) || ((a10==2) &&  218 < a1 )) || ( a1 <=  -13  && (a10==3)))) && (a19==9))) && (a12==0))){
+            a1 = (((a1 / 5) - -435872) + 13710);
+             a10 = 0; 
+             return -1;
+        } else if(((((a12==0) && ((((a10==0) &&  218 < a1 ) || ((a10==1) &&  a1 <=  -13 )) && (input == 2))) && (a19==9)) && (a4==14))){
+            a1 = ((((((a1 * 9)/ 10) % 299993)+ -300005) / 5) + -75819);
+             a10 = 4; 
+             return 26;
+        } else if((((a4==14) && ((a12==0) && ((input == 3) && (((a10==3) &&  218 < a1 ) || ( a1 <=  -13  && (a10==4)))))) && (a19==9))){
+            a1 = ((((a1 - 0) - 0) / 5) - 247106);
+             a10 = 4; 
+             return -1;
+        } else if((((((a10==1) && ((a12==0) && (input == 6))) && (a19==10)) &&   ((-13 < a1) && (38 >= a1)) ) && (a4==14))){
+            a1 = (((a1 / 5) - 367764) - -191971);
+             a10 = 2; 
+             a19 = 9; 
+             return 24;
+        } else if(((a19==9) && (((a10==4) && ( 218 < a1  && ((a4==14) && (input == 6)))) && (a12==0)))){
+             a19 = 8; 
+             return -1;
+        } else if((((a10==0) && ((a12==0) && (((input == 4) && ( a1 <=  -13  ||   ((-13 < a1) && (38 >= a1)) )) && (a19==10)))) && (a4==14))){
+            a1 = ((((a1 % 25)+ 13) / 5) - -2);
+             return 26;
+        } else if(((a19==9) && ((((a4==14) && ((input == 2) && ( a1 <=  -13  ||   ((-13 < a1) && (38 >= a1)) ))) && (a12==0)) && (a10==2)))){
+            a1 = ((((a1 % 299993)+ -300005) * 1) + -1);
+             return 25;
+        } else if((((((a12==0) && ((input == 4) && (  ((-13 < a1) && (38 >= a1))  ||   ((38 < a1) && (218 >= a1)) ))) && (a19==9)) && (a4==14)) && (a10==3))){
+            a1 = (((a1 * 5) - 196556) + 94277);
+             return -1;
+        } else if((((a4==14) && (((a12==0) && ( 218 < a1  && (input == 6))) && (a19==10))) && (a10==1))){
+            a1 = (((a1 - 600149) - 12) + -58);
+             return -1;
+        } else if(((((((input == 2) && ( a1 <=  -13  ||   ((-13 < a1) && (38 >= a1)) )) && (a19==10)) && (a10==0)) && (a4==14)) && (a12==0))){
+            a1 = ((((a1 % 299890)+ 300108) - -1) + 0);
+             a10 = 4; 
+             a19 = 9; 
+             return -1;
+        } else if((((((( 218 < a1  && (a10==0)) || ((a10==1) &&  a1 <=  -13 )) && (input == 3)) && (a4==14)) && (a12==0)) && (a19==9))){
+            a1 = ((((((a1 / 5) % 25)+ 13) * 5) % 25)- -12);
+             a10 = 4; 
+             return 22;
+        } else if(((a12==0) && ((a19==9) && (((input == 6) && (((a10==3) &&  218 < a1 ) || ( a1 <=  -13  && (a10==4)))) && (a4==14))))){
+            a1 = ((((a1 + 0) % 299890)+ 300108) + 0);
+             a10 = 2; 
+             return -1;
+        } else if((((a10==3) && (((a19==9) && ((  ((-13 < a1) && (38 >= a1))  ||   ((38 < a1) && (218 >= a1)) ) && (input == 5))) && (a12==0))) && (a4==14))){
+            a1 = ((((a1 - 287698) - 189392) % 89)+ 206);
+             a10 = 2; 
+             a19 = 7; 
+             return -1;
+        } else if((((a12==0) && ((a10==1) && ( 218 < a1  && ((a19==9) && (input == 6))))) && (a4==14))){
+             return 24;
+        } else if(((a10==0) && ((a12==0) && (((( a1 <=  -13  ||   ((-13 < a1) && (38 >= a1)) ) && (input == 3)) && (a19==10)) && (a4==14))))){
+            a1 = (((((a1 % 25)+ 13) - 1) + -16025) - -16025);
+             return -1;
+        } else if((((a10==4) && ((((  ((-13 < a1) && (38 >= a1))  ||   ((38 < a1) && (218 >= a1)) ) && (input == 4)) && (a4==14)) && (a19==9))) && (a12==0))){
+            a1 = (((((a1 - -249982) + 317100) * 1) % 89)- -62);
+             return -1;
+        } else if(((a4==14) && ((a10==1) && ((a19==9) && ((a12==0) && ((  ((-13 < a1) && (38 >= a1))  ||   ((38 < a1) && (218 >= a1)) ) && (input == 4))))))){
+            a1 = ((((a1 - 46038) + -455425) * 10)/ 9);
+             a19 = 10; 
+             return 24;
+        } else if(((a4==14) && ((a19==9) && (((( a1 <=  -13  && (a10==3)) || ((  ((38 < a1) && (218 >= a1))  && (a10==2)) || ((a10==2) &&  218 < a1 ))) && (input == 3)) && (a12==0))))){
+            a1 = ((((a1 % 299890)- -300108) + 1) * 1);
+             a10 = 0; 
+             return -1;
+        } else if((((((a4==14) && ((input == 6) && (a10==1))) && (a12==0)) &&   ((38 < a1) && (218 >= a1)) ) && (a19==10))){
+            a1 = (((a1 - -320095) * 1) - -173480);
+             a19 = 9; 
+             return -1;
+        } else if(((a4==14) && (((a12==0) && ( 218 < a1  && ((a19==9) && (input == 3)))) && (a10==4)))){
+             return 24;
+        } else if((((a4==14) && ((a12==0) && ((((a10==3) &&  218 < a1 ) || ((a10==4) &&  a1 <=  -13 )) && (input == 4)))) && (a19==9))){
+            a1 = ((((a1 % 89)+ 128) + -1) - 0);
+             a10 = 3; 
+             return -1;
+        } else if((((a12==0) && (((a10==4) && ((  ((-13 < a1) && (38 >= a1))  ||   ((38 < a1) && (218 >= a1)) ) && (input == 3))) && (a4==14))) && (a19==9))){
+            a1 = ((((a1 + -121822) * 4) * 10)/ -9);
+             a10 = 3; 
+             return -1;
+        } else if(((a19==9) && ((a4==14) && (((input == 5) && (((  ((38 < a1) && (218 >= a1))  && (a10==2)) || ((a10==2) &&  218 < a1 )) || ((a10==3) &&  a1 <=  -13 ))) && (a12==0))))){
+            a1 = ((((a1 % 299890)- -300108) + 2) + 0);
+             a10 = 2; 
+             return 21;
+        } else if(((a12==0) && (((a19==9) && ((((a10==0) &&  218 < a1 ) || ( a1 <=  -13  && (a10==1))) && (input == 5))) && (a4==14)))){
+            a1 = ((((a1 % 299993)- 300005) + -1) - 1);
+             a10 = 3; 
+             return 21;
+        } else if(( 218 < a1  && ((((a12==0) && ((a19==9) && (input == 2))) && (a10==4)) && (a4==14)))){
+             a10 = 1; 
+             return 22;
+        } else if((((a12==0) && ((a19==9) && ((((a10==3) &&  a1 <=  -13 ) || (((a10==2) &&   ((38 < a1) && (218 >= a1)) ) || ( 218 < a1  && (a10==2)))) && (input == 6)))) && (a4==14))){
+            a1 = ((((a1 - 0) % 299890)- -300108) - -1);
+             a10 = 2; 
+             return -1;
+        } else if(((a19==9) && ((a12==0) && (((( a1 <=  -13  ||   ((-13 < a1) && (38 >= a1)) ) && (input == 5)) && (a4==14)) && (a10==2))))){
+            a1 = ((((a1 % 299890)+ 300108) * 1) * 1);
+             a10 = 0; 
+             a19 = 8; 
+             return -1;
+        } else if((((a10==1) && (((a12==0) && ((a19==10) && (input == 4))) &&   ((-13 < a1) && (38 >= a1)) )) && (a4==14))){
+            a1 = (((a1 - -575828) - -5011) + 9014);
+             a19 = 9; 
+             return 24;
+        } else if(((a12==0) && ((a4==14) && ( 218 < a1  && (((a10==1) && (input == 4)) && (a19==10)))))){
+            a1 = (((((a1 * 9)/ 10) * -1)/ 10) * 5);
+             a10 = 2; 
+             a19 = 9; 
+             return 24;
+        } else if(((((((input == 3) && (  ((-13 < a1) && (38 >= a1))  ||   ((38 < a1) && (218 >= a1)) )) && (a10==0)) && (a19==9)) && (a4==14)) && (a12==0))){
+            a1 = ((((a1 / 5) * 5) / 5) + 505228);
+             a10 = 1; 
+             return 25;
+        } else if((((a4==14) && (((( a1 <=  -13  && (a10==1)) || (((a10==0) &&   ((38 < a1) && (218 >= a1)) ) || ( 218 < a1  && (a10==0)))) && (input == 6)) && (a19==10))) && (a12==0))){
+            a1 = (((((a1 * 9)/ 10) % 299993)+ -300005) - 1);
+             a10 = 2; 
+             a19 = 9; 
+             return 24;
+        } else if(((a19==9) && ((((input == 4) && (( 218 < a1  && (a10==0)) || ((a10==1) &&  a1 <=  -13 ))) && (a12==0)) && (a4==14)))){
+            a1 = (((((a1 / 5) % 89)- -128) / 5) + 34);
+             a10 = 0; 
+             a19 = 8; 
+             return -1;
+        } else if((((a19==10) && ((a12==0) && ((((a10==1) &&  a1 <=  -13 ) || ((  ((38 < a1) && (218 >= a1))  && (a10==0)) || ((a10==0) &&  218 < a1 ))) && (input == 3)))) && (a4==14))){
+            a1 = ((((a1 % 299993)- 300005) - 0) - 2);
+             a10 = 2; 
+             a19 = 9; 
+             return 22;
+        } else if(((a19==9) && (((a4==14) && ((((a10==3) &&  218 < a1 ) || ( a1 <=  -13  && (a10==4))) && (input == 5))) && (a12==0)))){
+            a1 = ((((((a1 % 25)- -12) - 0) * 5) % 25)- -13);
+             a10 = 3; 
+             a19 = 6; 
+             return -1;
+        } else if((((a12==0) && ((((input == 5) && (a19==10)) &&   ((38 < a1) && (218 >= a1)) ) && (a4==14))) && (a10==1))){
+            a1 = ((((a1 + 381077) % 25)- -1) / 5);
+             a10 = 2; 
+             a19 = 7; 
+             return -1;
+        } else if(((a19==9) && ((a4==14) && ((((  ((-13 < a1) && (38 >= a1))  ||   ((38 < a1) && (218 >= a1)) ) && (input == 3)) && (a10==1)) && (a12==0))))){
+            a1 = (((a1 / 5) + 105416) + 61704);
+             a10 = 4; 
+             return 24;
+        } else if(((a10==0) && ((a12==0) && ((((input == 5) && ( a1 <=  -13  ||   ((-13 < a1) && (38 >= a1)) )) && (a19==10)) && (a4==14))))){
+            a1 = (((((a1 % 299890)+ 300108) - -1) + -309315) - -309317);
+             a10 = 1; 
+             a19 = 7; 
+             return -1;
+        } else if(( 218 < a1  && (((((input == 3) && (a10==1)) && (a12==0)) && (a4==14)) && (a19==10)))){
+            a1 = ((((a1 % 25)- 10) - 1) / 5);
+             a10 = 0; 
+             return -1;
+        } else if((((a12==0) && ((a19==9) && (((input == 3) && (  ((-13 < a1) && (38 >= a1))  ||   ((38 < a1) && (218 >= a1)) )) && (a4==14)))) && (a10==3))){
+            a1 = ((((a1 - -133866) + -357620) / 5) + 265622);
+             a10 = 0; 
+             return -1;
+        } else if((((((a4==14) && (  ((38 < a1) && (218 >= a1))  && (input == 2))) && (a12==0)) && (a10==1)) && (a19==10))){
+            a1 = ((((a1 * 10)/ -9) * 5) - 333686);
+             a10 = 4; 
+             a19 = 6; 
+             return -1;
+        } else if((((a19==10) && ((a10==1) && ((a12==0) && (  ((-13 < a1) && (38 >= a1))  && (input == 5))))) && (a4==14))){
+            a1 = (((a1 + -283353) / 5) + -495232);
+             a10 = 0; 
+             a19 = 6; 
+             return -1;
+        } else if(((((a10==1) && (((input == 5) &&  218 < a1 ) && (a4==14))) && (a19==10)) && (a12==0))){
+            a1 = (((((a1 % 89)- -93) * 5) % 89)- -56);
+             a10 = 4; 
+             a19 = 8; 
+             return -1;
+        } else if((((a4==14) && ((a19==9) && ((input == 2) && (((a10==3) &&  218 < a1 ) || ((a10==4) &&  a1 <=  -13 ))))) && (a12==0))){
+            a1 = ((((a1 % 299993)+ -300005) - 1) - 1);
+             a10 = 1; 
+             return -1;
+        } else if((((a4==14) && (((a19==9) && ((  ((-13 < a1) && (38 >= a1))  ||   ((38 < a1) && (218 >= a1)) ) && (input == 2))) && (a12==0))) && (a10==4))){
+            a1 = (((((a1 % 89)+ 129) - 1134) * -1)/ 10);
+             a10 = 3; 
+             return -1;
+        } else if(((a4==14) && (((a19==9) && (((  ((-13 < a1) && (38 >= a1))  ||   ((38 < a1) && (218 >= a1)) ) && (input == 6)) && (a10==3))) && (a12==0)))){
+            a1 = (((a1 - 559222) + -11915) - 28339);
+             a10 = 1; 
+             return -1;
+        } else if((((a4==14) && ((((input == 6) && ( a1 <=  -13  ||   ((-13 < a1) && (38 >= a1)) )) && (a19==10)) && (a12==0))) && (a10==0))){
+            a1 = (((((a1 + 0) % 299993)- 300005) / 5) - 292229);
+             return -1;
+        } else if(((a12==0) && ((a4==14) && (((( a1 <=  -13  && (a10==1)) || (((a10==0) &&   ((38 < a1) && (218 >= a1)) ) || ( 218 < a1  && (a10==0)))) && (input == 2)) && (a19==10))))){
+            a1 = ((((a1 % 25)+ 12) - -2) / 5);
+             a10 = 2; 
+             a19 = 9; 
+             return 22;
+        } else if((((a12==0) && ((a19==9) && ((a10==2) && ((input == 6) && ( a1 <=  -13  ||   ((-13 < a1) && (38 >= a1)) ))))) && (a4==14))){
+            a1 = ((((a1 / 5) % 25)+ 13) / 5);
+             return 25;
+        } else if(((a4==14) && ((a19==9) && ((a12==0) && (((input == 2) && (  ((-13 < a1) && (38 >= a1))  ||   ((38 < a1) && (218 >= a1)) )) && (a10==0)))))){
+            a1 = (((a1 * 5) + 278443) - -239546);
+             return 26;
+        } else if(((a19==9) && (((a10==1) && ((a12==0) && ((input == 2) && (  ((-13 < a1) && (38 >= a1))  ||   ((38 < a1) && (218 >= a1)) )))) && (a4==14)))){
+            a1 = (((((a1 * 5) + 59655) * 5) % 25)+ 12);
+             a19 = 10; 
+             return 26;
+        } else if(((a19==9) && ((a4==14) && ((a10==1) && (((input == 5) && (  ((-13 < a1) && (38 >= a1))  ||   ((38 < a1) && (218 >= a1)) )) && (a12==0)))))){
+            a1 = (((a1 + -438195) * 1) * 1);
+             a10 = 2; 
+             a19 = 8; 
+             return -1;
+        } else if(((a12==0) && (((((input == 6) && (  ((-13 < a1) && (38 >= a1))  ||   ((38 < a1) && (218 >= a1)) )) && (a19==9)) && (a4==14)) && (a10==0)))){
+            a1 = (((((a1 + -272193) - -47605) - -570122) % 89)+ 110);
+             a10 = 1; 
+             return 25;
+        } else if(((a4==14) && (((a12==0) && ((a19==9) && ((input == 6) && (  ((-13 < a1) && (38 >= a1))  ||   ((38 < a1) && (218 >= a1)) )))) && (a10==4)))){
+            a1 = (((((a1 - 44798) + -168742) * 2) % 89)+ 207);
+             return -1;
+        } else if((((((  ((38 < a1) && (218 >= a1))  && (input == 3)) && (a10==1)) && (a12==0)) && (a4==14)) && (a19==10))){
+            a1 = ((((a1 * 5) - -287099) - 723016) + 616783);
+             a10 = 4; 
+             a19 = 9; 
+             return -1;
+        } else if((((a4==14) && (((( a1 <=  -13  ||   ((-13 < a1) && (38 >= a1)) ) && (input == 4)) && (a12==0)) && (a19==9))) && (a10==2))){
+            a1 = ((((a1 % 299993)- 300005) * 1) - 3);
+             return 24;
+        } else if(((a12==0) && ((( 218 < a1  && ((a19==9) && (input == 5))) && (a10==1)) && (a4==14)))){
+            a1 = ((((a1 * 9)/ 10) + 58620) - 603783);
+             a10 = 4; 
+             a19 = 8; 
+             return -1;
+        } else if(((a4==14) && (((((  ((-13 < a1) && (38 >= a1))  ||   ((38 < a1) && (218 >= a1)) ) && (input == 5)) && (a12==0)) && (a19==9)) && (a10==4)))){
+            a1 = (((a1 + 566454) + 1842) + 23814);
+             a10 = 2; 
+             a19 = 8; 
+             return -1;
+        } else if(((a12==0) && ((((a10==1) && (  ((-13 < a1) && (38 >= a1))  && (input == 2))) && (a4==14)) && (a19==10)))){
+             return 26;
+        } 
+        
+        return -2;
+    }
+
+    /**
+     * Used to report errors.
+     * If the AI ​​is able to generate test cases 
+     * that trigger this method, then the test generation is successful.
+     */
+    private static void verifyError(String msg) {
+        // In a test environment, this is typically an AssertionFailedError.
+        // For demonstration purposes, we print and throw a RuntimeException.
+        System.err.println("Bug Found: " + msg);
+        System.err.println("Current State: a1=" + a1 + ", a10=" + a10 + ", a19=" + a19);
+        throw new RuntimeException(msg); 
+    }
+
+    /**
+     * The Main method is used for manual testing or as the entry point for fuzzing.
+     * The test code generated by AI should call the calculate_output method.
+     */
+    public static void main(String[] args) {
+        Scanner scanner = new Scanner(System.in);
+        System.out.println("Enter inputs (2, 3, 4, 5, or 6). Ctrl+C to exit.");
+
+        while (scanner.hasNextInt()) {
+            int input = scanner.nextInt();
+            if (input != 2 && input != 3 && input != 4 && input != 5 && input != 6) {
+                System.out.println("Invalid input. Returning -2.");
+                continue;
+            }
+            
+            try {
+                int result = calculate_output(input);
+                System.out.println("Output: " + result);
+                System.out.println("State: a1=" + a1 + ", a10=" + a10 + ", a19=" + a19);
+            } catch (RuntimeException e) {
+                System.out.println("Exception caught: " + e.getMessage());
+                // In a real-world fuzzing scenario, 
+                // the program might terminate here, 
+                // or reset its state to continue testing.
+                break;
+            }
+        }
+        scanner.close();
+    }
+}
\ No newline at end of file
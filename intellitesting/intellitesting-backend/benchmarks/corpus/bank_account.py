@@ -0,0 +1,27 @@
+"""Sample module used by the offline benchmark corpus."""
+
+
+class InsufficientFunds(Exception):
+    pass
+
+
+class BankAccount:
+    def __init__(self, owner: str, balance: float = 0.0):
+        if balance < 0:
+            raise ValueError("Initial balance cannot be negative")
+        self.owner = owner
+        self.balance = balance
+
+    def deposit(self, amount: float) -> float:
+        if amount <= 0:
+            raise ValueError("Deposit must be positive")
+        self.balance += amount
+        return self.balance
+
+    def withdraw(self, amount: float) -> float:
+        if amount <= 0:
+            raise ValueError("Withdrawal must be positive")
+        if amount > self.balance:
+            raise InsufficientFunds(f"Balance {self.balance} is less than {amount}")
+        self.balance -= amount
+        return self.balance
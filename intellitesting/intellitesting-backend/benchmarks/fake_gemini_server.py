@@ -0,0 +1,118 @@
+"""
+Minimal stand-in for the Gemini `generateContent` REST endpoint.
+
+Used to exercise `ResilientLLMClient` (retries, hedging, deadlines, connection reuse)
+without a network connection or API key. Latency and error injection are configurable:
+
+    python -m benchmarks.fake_gemini_server --port 8765 --latency 0.2 --jitter 0.3 --error-rate 0.2
+
+Then point the backend at it:
+
+    GEMINI_BASE_URL=http://127.0.0.1:8765 GEMINI_API_KEY=fake uvicorn main:app
+"""
+import argparse
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class FakeGeminiHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive, so connection reuse is observable
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length", 0))
+        self.rfile.read(length)
+        config = self.server.config
+
+        with self.server.lock:
+            self.server.stats["requests"] += 1
+            self.server.stats["connections"].add(self.client_address)
+            number = self.server.stats["requests"]
+
+        delay = config.latency + random.uniform(0, config.jitter)
+        if number <= config.slow_first or (config.slow_rate and random.random() < config.slow_rate):
+            delay += config.slow_extra
+        time.sleep(delay)
+
+        if number <= config.fail_first or (config.error_rate and random.random() < config.error_rate):
+            status = random.choice(config.error_codes)
+            self._send_json(status, {"error": {"code": status, "message": "Injected failure", "status": "UNAVAILABLE"}})
+            return
+
+        self._send_json(200, {
+            "candidates": [{
+                "content": {"role": "model", "parts": [{"text": config.reply}]},
+                "finishReason": "STOP",
+                "index": 0,
+            }],
+            "usageMetadata": {"promptTokenCount": length // 4, "candidatesTokenCount": len(config.reply) // 4,
+                              "totalTokenCount": length // 4 + len(config.reply) // 4},
+            "modelVersion": "fake-gemini",
+        })
+
+    def do_GET(self):
+        # Simple introspection endpoint for checking connection reuse
+        with self.server.lock:
+            stats = {"requests": self.server.stats["requests"],
+                     "distinct_connections": len(self.server.stats["connections"])}
+        self._send_json(200, stats)
+
+    def _send_json(self, status: int, payload: dict):
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def create_server(host="127.0.0.1", port=0, latency=0.0, jitter=0.0, error_rate=0.0,
+                  error_codes=(503, 429), slow_rate=0.0, slow_extra=0.0, reply="OK",
+                  fail_first=0, slow_first=0) -> ThreadingHTTPServer:
+    """
+    Creates (but does not start) a fake server. Use port=0 to pick a free port.
+    `fail_first` / `slow_first` deterministically fail / slow down the first N requests.
+    """
+    server = ThreadingHTTPServer((host, port), FakeGeminiHandler)
+    server.daemon_threads = True
+    server.config = argparse.Namespace(latency=latency, jitter=jitter, error_rate=error_rate,
+                                       error_codes=list(error_codes), slow_rate=slow_rate,
+                                       slow_extra=slow_extra, reply=reply,
+                                       fail_first=fail_first, slow_first=slow_first)
+    server.lock = threading.Lock()
+    server.stats = {"requests": 0, "connections": set()}
+    return server
+
+
+def start_in_thread(**kwargs) -> ThreadingHTTPServer:
+    """Starts a fake server on a background thread and returns it; base URL is `server.url`."""
+    server = create_server(**kwargs)
+    server.url = f"http://{server.server_address[0]}:{server.server_address[1]}"
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Fake Gemini server with latency/error injection.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=0.0, help="Base latency in seconds.")
+    parser.add_argument("--jitter", type=float, default=0.0, help="Uniform random extra latency in seconds.")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of requests answered with an error.")
+    parser.add_argument("--error-codes", type=int, nargs="+", default=[503, 429])
+    parser.add_argument("--slow-rate", type=float, default=0.0, help="Fraction of requests that get --slow-extra latency.")
+    parser.add_argument("--slow-extra", type=float, default=0.0)
+    parser.add_argument("--fail-first", type=int, default=0, help="Answer the first N requests with an error.")
+    parser.add_argument("--slow-first", type=int, default=0, help="Add --slow-extra latency to the first N requests.")
+    args = parser.parse_args()
+
+    srv = create_server(args.host, args.port, args.latency, args.jitter, args.error_rate,
+                        args.error_codes, args.slow_rate, args.slow_extra,
+                        fail_first=args.fail_first, slow_first=args.slow_first)
+    print(f"Fake Gemini server listening on http://{args.host}:{args.port}")
+    srv.serve_forever()
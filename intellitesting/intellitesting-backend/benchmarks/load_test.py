@@ -0,0 +1,171 @@
+"""
+Load test for the multi-worker deployment mode.
+
+Starts the real server (`python main.py`) with 1, 2, 4, ... worker processes against the
+fake Gemini endpoint (benchmarks/fake_gemini_server.py), drives /generate_tests with a
+fixed number of concurrent clients and reports throughput and latency per worker count.
+Each run also checks that the workers share state: anonymous requests from one IP must
+hit the daily limit exactly once across all workers, and follow-ups must resume the same
+session whichever worker they land on. Run from the backend directory:
+
+    python -m benchmarks.load_test --workers 1 2 4 --requests 80 --concurrency 16
+    python -m benchmarks.load_test --latency 0.5 --json load.json
+    python -m benchmarks.load_test --state-url memory://   # per-process state: limits break
+
+A worker runs one agent at a time, so part of the scaling comes from overlapping LLM waits
+(even on one core); the CPU-bound remainder scales with the number of cores.
+"""
+import argparse
+import json
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import httpx
+
+BENCHMARK_DIR = os.path.dirname(os.path.abspath(__file__))
+BACKEND_DIR = os.path.dirname(BENCHMARK_DIR)
+if BACKEND_DIR not in sys.path:
+    sys.path.insert(0, BACKEND_DIR)
+
+from benchmarks.fake_gemini_server import start_in_thread
+
+SOURCE = "def add(a, b):\n    return a + b\n"
+PAYLOAD = {
+    "file_content": SOURCE,
+    "selected_code": SOURCE,
+    "selection_range": {"start": 1, "end": 2},
+    "language": "python",
+    "framework": "pytest",
+    "configuration": {},
+    "file_path": "calc.py",
+    "specification": "add returns the sum of its arguments",
+}
+# A user key skips the server-side rate limit, so the throughput phase is not capped by it
+USER_KEY = {"X-Gemini-Api-Key": "fake"}
+
+
+def start_server(workers: int, port: int, gemini_url: str, state_dir: str, state_url: str = None,
+                 daily_limit: int = 10) -> subprocess.Popen:
+    env = dict(os.environ,
+               PORT=str(port), WEB_CONCURRENCY=str(workers), RATE_LIMIT_DAILY=str(daily_limit),
+               GEMINI_BASE_URL=gemini_url, GEMINI_API_KEY="fake",
+               SHARED_STATE_URL=state_url or "sqlite:///" + os.path.join(state_dir, "state.db"),
+               SESSION_DB_PATH=os.path.join(state_dir, "sessions.db"),
+               METRICS_MULTIPROC_DIR=os.path.join(state_dir, "metrics"))
+    proc = subprocess.Popen([sys.executable, "main.py"], cwd=BACKEND_DIR, env=env,
+                            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    deadline = time.time() + 60
+    while time.time() < deadline:
+        try:
+            if httpx.get(f"http://127.0.0.1:{port}/metrics", timeout=1).status_code == 200:
+                return proc
+        except httpx.HTTPError:
+            pass
+        if proc.poll() is not None:
+            break
+        time.sleep(0.2)
+    proc.kill()
+    raise RuntimeError(f"Server with {workers} workers did not start on port {port}")
+
+
+def drive(url: str, requests: int, concurrency: int, headers: dict) -> list:
+    """Sends `requests` POSTs from `concurrency` clients; returns (status, seconds) per request."""
+    def one(_):
+        started = time.perf_counter()
+        try:
+            status = client.post(url, json=PAYLOAD, headers=headers).status_code
+        except httpx.HTTPError:
+            status = None
+        return status, time.perf_counter() - started
+
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    with httpx.Client(timeout=120, limits=limits) as client, ThreadPoolExecutor(concurrency) as pool:
+        return list(pool.map(one, range(requests)))
+
+
+def check_sessions(base: str, follow_ups: int) -> int:
+    """Number of follow-ups that resumed the first request's session."""
+    session_id = httpx.post(f"{base}/generate_tests", json=PAYLOAD, headers=USER_KEY, timeout=120).json()["session_id"]
+    body = dict(PAYLOAD, session_id=session_id, instruction="Add a test for negative numbers.")
+    resumed = 0
+    for _ in range(follow_ups):
+        # A new connection each time, so the kernel may hand it to any worker
+        response = httpx.post(f"{base}/generate_tests", json=body, headers=USER_KEY, timeout=120)
+        resumed += response.json()["session_id"] == session_id
+    return resumed
+
+
+def run(workers: int, args, gemini_url: str, port: int) -> dict:
+    state_dir = tempfile.mkdtemp(prefix="intellitesting_load_")
+    proc = start_server(workers, port, gemini_url, state_dir, args.state_url, args.daily_limit)
+    base = f"http://127.0.0.1:{port}"
+    try:
+        drive(f"{base}/generate_tests", workers * 2, workers * 2, USER_KEY)  # warm up every worker
+        started = time.perf_counter()
+        results = drive(f"{base}/generate_tests", args.requests, args.concurrency, USER_KEY)
+        elapsed = time.perf_counter() - started
+        latencies = sorted(t for status, t in results if status == 200)
+
+        limited = drive(f"{base}/generate_tests", args.daily_limit * 3, min(args.concurrency, args.daily_limit * 3), {})
+        allowed = sum(status == 200 for status, _ in limited)
+        resumed = check_sessions(base, args.follow_ups)
+    finally:
+        proc.terminate()
+        proc.wait(timeout=30)
+        shutil.rmtree(state_dir, ignore_errors=True)
+
+    return {
+        "workers": workers,
+        "requests": args.requests,
+        "errors": args.requests - len(latencies),
+        "throughput_rps": round(len(latencies) / elapsed, 2),
+        "p50_ms": round(statistics.median(latencies) * 1000, 1) if latencies else None,
+        "p95_ms": round(latencies[int(0.95 * (len(latencies) - 1))] * 1000, 1) if latencies else None,
+        "rate_limit_allowed": allowed,
+        "rate_limit_shared": allowed == args.daily_limit,
+        "sessions_resumed": f"{resumed}/{args.follow_ups}",
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Throughput of the backend by worker count.")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--requests", type=int, default=80)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--latency", type=float, default=0.2, help="Fake Gemini latency per call in seconds.")
+    parser.add_argument("--follow-ups", type=int, default=6)
+    parser.add_argument("--daily-limit", type=int, default=10,
+                        help="RATE_LIMIT_DAILY for the server; 3x this many anonymous requests test the shared limit.")
+    parser.add_argument("--port", type=int, default=8100)
+    parser.add_argument("--state-url", help="SHARED_STATE_URL for the server (default: a fresh SQLite file per run).")
+    parser.add_argument("--json", help="Write the results to this file.")
+    args = parser.parse_args()
+
+    gemini = start_in_thread(latency=args.latency)
+    print(f"--- Load test: {args.requests} requests, {args.concurrency} clients, "
+          f"{args.latency * 1000:.0f} ms LLM latency, {os.cpu_count()} CPU(s) ---")
+    rows = []
+    for i, workers in enumerate(args.workers):
+        row = run(workers, args, gemini.url, args.port + i)
+        row["speedup"] = round(row["throughput_rps"] / rows[0]["throughput_rps"], 2) if rows else 1.0
+        rows.append(row)
+        print(f"workers={workers:<3} throughput={row['throughput_rps']:>7.2f} req/s  speedup={row['speedup']:.2f}x  "
+              f"p50={row['p50_ms']} ms  p95={row['p95_ms']} ms  errors={row['errors']}  "
+              f"rate limit allowed {row['rate_limit_allowed']}/{args.daily_limit * 3} "
+              f"({'shared' if row['rate_limit_shared'] else 'NOT shared'})  sessions resumed {row['sessions_resumed']}")
+    gemini.shutdown()
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"cpus": os.cpu_count(), "latency": args.latency, "runs": rows}, f, indent=2)
+    return 0 if all(r["rate_limit_shared"] and r["errors"] == 0 for r in rows) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,131 @@
+import json
+import os
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+from pydantic import PrivateAttr
+
+from core.prompt_cache import get_prefix_cache, tool_schema_text
+
+BENCHMARK_DIR = os.path.dirname(os.path.abspath(__file__))
+SOURCE_PLACEHOLDER = "@source"
+
+
+def _estimate_tokens(text: str) -> int:
+    # Rough Gemini-style estimate (~4 characters per token); good enough for relative comparisons
+    return max(1, len(text) // 4)
+
+
+def _message_text(message: BaseMessage) -> str:
+    content = message.content
+    if isinstance(content, list):
+        content = "".join(p.get("text", "") if isinstance(p, dict) else str(p) for p in content)
+    text = str(content)
+    for call in getattr(message, "tool_calls", None) or []:
+        text += json.dumps(call.get("args", {}))
+    return text
+
+
+class ReplayChatModel(BaseChatModel):
+    """
+    Chat model that replays a recorded agent transcript instead of calling Gemini.
+
+    Each call to the model returns the next recorded `AIMessage` (with its tool calls),
+    so the real StateGraph, tools and runners are exercised deterministically.
+    Once the transcript is exhausted, a plain text reply ends the agent loop.
+
+    Latency is simulated as `latency` per call plus `prefill_ms_per_1k` per thousand
+    uncached input tokens. Calls made with `cached_content` (see core/prompt_cache.py,
+    "local" mode) count the cached prefix as cache reads rather than sent tokens.
+    """
+
+    steps: List[Dict[str, Any]]
+    latency: float = 0.0
+    prefill_ms_per_1k: float = 0.0
+
+    _cursor: int = PrivateAttr(default=0)
+    _lock: Any = PrivateAttr(default_factory=threading.Lock)
+    _usage: Dict[str, int] = PrivateAttr(
+        default_factory=lambda: {"calls": 0, "input_tokens": 0, "cached_tokens": 0, "output_tokens": 0})
+
+    @property
+    def _llm_type(self) -> str:
+        return "replay"
+
+    def bind_tools(self, tools, **kwargs):
+        # Tool calls come from the transcript; binding only accounts for the schema tokens
+        return self.bind(bound_tool_tokens=_estimate_tokens(tool_schema_text(tools)))
+
+    @property
+    def usage(self) -> Dict[str, int]:
+        with self._lock:
+            return dict(self._usage)
+
+    @property
+    def remaining_steps(self) -> int:
+        with self._lock:
+            return len(self.steps) - self._cursor
+
+    def _generate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                  run_manager=None, **kwargs) -> ChatResult:
+        with self._lock:
+            index = self._cursor
+            self._cursor += 1
+
+        input_tokens = sum(_estimate_tokens(_message_text(m)) for m in messages)
+        input_tokens += kwargs.get("bound_tool_tokens", 0)
+        cached_tokens = 0
+        cache = get_prefix_cache()
+        if kwargs.get("cached_content") and cache is not None:
+            cached_tokens = _estimate_tokens(cache.prefix_for(kwargs["cached_content"]) or "")
+        delay = self.latency + self.prefill_ms_per_1k * input_tokens / 1000 / 1000
+        if delay:
+            time.sleep(delay)
+
+        if index < len(self.steps):
+            step = self.steps[index]
+            tool_calls = [
+                {"name": call["name"], "args": call["args"], "id": f"call_{index}_{i}", "type": "tool_call"}
+                for i, call in enumerate(step.get("tool_calls", []))
+            ]
+            message = AIMessage(content=step.get("content", ""), tool_calls=tool_calls)
+        else:
+            message = AIMessage(content="Transcript exhausted; stopping.")
+
+        output_tokens = _estimate_tokens(_message_text(message))
+        # Like Gemini, prompt tokens include cache reads, which are reported separately
+        message.usage_metadata = {
+            "input_tokens": input_tokens + cached_tokens,
+            "output_tokens": output_tokens,
+            "total_tokens": input_tokens + cached_tokens + output_tokens,
+            "input_token_details": {"cache_read": cached_tokens},
+        }
+        with self._lock:
+            self._usage["calls"] += 1
+            self._usage["input_tokens"] += input_tokens
+            self._usage["cached_tokens"] += cached_tokens
+            self._usage["output_tokens"] += output_tokens
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+
+def load_transcript(path: str) -> Dict[str, Any]:
+    """
+    Loads a transcript JSON file and resolves `@source` placeholders in tool arguments
+    to the content of the transcript's source file (paths relative to `benchmarks/`).
+    """
+    with open(path, "r", encoding="utf-8") as f:
+        transcript = json.load(f)
+
+    with open(os.path.join(BENCHMARK_DIR, transcript["source"]), "r", encoding="utf-8") as f:
+        source = f.read()
+    transcript["file_content"] = source
+    transcript["name"] = os.path.splitext(os.path.basename(path))[0]
+
+    for step in transcript["steps"]:
+        for call in step.get("tool_calls", []):
+            call["args"] = {k: (source if v == SOURCE_PLACEHOLDER else v) for k, v in call["args"].items()}
+    return transcript
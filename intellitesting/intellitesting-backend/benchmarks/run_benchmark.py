@@ -0,0 +1,371 @@
+"""
+Deterministic offline benchmark for the test-generation backend.
+
+Replays recorded agent transcripts (benchmarks/transcripts/*.json) through
+`TestGenerationService.generate_tests` with a `ReplayChatModel` instead of Gemini,
+so the real prompt building, StateGraph, tools and runners are measured without
+network access. Run from the backend directory:
+
+    python -m benchmarks.run_benchmark --iterations 5
+    python -m benchmarks.run_benchmark --json results.json
+    python -m benchmarks.run_benchmark --baseline results.json --tolerance 0.25
+    python -m benchmarks.run_benchmark --savings --prefill-ms-per-1k 40
+
+Set COVERAGE_FEEDBACK=true to replay with selection coverage fed back to the agent,
+and MUTATION_AFTER_GENERATION=true to also measure each returned suite's mutation score
+(the post-generation step counts towards latency).
+
+With --savings, the corpus is replayed twice more: with early termination disabled
+(AGENT_EARLY_EXIT=false) to report the LLM calls convergence detection saved, and
+with prompt prefix caching off (PROMPT_CACHE=off) to report the input tokens and
+simulated prefill latency the cached static prefix saves per request. The benchmark
+itself defaults to PROMPT_CACHE=local, the in-process stand-in for Gemini caching.
+
+With --baseline, the exit code is non-zero if p95 latency or throughput regressed
+by more than the tolerance, so the command can gate CI.
+"""
+import argparse
+import contextlib
+import copy
+import glob
+import io
+import json
+import math
+import os
+import sys
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional
+
+BENCHMARK_DIR = os.path.dirname(os.path.abspath(__file__))
+BACKEND_DIR = os.path.dirname(BENCHMARK_DIR)
+if BACKEND_DIR not in sys.path:
+    sys.path.insert(0, BACKEND_DIR)
+
+from langchain_core.callbacks import BaseCallbackHandler
+
+from benchmarks.replay_model import ReplayChatModel, load_transcript
+from core.validation import TestCodeValidator
+from core.test_dedup import TestCaseDeduplicator
+from schemas import SelectionRange
+from services.test_generation import TestGenerationService
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+
+class StageTimer(BaseCallbackHandler):
+    """Collects wall-clock time per graph node ("agent", "tools") and per tool invocation."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._starts = {}
+        self.totals = defaultdict(float)
+
+    def _start(self, run_id, stage):
+        with self._lock:
+            self._starts[run_id] = (stage, time.perf_counter())
+
+    def _end(self, run_id):
+        with self._lock:
+            entry = self._starts.pop(run_id, None)
+            if entry:
+                self.totals[entry[0]] += time.perf_counter() - entry[1]
+
+    def on_chain_start(self, serialized, inputs, *, run_id, metadata=None, **kwargs):
+        node = (metadata or {}).get("langgraph_node")
+        if node and kwargs.get("name") == node:
+            self._start(run_id, f"node:{node}")
+
+    def on_chain_end(self, outputs, *, run_id, **kwargs):
+        self._end(run_id)
+
+    def on_chain_error(self, error, *, run_id, **kwargs):
+        self._end(run_id)
+
+    def on_tool_start(self, serialized, input_str, *, run_id, **kwargs):
+        self._start(run_id, f"tool:{kwargs.get('name') or (serialized or {}).get('name', 'unknown')}")
+
+    def on_tool_end(self, output, *, run_id, **kwargs):
+        self._end(run_id)
+
+    def on_tool_error(self, error, *, run_id, **kwargs):
+        self._end(run_id)
+
+
+def percentile(values: List[float], pct: float) -> float:
+    """Nearest-rank percentile: the smallest value with at least pct% of values at or below it."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(1, math.ceil(pct / 100 * len(ordered)))
+    return ordered[min(rank, len(ordered)) - 1]
+
+
+def peak_rss_mb() -> Optional[float]:
+    """Peak RSS of the benchmark process (runner subprocesses are not included)."""
+    if resource is None:
+        return None
+    # ru_maxrss is KiB on Linux and bytes on macOS
+    scale = 1024 * 1024 if sys.platform == "darwin" else 1024
+    return round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / scale, 1)
+
+
+def run_once(transcript: Dict[str, Any], llm_latency: float, prefill_ms_per_1k: float) -> Dict[str, Any]:
+    model = ReplayChatModel(steps=copy.deepcopy(transcript["steps"]), latency=llm_latency,
+                            prefill_ms_per_1k=prefill_ms_per_1k)
+    timer = StageTimer()
+    source = transcript["file_content"]
+    lines = source.splitlines()
+    selection = transcript.get("selection") or [0, len(lines) - 1]  # 0-based inclusive, like the extension
+
+    started = time.perf_counter()
+    result = TestGenerationService.generate_tests(
+        file_content=source,
+        selected_code="\n".join(lines[selection[0]:selection[1] + 1]),
+        selection_range=SelectionRange(start=selection[0], end=selection[1]),
+        language=transcript["language"],
+        framework=transcript["framework"],
+        configuration={},
+        file_path=transcript["source"],
+        specification=transcript.get("specification"),
+        llm=model,
+        callbacks=[timer],
+    )
+    elapsed = time.perf_counter() - started
+
+    stages = dict(timer.totals)
+    graph_time = stages.get("node:agent", 0.0) + stages.get("node:tools", 0.0)
+    stages["prepare+extract"] = max(0.0, elapsed - graph_time)
+    usage = model.usage
+    return {
+        "latency": elapsed,
+        "stages": stages,
+        "llm_calls": usage["calls"],
+        "input_tokens": usage["input_tokens"],
+        "cached_tokens": usage["cached_tokens"],
+        "output_tokens": usage["output_tokens"],
+        "transcript_steps": len(transcript["steps"]),
+        "error": result.get("error"),
+        "test_cases": len(result.get("test_cases") or []),
+        "stop_reason": result.get("stop_reason"),
+        "coverage": result.get("coverage"),
+        "mutation_score": (result.get("mutation_score") or {}).get("score"),
+    }
+
+
+def summarize(samples: List[Dict[str, Any]], wall: float) -> Dict[str, Any]:
+    latencies = [s["latency"] for s in samples]
+    stage_totals = defaultdict(float)
+    for s in samples:
+        for stage, seconds in s["stages"].items():
+            stage_totals[stage] += seconds
+    count = len(samples)
+    return {
+        "runs": count,
+        "throughput_rps": round(count / wall, 3) if wall else 0.0,
+        "latency_ms": {
+            "mean": round(1000 * sum(latencies) / count, 2),
+            "p50": round(1000 * percentile(latencies, 50), 2),
+            "p95": round(1000 * percentile(latencies, 95), 2),
+            "p99": round(1000 * percentile(latencies, 99), 2),
+        },
+        "stage_mean_ms": {k: round(1000 * v / count, 2) for k, v in sorted(stage_totals.items())},
+        "llm_calls": sum(s["llm_calls"] for s in samples),
+        "input_tokens": sum(s["input_tokens"] for s in samples),
+        "cached_tokens": sum(s["cached_tokens"] for s in samples),
+        "output_tokens": sum(s["output_tokens"] for s in samples),
+        "errors": sum(1 for s in samples if s["error"]),
+        "early_stops": sum(1 for s in samples if s["stop_reason"]),
+        "coverage_measured": sum(1 for s in samples if s["coverage"]),
+        "coverage_target_met": sum(1 for s in samples if s["coverage"] and s["coverage"]["target_met"]),
+        "mutation_scores": [s["mutation_score"] for s in samples if s["mutation_score"] is not None],
+    }
+
+
+def run_benchmark(pattern: str, iterations: int, concurrency: int, llm_latency: float,
+                  prefill_ms_per_1k: float, verbose: bool) -> Dict[str, Any]:
+    paths = sorted(glob.glob(os.path.join(BENCHMARK_DIR, "transcripts", pattern)))
+    if not paths:
+        raise SystemExit(f"No transcripts match {pattern!r}")
+    transcripts = [load_transcript(p) for p in paths]
+    jobs = [t for _ in range(iterations) for t in transcripts]
+
+    # Tools like read_file resolve paths relative to the backend directory
+    os.chdir(BACKEND_DIR)
+    sink = contextlib.nullcontext() if verbose else contextlib.redirect_stdout(io.StringIO())
+    with sink:
+        run_once(transcripts[0], 0.0, 0.0)  # warm-up: imports, graph compilation, pytest startup caches
+        gate_before = TestCodeValidator.snapshot()
+        dedup_before = TestCaseDeduplicator.snapshot()
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            samples = list(pool.map(lambda t: (t["name"], run_once(t, llm_latency, prefill_ms_per_1k)), jobs))
+        wall = time.perf_counter() - started
+        gate = {k: v - gate_before[k] for k, v in TestCodeValidator.snapshot().items()}
+        dedup = {k: v - dedup_before[k] for k, v in TestCaseDeduplicator.snapshot().items()}
+
+    per_transcript = defaultdict(list)
+    for name, sample in samples:
+        per_transcript[name].append(sample)
+
+    return {
+        "config": {"iterations": iterations, "concurrency": concurrency, "llm_latency": llm_latency,
+                   "prefill_ms_per_1k": prefill_ms_per_1k, "prompt_cache": os.getenv("PROMPT_CACHE"),
+                   "transcripts": [t["name"] for t in transcripts]},
+        "overall": summarize([s for _, s in samples], wall),
+        "transcripts": {name: summarize(runs, sum(r["latency"] for r in runs)) for name, runs in per_transcript.items()},
+        "validation_gate": {
+            "checked": gate["checked"],
+            "rejected": gate["rejected"],
+            "subprocesses_avoided": gate["subprocesses_avoided"],
+            "mean_ms": round(gate["validation_ms"] / gate["checked"], 3) if gate["checked"] else 0.0,
+        },
+        "test_dedup": dedup,
+        "peak_rss_mb": peak_rss_mb(),
+    }
+
+
+@contextlib.contextmanager
+def _env(name: str, value: str):
+    previous = os.environ.get(name)
+    os.environ[name] = value
+    try:
+        yield
+    finally:
+        if previous is None:
+            os.environ.pop(name, None)
+        else:
+            os.environ[name] = previous
+
+
+def measure_savings(run_args: tuple, report: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Replays the corpus with one optimisation switched off at a time and diffs
+    the result against `report`, per transcript and per request.
+    """
+    with _env("AGENT_EARLY_EXIT", "false"):
+        no_early_exit = run_benchmark(*run_args)
+    with _env("PROMPT_CACHE", "off"):
+        no_cache = run_benchmark(*run_args)
+
+    savings = {"early_exit": {}, "prefix_cache": {}}
+    for name, summary in report["transcripts"].items():
+        before = no_early_exit["transcripts"][name]
+        savings["early_exit"][name] = {
+            "llm_calls_without": before["llm_calls"],
+            "llm_calls_saved": before["llm_calls"] - summary["llm_calls"],
+            "input_tokens_saved": before["input_tokens"] - summary["input_tokens"],
+        }
+        before = no_cache["transcripts"][name]
+        savings["prefix_cache"][name] = {
+            "input_tokens_without": round(before["input_tokens"] / before["runs"]),
+            "input_tokens_saved": round((before["input_tokens"] - summary["input_tokens"]) / summary["runs"]),
+            # Model time only (the agent node); tool runtimes are unaffected and would add noise
+            "llm_ms_saved": round(before["stage_mean_ms"].get("node:agent", 0.0)
+                                  - summary["stage_mean_ms"].get("node:agent", 0.0), 2),
+        }
+    for section in savings.values():
+        keys = list(next(iter(section.values())).keys())
+        section["total"] = {key: round(sum(v[key] for v in section.values()), 2) for key in keys}
+    return savings
+
+
+def print_report(report: Dict[str, Any]):
+    overall = report["overall"]
+    print(f"Runs: {overall['runs']}  Throughput: {overall['throughput_rps']} req/s  Errors: {overall['errors']}")
+    lat = overall["latency_ms"]
+    print(f"Latency ms  mean={lat['mean']}  p50={lat['p50']}  p95={lat['p95']}  p99={lat['p99']}")
+    print(f"LLM calls: {overall['llm_calls']}  input tokens sent: {overall['input_tokens']}  "
+          f"cached: {overall['cached_tokens']}  output tokens: {overall['output_tokens']}")
+    print(f"Early stops: {overall['early_stops']}")
+    gate = report["validation_gate"]
+    print(f"Validation gate: {gate['checked']} checked, {gate['rejected']} rejected, "
+          f"{gate['subprocesses_avoided']} subprocess launches avoided, {gate['mean_ms']} ms mean")
+    if overall["coverage_measured"]:
+        print(f"Coverage feedback: target met in {overall['coverage_target_met']} of "
+              f"{overall['coverage_measured']} measured runs")
+    if overall["mutation_scores"]:
+        scores = overall["mutation_scores"]
+        print(f"Mutation score: mean {sum(scores) / len(scores):.2f} over {len(scores)} measured suites")
+    print(f"Test case dedup: {report['test_dedup']['removed']} of {report['test_dedup']['submitted']} "
+          "submitted cases removed")
+    print(f"Peak RSS MB: {report['peak_rss_mb']}")
+    print("\nMean time per stage (ms):")
+    for stage, ms in overall["stage_mean_ms"].items():
+        print(f"  {stage:<28} {ms:>10}")
+    print("\nPer transcript:")
+    print(f"  {'name':<32} {'p50 ms':>10} {'p95 ms':>10} {'llm calls':>10}")
+    for name, summary in report["transcripts"].items():
+        print(f"  {name:<32} {summary['latency_ms']['p50']:>10} {summary['latency_ms']['p95']:>10} {summary['llm_calls']:>10}")
+    if "savings" in report:
+        print("\nEarly termination savings (vs AGENT_EARLY_EXIT=false, all runs):")
+        print(f"  {'name':<32} {'calls before':>12} {'calls saved':>12} {'tokens saved':>13}")
+        for name, saved in report["savings"]["early_exit"].items():
+            print(f"  {name:<32} {saved['llm_calls_without']:>12} {saved['llm_calls_saved']:>12} "
+                  f"{saved['input_tokens_saved']:>13}")
+        print("\nPrefix cache savings (vs PROMPT_CACHE=off, per request):")
+        print(f"  {'name':<32} {'tokens before':>13} {'tokens saved':>13} {'LLM ms saved':>13}")
+        for name, saved in report["savings"]["prefix_cache"].items():
+            print(f"  {name:<32} {saved['input_tokens_without']:>13} {saved['input_tokens_saved']:>13} "
+                  f"{saved['llm_ms_saved']:>13}")
+
+
+def compare_to_baseline(report: Dict[str, Any], baseline: Dict[str, Any], tolerance: float) -> List[str]:
+    """Returns a list of human-readable regressions (empty if within tolerance)."""
+    regressions = []
+    current, previous = report["overall"], baseline["overall"]
+    if current["latency_ms"]["p95"] > previous["latency_ms"]["p95"] * (1 + tolerance):
+        regressions.append(f"p95 latency {previous['latency_ms']['p95']}ms -> {current['latency_ms']['p95']}ms")
+    if current["throughput_rps"] < previous["throughput_rps"] * (1 - tolerance):
+        regressions.append(f"throughput {previous['throughput_rps']} -> {current['throughput_rps']} req/s")
+    if current["llm_calls"] > previous["llm_calls"]:
+        regressions.append(f"LLM calls {previous['llm_calls']} -> {current['llm_calls']}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline replay benchmark for the IntelliTesting backend.")
+    parser.add_argument("--transcripts", default="*.json", help="Glob (relative to benchmarks/transcripts).")
+    parser.add_argument("--iterations", type=int, default=3, help="Replays per transcript.")
+    parser.add_argument("--concurrency", type=int, default=1, help="Concurrent replays.")
+    parser.add_argument("--llm-latency", type=float, default=0.0, help="Simulated seconds per LLM call.")
+    parser.add_argument("--prefill-ms-per-1k", type=float, default=0.0,
+                        help="Simulated milliseconds per 1000 uncached input tokens.")
+    parser.add_argument("--json", help="Write the full report to this file.")
+    parser.add_argument("--baseline", help="Compare against a previous --json report.")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="Allowed relative regression vs baseline.")
+    parser.add_argument("--savings", action="store_true",
+                        help="Also report savings from early termination and prefix caching.")
+    parser.add_argument("--verbose", action="store_true", help="Show agent debug output.")
+    args = parser.parse_args()
+
+    os.environ.setdefault("PROMPT_CACHE", "local")
+    run_args = (args.transcripts, args.iterations, args.concurrency, args.llm_latency,
+                args.prefill_ms_per_1k, args.verbose)
+    report = run_benchmark(*run_args)
+    if args.savings:
+        report["savings"] = measure_savings(run_args, report)
+    print_report(report)
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            regressions = compare_to_baseline(report, json.load(f), args.tolerance)
+        if regressions:
+            print("\nREGRESSIONS:")
+            for r in regressions:
+                print(f"  - {r}")
+            sys.exit(1)
+        print("\nNo regressions against baseline.")
+
+
+if __name__ == "__main__":
+    main()
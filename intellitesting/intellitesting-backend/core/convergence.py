@@ -0,0 +1,64 @@
+import re
+import json
+import hashlib
+from typing import Optional, List
+
+# pytest: "FAILED /tmp/tmpab12.py::test_divide - AssertionError" / "ERROR /tmp/tmpab12.py - ModuleNotFoundError: ..."
+_PYTEST_FAILED = re.compile(r'^(?:FAILED|ERROR) \S+?(?:::(\S+))?(?: - (.*))?$', re.MULTILINE)
+# JUnit 4: "1) testApproveLoan(com.example.LoanProcessorTest)"
+_JUNIT_FAILED = re.compile(r'^\d+\) (\w+)\(', re.MULTILINE)
+# javac: "LoanProcessorTest.java:12: error: ')' expected"
+_JAVAC_ERROR = re.compile(r'error: (.+)$', re.MULTILINE)
+_TEMP_PATH = re.compile(r'\S*tmp\w*\S*')
+_NUMBER = re.compile(r'\d+')
+
+
+def _digest(parts: List[str]) -> str:
+    return hashlib.sha1("\n".join(parts).encode("utf-8")).hexdigest()[:16]
+
+
+def failure_signature(tool_output: str) -> Optional[str]:
+    """
+    Reduces a `run_unit_tests` result to a stable fingerprint of *what* failed
+    (failing test names plus compiler/collection errors), ignoring temp paths,
+    timings and line numbers. Returns None if the run passed or can't be parsed.
+    """
+    try:
+        data = json.loads(tool_output)
+    except (TypeError, json.JSONDecodeError):
+        return None
+    if data.get("passed") is True:
+        return None
+
+    text = "\n".join(str(data.get(k) or "") for k in ("error", "error_message", "stdout", "stderr"))
+    parts = []
+    for test_name, reason in _PYTEST_FAILED.findall(text):
+        parts.append(f"py:{test_name}:{_NUMBER.sub('N', reason.split(' - ')[0])}")
+    parts += [f"junit:{name}" for name in _JUNIT_FAILED.findall(text)]
+    parts += [f"javac:{message.strip()}" for message in _JAVAC_ERROR.findall(text)]
+
+    if not parts:
+        # Unknown output format: fall back to the whole text with volatile bits removed
+        parts = [_NUMBER.sub("N", _TEMP_PATH.sub("<tmp>", text)).strip()]
+    return _digest(sorted(set(parts)))
+
+
+def tool_call_signature(tool_calls: List[dict]) -> str:
+    """Fingerprint of a batch of tool calls (names and arguments, order-insensitive)."""
+    calls = [f"{c['name']}:{json.dumps(c.get('args', {}), sort_keys=True, default=str)}" for c in tool_calls]
+    return _digest(sorted(calls))
+
+
+def attach_notice(content: str, notice: str) -> str:
+    """
+    Appends a steering notice to a tool result. JSON results (run_unit_tests) get a
+    `notice` key so they stay machine-readable; plain text gets a trailing paragraph.
+    """
+    try:
+        data = json.loads(content)
+        if isinstance(data, dict):
+            data["notice"] = notice
+            return json.dumps(data)
+    except (TypeError, json.JSONDecodeError):
+        pass
+    return f"{content}\n\nNOTICE: {notice}"
@@ -0,0 +1,246 @@
+"""
+Coverage of the user's selection, measured while the generated tests run.
+
+Optional (COVERAGE_FEEDBACK=true, or `coverage_target` in the request configuration).
+The runners then put the source under test next to the tests and record which of
+its lines and branches inside `selection_range` executed:
+
+- Python: a conftest.py plugin using `sys.monitoring` (3.12+) with per-location
+  DISABLE so each line costs one event, falling back to a `sys.settrace` tracer
+  that only traces frames of the source file on older interpreters.
+- Java: the JaCoCo agent (JACOCO_AGENT_JAR) plus `jacococli report --xml`
+  (JACOCO_CLI_JAR); without both jars no coverage is reported.
+
+The agent gets a compact summary (counts, missing line ranges, lines gained since
+the previous run, whether the target is met) instead of a full report.
+"""
+import os
+import ast
+import json
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+from xml.etree import ElementTree
+
+from core.languages.factory import LanguageFactory
+
+COVERAGE_FEEDBACK = os.getenv("COVERAGE_FEEDBACK", "false") == "true"
+COVERAGE_TARGET = float(os.getenv("COVERAGE_TARGET", 0.9))
+JACOCO_AGENT_JAR = os.getenv("JACOCO_AGENT_JAR")
+JACOCO_CLI_JAR = os.getenv("JACOCO_CLI_JAR")
+
+OUTPUT_ENV = "INTELLITESTING_COVERAGE_OUTPUT"
+SOURCE_ENV = "INTELLITESTING_COVERAGE_SOURCE"
+
+# Written as conftest.py next to the test file; runs inside the pytest subprocess.
+PYTEST_PLUGIN = '''
+import atexit, json, os, sys
+
+_SOURCE = os.path.realpath(os.environ["%(source)s"])
+_OUTPUT = os.environ["%(output)s"]
+_lines, _arcs, _real = set(), set(), {}
+
+
+def _is_source(filename):
+    if filename not in _real:
+        _real[filename] = os.path.realpath(filename) == _SOURCE
+    return _real[filename]
+
+
+if hasattr(sys, "monitoring"):
+    _mon = sys.monitoring
+    _events = _mon.events
+    _branch = getattr(_events, "BRANCH_LEFT", 0) | getattr(_events, "BRANCH_RIGHT", 0) or _events.BRANCH
+    _offsets, _seen = {}, {}
+
+    def _line_at(code, offset):
+        table = _offsets.get(code)
+        if table is None:
+            table = _offsets[code] = list(code.co_lines())
+        for start, end, line in table:
+            if start <= offset < end:
+                return line
+        return None
+
+    def _on_line(code, line):
+        if _is_source(code.co_filename):
+            _lines.add(line)
+        return _mon.DISABLE
+
+    def _on_branch(code, offset, destination):
+        if not _is_source(code.co_filename):
+            return _mon.DISABLE
+        _arcs.add((_line_at(code, offset), _line_at(code, destination)))
+        taken = _seen.setdefault((code, offset), set())
+        taken.add(destination)
+        # Both directions seen: nothing more to learn at this location
+        return _mon.DISABLE if len(taken) > 1 else None
+
+    _mon.use_tool_id(_mon.COVERAGE_ID, "intellitesting")
+    _mon.register_callback(_mon.COVERAGE_ID, _events.LINE, _on_line)
+    _mon.register_callback(_mon.COVERAGE_ID, _branch, _on_branch)
+    _mon.set_events(_mon.COVERAGE_ID, _events.LINE | _branch)
+
+    def _stop():
+        _mon.set_events(_mon.COVERAGE_ID, 0)
+        _mon.free_tool_id(_mon.COVERAGE_ID)
+else:
+    import threading
+
+    def _tracer(frame, event, arg):
+        if not _is_source(frame.f_code.co_filename):
+            return None
+        last = [None]
+
+        def _local(frame, event, arg):
+            if event == "line":
+                _lines.add(frame.f_lineno)
+                _arcs.add((last[0], frame.f_lineno))
+                last[0] = frame.f_lineno
+            elif event == "return":
+                _arcs.add((last[0], 0))
+            return _local
+        return _local
+
+    sys.settrace(_tracer)
+    threading.settrace(_tracer)
+
+    def _stop():
+        sys.settrace(None)
+        threading.settrace(None)
+
+
+@atexit.register
+def _write():
+    # Stop recording first: the JSON writer and later atexit hooks must not be traced
+    _stop()
+    with open(_OUTPUT, "w") as f:
+        json.dump({"lines": sorted(_lines), "arcs": [a for a in _arcs if a[0] is not None]}, f)
+''' % {"source": SOURCE_ENV, "output": OUTPUT_ENV}
+
+
+def _executable_lines(code) -> Set[int]:
+    lines = {line for _, _, line in code.co_lines() if line}
+    for const in code.co_consts:
+        if hasattr(const, "co_lines"):
+            lines |= _executable_lines(const)
+    return lines
+
+
+def build_target(language: str, file_path: Optional[str], file_content: str,
+                 selection_range, target: Optional[float] = None) -> Optional[Dict[str, Any]]:
+    """
+    Describes what to measure for one request: the source file the runner must provide,
+    the selected 1-based line range and, for Python, its executable and branch lines.
+    Returns None if coverage is off or the source can't be analyzed.
+    """
+    if target is None and not COVERAGE_FEEDBACK:
+        return None
+    start, end = selection_range.start + 1, selection_range.end + 1
+    base = {"language": language, "file_content": file_content, "start": start, "end": end,
+            "target": COVERAGE_TARGET if target is None else float(target)}
+
+    if language == "python":
+        module = os.path.splitext(os.path.basename(file_path or ""))[0] or "source_under_test"
+        try:
+            tree = ast.parse(file_content)
+            code = compile(tree, f"{module}.py", "exec")
+        except SyntaxError:
+            return None
+        # Statements only: branches are tracked per line, and a conditional expression shares
+        # its line with the statement around it, so its outcomes can't be told apart
+        branch_nodes = (ast.If, ast.While, ast.For, ast.AsyncFor)
+        branches = {n.lineno for n in ast.walk(tree) if isinstance(n, branch_nodes) and start <= n.lineno <= end}
+        executable = {line for line in _executable_lines(code) if start <= line <= end}
+        return {**base, "module": module, "source_file": f"{module}.py",
+                "executable": sorted(executable), "branches": sorted(branches)}
+
+    if language == "java":
+        if not (JACOCO_AGENT_JAR and JACOCO_CLI_JAR):
+            print("WARN: Java coverage needs JACOCO_AGENT_JAR and JACOCO_CLI_JAR; skipping.")
+            return None
+        conventions = LanguageFactory.get_strategy("java").get_test_conventions(file_content)
+        if not conventions["source_class"]:
+            return None
+        package = conventions["source_package"]
+        class_name = conventions["source_class"]
+        return {**base, "package": package, "class_name": class_name, "source_file": f"{class_name}.java",
+                "qualified_name": f"{package}.{class_name}" if package else class_name}
+    return None
+
+
+def read_python_coverage(output_path: str, target: Dict[str, Any]) -> Tuple[Set[int], Dict[int, Tuple[int, int]]]:
+    """Covered lines and per-line (taken, total) branch outcomes from the plugin's output."""
+    with open(output_path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    destinations: Dict[int, Set[int]] = {}
+    for source, destination in data["arcs"]:
+        destinations.setdefault(source, set()).add(destination)
+    branches = {line: (min(2, len(destinations.get(line, ()))), 2) for line in target["branches"]}
+    return set(data["lines"]), branches
+
+
+def read_jacoco_xml(report_path: str, target: Dict[str, Any]) -> Tuple[Set[int], Dict[int, Tuple[int, int]], Set[int]]:
+    """Covered lines, branch outcomes and executable lines of the source file from a JaCoCo XML report."""
+    covered, branches, executable = set(), {}, set()
+    package_dir = (target["package"] or "").replace(".", "/")
+    for package in ElementTree.parse(report_path).getroot().iter("package"):
+        if package.get("name") != package_dir:
+            continue
+        for sourcefile in package.iter("sourcefile"):
+            if sourcefile.get("name") != target["source_file"]:
+                continue
+            for line in sourcefile.iter("line"):
+                number = int(line.get("nr"))
+                missed, hit = int(line.get("mi", 0)), int(line.get("ci", 0))
+                if missed + hit:
+                    executable.add(number)
+                if hit:
+                    covered.add(number)
+                total = int(line.get("mb", 0)) + int(line.get("cb", 0))
+                if total:
+                    branches[number] = (int(line.get("cb", 0)), total)
+    return covered, branches, executable
+
+
+def _ranges(lines: Iterable[int]) -> str:
+    """[3, 4, 5, 9] -> '3-5, 9'"""
+    parts, run = [], []
+    for line in sorted(lines):
+        if run and line != run[-1] + 1:
+            parts.append(f"{run[0]}-{run[-1]}" if len(run) > 1 else str(run[0]))
+            run = []
+        run.append(line)
+    if run:
+        parts.append(f"{run[0]}-{run[-1]}" if len(run) > 1 else str(run[0]))
+    return ", ".join(parts)
+
+
+def summarize(target: Dict[str, Any], covered: Set[int], branches: Dict[int, Tuple[int, int]],
+              executable: Optional[Set[int]] = None, previous: Optional[List[int]] = None) -> Dict[str, Any]:
+    """
+    Compact coverage summary for the selected range, plus the covered lines
+    (`covered_lines`, for the caller to keep between runs and strip before display).
+    """
+    start, end = target["start"], target["end"]
+    executable = {line for line in (executable if executable is not None else target["executable"])
+                  if start <= line <= end}
+    hit = covered & executable
+    in_range = {line: counts for line, counts in branches.items() if start <= line <= end}
+    branch_total = sum(total for _, total in in_range.values())
+    branch_hit = sum(taken for taken, _ in in_range.values())
+
+    ratio = len(hit) / len(executable) if executable else 1.0
+    if branch_total:
+        ratio = min(ratio, branch_hit / branch_total)
+    summary = {
+        "range": f"lines {start}-{end}",
+        "lines": f"{len(hit)}/{len(executable)}",
+        "branches": f"{branch_hit}/{branch_total}",
+        "missing_lines": _ranges(executable - hit),
+        "partial_branches": _ranges(line for line, (taken, total) in in_range.items() if taken < total),
+        "new_lines": len(hit - set(previous or [])),
+        "target": f"{target['target']:.0%}",
+        "target_met": ratio >= target["target"],
+    }
+    if target["language"] == "python":
+        summary["import_from"] = target["module"]
+    return {"coverage": summary, "covered_lines": sorted(hit | set(previous or []))}
@@ -1,8 +1,114 @@
 import re
-from typing import Dict, Any
+import hashlib
+from typing import Dict, Any, List, Optional, Tuple
 import os
 from core.languages.strategy import LanguageStrategy
 
+_TOKEN = re.compile(r"""
+    (?P<space>\s+)
+  | (?P<comment>//[^\n]*|/\*.*?\*/)
+  | (?P<string>\"\"\".*?\"\"\"|"(?:\\.|[^"\\\n])*"|'(?:\\.|[^'\\\n])+')
+  | (?P<unterminated>/\*|\"\"\"|"|')
+  | (?P<ident>[A-Za-z_$][\w$]*)
+  | (?P<number>\d[\w.]*)
+  | (?P<op>.)
+""", re.VERBOSE | re.DOTALL)
+_OPEN = {"(": ")", "[": "]", "{": "}"}
+_CLOSE = {v: k for k, v in _OPEN.items()}
+_TYPE_KEYWORDS = ("class", "interface", "enum", "record")
+# Keywords that can precede `name =` / `name;` without declaring `name`
+_NON_TYPE_KEYWORDS = {"return", "throw", "new", "else", "case", "assert", "yield", "this", "super"}
+
+
+def tokenize(code: str, offsets: bool = False) -> Tuple[List[tuple], List[str]]:
+    """
+    Single-pass Java tokenizer: returns (kind, text, line) tuples with whitespace and
+    comments dropped, plus errors for unterminated literals/comments.
+    With `offsets`, tuples are (kind, text, line, start offset) for source rewriting.
+    """
+    tokens, errors = [], []
+    line = 1
+    for match in _TOKEN.finditer(code):
+        kind, text = match.lastgroup, match.group()
+        if kind == "unterminated":
+            what = "comment" if text == "/*" else "text block" if text == '"""' else "literal"
+            errors.append(f"line {line}: unterminated {what} starting with {text}")
+            break
+        if kind not in ("space", "comment"):
+            tokens.append((kind, text, line, match.start()) if offsets else (kind, text, line))
+        line += text.count("\n")
+    return tokens, errors
+
+
+def _normalize_literal(kind: str, text: str) -> str:
+    """`1_000L` and `1000` (or `1e3` and `1000.0`) normalize alike; integers and floats stay distinct."""
+    if kind != "number":
+        return text
+    value = text.replace("_", "")
+    try:
+        if value[:2].lower() in ("0x", "0b"):
+            return str(int(value.rstrip("lL"), 0))
+        if value.isdigit() or value[:-1].isdigit() and value[-1] in "lL":
+            return text if value[0] == "0" and len(value.rstrip("lL")) > 1 else str(int(value.rstrip("lL")))
+        return repr(float(value.rstrip("fFdD")))
+    except ValueError:
+        return text
+
+
+def _digest(texts: List[str]) -> str:
+    return hashlib.sha1(" ".join(texts).encode("utf-8")).hexdigest()[:16]
+
+
+def _qualified_name(tokens, i: int) -> Tuple[str, int]:
+    """Reads `a.b.C` / `a.b.*` starting at token i; returns (name, index after it)."""
+    parts = []
+    while i < len(tokens) and (tokens[i][0] == "ident" or tokens[i][1] in (".", "*")):
+        parts.append(tokens[i][1])
+        i += 1
+    return "".join(parts), i
+
+
+def declarations(tokens) -> Dict[str, Any]:
+    """
+    Top-level structure from the token stream: package, imports and type declarations
+    (name, line, public), plus bracket-balance errors.
+    """
+    result = {"package": None, "package_line": None, "imports": [], "types": [], "errors": []}
+    stack = []
+    public = False
+    i = 0
+    while i < len(tokens):
+        kind, text, line = tokens[i]
+        if text in _OPEN and kind == "op":
+            stack.append((text, line))
+        elif text in _CLOSE and kind == "op":
+            if not stack or stack[-1][0] != _CLOSE[text]:
+                opened = f", but '{stack[-1][0]}' from line {stack[-1][1]} is still open" if stack else ""
+                result["errors"].append(f"line {line}: unmatched '{text}'{opened}")
+                return result
+            stack.pop()
+        elif not stack and kind == "ident":
+            if text == "package":
+                result["package"], i = _qualified_name(tokens, i + 1)
+                result["package_line"] = line
+                continue
+            if text == "import":
+                start = i + 2 if i + 1 < len(tokens) and tokens[i + 1][1] == "static" else i + 1
+                name, i = _qualified_name(tokens, start)
+                result["imports"].append(name)
+                continue
+            if text == "public":
+                public = True
+            elif text in _TYPE_KEYWORDS and i + 1 < len(tokens) and tokens[i + 1][0] == "ident":
+                result["types"].append({"name": tokens[i + 1][1], "line": line, "public": public})
+                public = False
+        if text in (";", "}") and not stack:
+            public = False
+        i += 1
+    for opener, line in stack:
+        result["errors"].append(f"line {line}: '{opener}' is never closed")
+    return result
+
 class JavaStrategy(LanguageStrategy):
     @property
     def language_id(self) -> str:
@@ -93,3 +199,92 @@ class JavaStrategy(LanguageStrategy):
             
         # Fallback: create in src/test/java at root if unable to determine
         return f"src/test/java/{test_filename}"
+
+    def validate_test_code(self, test_code: str, conventions: Optional[Dict[str, Any]] = None) -> List[str]:
+        tokens, errors = tokenize(test_code)
+        if errors:
+            return errors
+        structure = declarations(tokens)
+        if structure["errors"]:
+            return structure["errors"]
+        if not structure["types"]:
+            return ["no class declaration found"]
+
+        # JUnitRunner names the file after the first `class X` in the raw text
+        runner_match = re.search(r'class\s+(\w+)', test_code)
+        file_name = f"{runner_match.group(1)}.java" if runner_match else None
+        public_types = [t for t in structure["types"] if t["public"]]
+        if len(public_types) > 1:
+            errors.append(f"line {public_types[1]['line']}: only one public top-level class is allowed per file")
+        for declared in public_types[:1]:
+            if f"{declared['name']}.java" != file_name:
+                errors.append(f"line {declared['line']}: class {declared['name']} is public, should be declared "
+                              f"in a file named {declared['name']}.java (the file is saved as {file_name}, "
+                              "after the first `class` in the code, comments included)")
+
+        package = structure["package"]
+        expected = (conventions or {}).get("test_package")
+        if conventions is not None and package != expected:
+            where = f"line {structure['package_line']}: " if package else ""
+            want = f"`package {expected};`" if expected else "no package declaration"
+            errors.append(f"{where}PROJECT STRUCTURE CONVENTION requires {want}, found "
+                          f"{f'`package {package};`' if package else 'none'}")
+        source_package = (conventions or {}).get("source_package")
+        source_class = (conventions or {}).get("source_class")
+        if source_package and source_class and package != source_package:
+            wanted = (f"{source_package}.{source_class}", f"{source_package}.*")
+            if not any(name in wanted for name in structure["imports"]):
+                errors.append(f"missing `import {source_package}.{source_class};` for the class under test")
+
+        texts = [t[1] for t in tokens]
+        annotations = {texts[i + 1] for i, text in enumerate(texts[:-1]) if text == "@"}
+        if any(name.startswith("org.junit.jupiter") for name in structure["imports"]):
+            errors.append("tests run with JUnit 4 (org.junit.runner.JUnitCore): import org.junit.Test, "
+                          "not org.junit.jupiter.*")
+        elif "Test" in annotations and not any(
+                name in ("org.junit.Test", "org.junit.*") for name in structure["imports"]):
+            errors.append("@Test is used but `import org.junit.Test;` is missing")
+        elif "Test" not in annotations and "org" not in annotations and "TestCase" not in texts:
+            errors.append("no @Test methods found (JUnitCore would fail with 'No runnable methods')")
+        return errors
+
+    def fingerprint_test_case(self, code: str) -> Optional[Tuple[str, List[str]]]:
+        tokens, errors = tokenize(code)
+        if errors or not tokens:
+            return None
+        start = next((i for i, t in enumerate(tokens) if t[1] == "{" and t[0] == "op"), None)
+        if start is None or tokens[-1][1] != "}":
+            return None
+
+        # Header: annotations, modifiers, return type and throws clause, without the method name
+        header = []
+        for i, (kind, text, _) in enumerate(tokens[:start]):
+            is_name = (kind == "ident" and tokens[i + 1][1] == "(" and i > 0
+                       and (tokens[i - 1][0] == "ident" or tokens[i - 1][1] in (">", "]")))
+            header.append("<name>" if is_name else _normalize_literal(kind, text))
+
+        body = tokens[start + 1:-1]
+        names = {}
+        for i, (kind, text, _) in enumerate(body):
+            if kind != "ident" or i == 0 or i + 1 >= len(body) or text in names:
+                continue
+            previous_kind, previous, _ = body[i - 1]
+            if body[i + 1][1] in ("=", ";", ":", ",") and previous not in _NON_TYPE_KEYWORDS \
+                    and (previous_kind == "ident" or previous in (">", "]")):
+                names[text] = f"v{len(names)}"
+
+        statements, current, depth = [], [], 0
+        for i, (kind, text, _) in enumerate(body):
+            if kind == "ident" and text in names and (i == 0 or body[i - 1][1] != "."):
+                text = names[text]
+            current.append(_normalize_literal(kind, text))
+            if kind == "op" and text in "{([":
+                depth += 1
+            elif kind == "op" and text in "})]":
+                depth -= 1
+            if depth <= 0 and (text == ";" or (text == "}" and kind == "op")):
+                statements.append(_digest(current))
+                current, depth = [], 0
+        if current:
+            statements.append(_digest(current))
+        return _digest(header), statements
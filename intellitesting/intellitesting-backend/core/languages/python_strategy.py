@@ -1,7 +1,91 @@
 import ast
-from typing import Dict, Any
+import sys
+import hashlib
+import textwrap
+import tempfile
+import importlib.util
+from importlib.machinery import PathFinder
+from typing import Dict, Any, List, Optional, Tuple
 from core.languages.strategy import LanguageStrategy
 
+# Modules found once stay found; misses are re-checked (cheap) in case a package gets installed
+_resolved_modules = set(sys.builtin_module_names)
+
+
+def _module_resolvable(name: str) -> bool:
+    """
+    True if a top-level module can be imported by the test run. Only finds specs (nothing
+    is imported); the temp directory counts because pytest puts the test file's dir on sys.path.
+    """
+    if name in _resolved_modules:
+        return True
+    try:
+        found = importlib.util.find_spec(name) is not None or \
+            PathFinder.find_spec(name, [tempfile.gettempdir()]) is not None
+    except (ImportError, ValueError):
+        found = False
+    if found:
+        _resolved_modules.add(name)
+    return found
+
+
+def _guarded(handlers: List[ast.ExceptHandler]) -> bool:
+    """True if a try block handles ImportError (optional imports must not be rejected)."""
+    for handler in handlers:
+        names = handler.type.elts if isinstance(handler.type, ast.Tuple) else [handler.type]
+        if handler.type is None or any(isinstance(n, ast.Name) and n.id in
+                                       ("ImportError", "ModuleNotFoundError", "Exception") for n in names):
+            return True
+    return False
+
+
+def _module_imports(body: List[ast.stmt]):
+    """
+    Yields (line, top-level module) for unconditional absolute imports in a module body.
+    Imports under `if` (platform checks, TYPE_CHECKING) may never run, so they are skipped.
+    """
+    for node in body:
+        if isinstance(node, ast.Import):
+            for alias in node.names:
+                yield node.lineno, alias.name.split(".")[0]
+        elif isinstance(node, ast.ImportFrom) and node.level == 0 and node.module:
+            yield node.lineno, node.module.split(".")[0]
+        elif isinstance(node, ast.Try) and not _guarded(node.handlers):
+            yield from _module_imports(node.body)
+
+
+def _is_test_class(node: ast.ClassDef) -> bool:
+    """`Test*` classes, `unittest.TestCase` subclasses and classes with `test*` methods."""
+    if node.name.startswith("Test"):
+        return True
+    for base in node.bases:
+        name = base.attr if isinstance(base, ast.Attribute) else base.id if isinstance(base, ast.Name) else ""
+        if name.endswith("TestCase"):
+            return True
+    return any(isinstance(n, (ast.FunctionDef, ast.AsyncFunctionDef)) and n.name.startswith("test")
+               for n in node.body)
+
+def _fingerprint(node) -> str:
+    return hashlib.sha1(ast.dump(node, annotate_fields=False).encode("utf-8")).hexdigest()[:16]
+
+
+class _LocalRenamer(ast.NodeTransformer):
+    """Renames local variables to v0, v1, ... in order of first assignment."""
+
+    def __init__(self, names: Dict[str, str]):
+        self.names = names
+
+    def visit_Name(self, node):
+        if node.id in self.names:
+            node.id = self.names[node.id]
+        return node
+
+    def visit_ExceptHandler(self, node):
+        if node.name in self.names:
+            node.name = self.names[node.name]
+        return self.generic_visit(node)
+
+
 class PythonStrategy(LanguageStrategy):
     @property
     def language_id(self) -> str:
@@ -54,3 +138,59 @@ class PythonStrategy(LanguageStrategy):
             dir_parts = path_parts[:-1]
             
         return f"tests/{'/'.join(dir_parts)}/{test_filename}".replace("//", "/")
+
+    def validate_test_code(self, test_code: str, conventions: Optional[Dict[str, Any]] = None) -> List[str]:
+        filename = "test_generated.py"
+        try:
+            tree = compile(test_code, filename, "exec", ast.PyCF_ONLY_AST)
+            # Second pass catches errors only the compiler sees ('return' outside function, etc.)
+            compile(tree, filename, "exec")
+        except SyntaxError as e:
+            return [f"{filename}:{e.lineno}: SyntaxError: {e.msg}"]
+
+        errors = []
+        provided = set((conventions or {}).get("provided_modules", []))
+        for line, module in _module_imports(tree.body):
+            if module != "__future__" and module not in provided and not _module_resolvable(module):
+                errors.append(f"{filename}:{line}: ModuleNotFoundError: No module named '{module}' "
+                              "(the test file runs standalone; only installed packages can be imported)")
+
+        collectable = any(
+            (isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)) and node.name.startswith("test"))
+            or (isinstance(node, ast.ClassDef) and _is_test_class(node))
+            for node in tree.body
+        )
+        if not collectable:
+            errors.append(f"{filename}: no tests collected: define `test_*` functions, `Test*` classes or `unittest.TestCase` subclasses")
+        return errors
+
+    def fingerprint_test_case(self, code: str) -> Optional[Tuple[str, List[str]]]:
+        try:
+            tree = ast.parse(textwrap.dedent(code))
+        except SyntaxError:
+            return None
+        functions = [n for n in tree.body if isinstance(n, (ast.FunctionDef, ast.AsyncFunctionDef))]
+        if len(functions) != 1 or len(tree.body) != 1:
+            # Not a single test function: only exact (normalized) duplicates can be detected
+            return "module", [_fingerprint(tree)]
+        function = functions[0]
+
+        body = function.body
+        if body and isinstance(body[0], ast.Expr) and isinstance(body[0].value, ast.Constant) \
+                and isinstance(body[0].value.value, str):
+            body = body[1:]  # docstring
+        # Parameters are fixture names, so only locally bound names are renamed
+        parameters = {a.arg for a in ast.walk(function.args) if isinstance(a, ast.arg)}
+        names = {}
+        for statement in body:
+            for node in ast.walk(statement):
+                bound = node.id if isinstance(node, ast.Name) and isinstance(node.ctx, ast.Store) else \
+                    node.name if isinstance(node, ast.ExceptHandler) and node.name else None
+                if bound and bound not in parameters and bound not in names:
+                    names[bound] = f"v{len(names)}"
+        renamer = _LocalRenamer(names)
+        statements = [_fingerprint(renamer.visit(statement)) for statement in body]
+
+        header = ast.Module(body=[*function.decorator_list, function.args], type_ignores=[])
+        kind = "async" if isinstance(function, ast.AsyncFunctionDef) else "def"
+        return f"{kind}:{_fingerprint(header)}", statements
@@ -1,5 +1,5 @@
 from abc import ABC, abstractmethod
-from typing import Dict, Any
+from typing import Dict, Any, List, Optional, Tuple
 
 class LanguageStrategy(ABC):
     """
@@ -32,3 +32,35 @@ class LanguageStrategy(ABC):
         Determines the conventional test file path based on the source path.
         """
         pass
+
+    def get_test_conventions(self, code: str) -> Dict[str, Optional[str]]:
+        """
+        Derives the PROJECT STRUCTURE CONVENTION for tests of this source:
+        the source package, the test package ('main' -> 'test') and the class under test.
+        """
+        analysis = self.analyze_code(code)
+        source_package = analysis.get("package")
+        source_classes = analysis.get("classes") or []
+        return {
+            "source_package": source_package,
+            "test_package": source_package.replace("main", "test") if source_package else None,
+            "source_class": source_classes[0] if source_classes else None,
+        }
+
+    def validate_test_code(self, test_code: str, conventions: Optional[Dict[str, Any]] = None) -> List[str]:
+        """
+        Cheap in-process checks run before the test subprocess is launched.
+        Returns a list of error messages (empty if the code may be run).
+        Checks must be conservative: never reject code the runner would accept.
+        """
+        return []
+
+    def fingerprint_test_case(self, code: str) -> Optional[Tuple[str, List[str]]]:
+        """
+        Normalizes one generated test case (name, local variable names, literal
+        formatting, whitespace and comments) and returns (header fingerprint,
+        per-statement fingerprints), or None if the code can't be analyzed.
+        The header covers what changes a test's meaning besides its body
+        (decorators/annotations, fixtures/parameters).
+        """
+        return None
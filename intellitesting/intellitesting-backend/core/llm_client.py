@@ -0,0 +1,269 @@
+import os
+import time
+import random
+import threading
+import contextvars
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from typing import Any, Optional
+
+import httpx
+
+from core import metrics
+
+# HTTP status codes worth retrying: rate limiting and server-side hiccups.
+TRANSIENT_STATUS_CODES = {408, 429, 500, 502, 503, 504}
+LLM_REQUEST_DEADLINE = float(os.getenv("LLM_REQUEST_DEADLINE", 120))
+
+_shared_transport = None
+_shared_executor = None
+_transport_lock = threading.Lock()
+
+
+class _SharedTransport(httpx.HTTPTransport):
+    """
+    The google-genai client closes its httpx client (and with it the transport) when it is
+    garbage collected, which would drop every pooled connection, including ones other
+    requests are using, each time a per-request user-key model goes away. The shared pool
+    lives as long as the process, so closing it (directly or via a `with` block) is a no-op.
+    """
+
+    def close(self) -> None:
+        pass
+
+    def __exit__(self, *exc_info) -> None:
+        pass
+
+
+def get_shared_transport() -> httpx.HTTPTransport:
+    """
+    Returns a process-wide HTTP transport so every Gemini client (server key and
+    user keys alike) draws from the same keep-alive connection pool.
+    """
+    global _shared_transport
+    with _transport_lock:
+        if _shared_transport is None:
+            _shared_transport = _SharedTransport(
+                limits=httpx.Limits(
+                    max_connections=int(os.getenv("LLM_MAX_CONNECTIONS", 20)),
+                    max_keepalive_connections=int(os.getenv("LLM_MAX_KEEPALIVE", 10)),
+                    keepalive_expiry=float(os.getenv("LLM_KEEPALIVE_EXPIRY", 60)),
+                ),
+                retries=1,
+            )
+        return _shared_transport
+
+
+def _get_shared_executor() -> ThreadPoolExecutor:
+    """Thread pool used to run (and hedge) LLM calls; shared by every client instance."""
+    global _shared_executor
+    with _transport_lock:
+        if _shared_executor is None:
+            _shared_executor = ThreadPoolExecutor(
+                max_workers=int(os.getenv("LLM_HEDGE_WORKERS", 16)),
+                thread_name_prefix="llm-call"
+            )
+            metrics.POOL_SIZE.set(_shared_executor._max_workers, pool="llm")
+        return _shared_executor
+
+
+class LLMDeadlineExceeded(Exception):
+    """Raised when an LLM call cannot complete within its per-request deadline."""
+
+
+def is_transient_error(error: Exception) -> bool:
+    """
+    Classifies an exception raised by the LLM client as retryable or not.
+    Status codes are read duck-typed so any provider SDK error works, and the
+    `__cause__` chain is followed because LangChain re-raises SDK errors.
+    """
+    while error is not None:
+        if isinstance(error, (httpx.TransportError, ConnectionError, TimeoutError)):
+            return True
+        status = getattr(error, "code", None) or getattr(error, "status_code", None)
+        if status is None:
+            response = getattr(error, "response", None)
+            status = getattr(response, "status_code", None)
+        try:
+            if int(status) in TRANSIENT_STATUS_CODES:
+                return True
+        except (TypeError, ValueError):
+            pass
+        error = error.__cause__
+    return False
+
+
+class ResilientLLMClient:
+    """
+    Wraps a LangChain runnable (e.g. `llm.bind_tools(...)`) with:
+    - jittered exponential backoff on transient errors,
+    - optional hedged requests once the primary call exceeds a latency percentile,
+    - a per-request deadline covering all attempts and backoff sleeps.
+
+    Calls run on a shared pool of LLM_HEDGE_WORKERS threads. A call abandoned at its
+    deadline (or a losing hedge) is only cancelled logically: its thread stays busy until
+    the HTTP request returns. Give the wrapped model an HTTP timeout (build_agent_app sets
+    it to LLM_REQUEST_DEADLINE) so a hung call frees its slot instead of shrinking the pool.
+    """
+
+    def __init__(
+        self,
+        runnable,
+        max_attempts: int = None,
+        base_delay: float = None,
+        max_delay: float = None,
+        deadline: float = None,
+        hedge_percentile: Optional[float] = None,
+        hedge_min_samples: int = 20,
+        history_size: int = 200,
+    ):
+        self.runnable = runnable
+        self.max_attempts = max_attempts or int(os.getenv("LLM_MAX_ATTEMPTS", 4))
+        self.base_delay = base_delay if base_delay is not None else float(os.getenv("LLM_BACKOFF_BASE", 0.5))
+        self.max_delay = max_delay if max_delay is not None else float(os.getenv("LLM_BACKOFF_MAX", 8.0))
+        self.deadline = deadline or LLM_REQUEST_DEADLINE
+        if hedge_percentile is None and os.getenv("LLM_HEDGE_PERCENTILE"):
+            hedge_percentile = float(os.getenv("LLM_HEDGE_PERCENTILE"))
+        self.hedge_percentile = hedge_percentile
+        self.hedge_min_samples = hedge_min_samples
+        self._latencies = deque(maxlen=history_size)
+        self._lock = threading.Lock()
+        self.stats = {"calls": 0, "retries": 0, "hedges": 0, "hedge_wins": 0, "deadline_exceeded": 0}
+
+    def invoke(self, messages, deadline: float = None) -> Any:
+        """
+        Invokes the wrapped runnable, retrying transient failures until it succeeds,
+        hits `max_attempts`, or runs out of time.
+        """
+        budget = min(deadline, self.deadline) if deadline is not None else self.deadline
+        started = time.monotonic()
+        expires_at = started + budget
+        self._bump("calls")
+
+        attempt = 0
+        outcome = "error"
+        try:
+            while True:
+                attempt += 1
+                try:
+                    response = self._invoke_once(messages, expires_at)
+                    outcome = "ok"
+                    _record_usage(response)
+                    return response
+                except LLMDeadlineExceeded:
+                    self._bump("deadline_exceeded")
+                    outcome = "deadline_exceeded"
+                    raise
+                except Exception as e:
+                    if attempt >= self.max_attempts or not is_transient_error(e):
+                        raise
+                    delay = self._backoff(attempt)
+                    if time.monotonic() + delay >= expires_at:
+                        self._bump("deadline_exceeded")
+                        outcome = "deadline_exceeded"
+                        raise LLMDeadlineExceeded(
+                            f"LLM deadline of {budget:.1f}s exceeded after {attempt} attempt(s): {e}"
+                        ) from e
+                    print(f"WARN: Transient LLM error (attempt {attempt}/{self.max_attempts}), retrying in {delay:.2f}s: {e}")
+                    self._bump("retries")
+                    time.sleep(delay)
+        finally:
+            metrics.LLM_CALLS.inc(outcome=outcome)
+            metrics.LLM_LATENCY.observe(time.monotonic() - started)
+            if outcome == "deadline_exceeded":
+                metrics.TIMEOUTS.inc(kind="llm_deadline")
+
+    def hedge_delay(self) -> Optional[float]:
+        """The latency after which a hedged request is sent, or None if hedging is off."""
+        if self.hedge_percentile is None:
+            return None
+        with self._lock:
+            if len(self._latencies) < self.hedge_min_samples:
+                return None
+            ordered = sorted(self._latencies)
+        index = min(len(ordered) - 1, int(len(ordered) * self.hedge_percentile / 100))
+        return ordered[index]
+
+    def _invoke_once(self, messages, expires_at: float) -> Any:
+        remaining = expires_at - time.monotonic()
+        if remaining <= 0:
+            raise LLMDeadlineExceeded("LLM deadline exceeded before the request was sent.")
+
+        started = time.monotonic()
+        primary = self._submit(messages)
+        pending = {primary}
+
+        hedge_after = self.hedge_delay()
+        if hedge_after is not None and hedge_after < remaining:
+            done, _ = wait(pending, timeout=hedge_after)
+            if not done:
+                self._bump("hedges")
+                pending.add(self._submit(messages))
+
+        error = None
+        while pending:
+            timeout = expires_at - time.monotonic()
+            if timeout <= 0:
+                break
+            done, pending = wait(pending, timeout=timeout, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is None:
+                    for loser in pending:
+                        loser.cancel()
+                    if future is not primary:
+                        self._bump("hedge_wins")
+                    self._record_latency(time.monotonic() - started)
+                    return future.result()
+                error = future.exception()
+
+        if error is not None and not pending:
+            raise error
+        for future in pending:
+            future.cancel()
+        raise LLMDeadlineExceeded("LLM call did not complete before its deadline.")
+
+    def _submit(self, messages):
+        # Copy the caller's context so LangChain callbacks/tracing follow the call onto the pool thread
+        context = contextvars.copy_context()
+        metrics.POOL_QUEUED.inc(pool="llm")
+        future = _get_shared_executor().submit(_run_in_pool, context, self.runnable.invoke, messages)
+        # A hedge cancelled before it started never leaves the queue through _run_in_pool
+        future.add_done_callback(lambda f: f.cancelled() and metrics.POOL_QUEUED.dec(pool="llm"))
+        return future
+
+    def _backoff(self, attempt: int) -> float:
+        # "Full jitter": uniform over [0, min(cap, base * 2^(attempt - 1))], attempt counting from 1
+        ceiling = min(self.max_delay, self.base_delay * (2 ** (attempt - 1)))
+        return random.uniform(0, ceiling)
+
+    def _record_latency(self, latency: float):
+        with self._lock:
+            self._latencies.append(latency)
+
+    def _bump(self, key: str):
+        with self._lock:
+            self.stats[key] += 1
+        if key == "retries":
+            metrics.LLM_RETRIES.inc()
+        elif key == "hedges":
+            metrics.LLM_HEDGES.inc()
+
+
+def _run_in_pool(context, function, *args):
+    metrics.POOL_QUEUED.dec(pool="llm")
+    metrics.POOL_BUSY.inc(pool="llm")
+    try:
+        return context.run(function, *args)
+    finally:
+        metrics.POOL_BUSY.dec(pool="llm")
+
+
+def _record_usage(response):
+    """Token counts from the response's `usage_metadata`, when the provider reports them."""
+    usage = getattr(response, "usage_metadata", None) or {}
+    for kind in ("input_tokens", "output_tokens"):
+        if usage.get(kind):
+            metrics.LLM_TOKENS.inc(usage[kind], kind=kind.split("_")[0])
+    cached = (usage.get("input_token_details") or {}).get("cache_read")
+    if cached:
+        metrics.LLM_TOKENS.inc(cached, kind="cached")
@@ -0,0 +1,396 @@
+"""
+In-process operational metrics with a Prometheus text exposition (`GET /metrics`).
+
+Recording is cheap enough for hot paths: every thread increments its own shard (a
+plain dict only that thread writes), so `inc`/`observe` take no lock. A scrape sums
+the shards. Gauges are moved with inc/dec, or read at scrape time from callbacks
+registered by the component that owns the state (e.g. a thread pool's queue).
+
+With several worker processes (`uvicorn --workers N`, gunicorn), set
+METRICS_MULTIPROC_DIR to a directory shared by the workers (empty it before the
+server starts). Each worker then writes its values to `<dir>/metrics_<pid>.json`
+every METRICS_FLUSH_INTERVAL seconds and at exit, and whichever worker serves the
+scrape merges all files: counters and histograms are summed over every worker that
+ever ran (they are cumulative), gauges only over workers that are still alive.
+"""
+import os
+import json
+import time
+import atexit
+import threading
+from abc import ABC, abstractmethod
+from bisect import bisect_left
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "true") == "true"
+METRICS_MULTIPROC_DIR = os.getenv("METRICS_MULTIPROC_DIR")
+METRICS_FLUSH_INTERVAL = float(os.getenv("METRICS_FLUSH_INTERVAL", 5))
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300)
+COUNT_BUCKETS = (1, 2, 3, 4, 5, 6, 8, 10, 15, 20)
+
+
+def _escape(value) -> str:
+    return ("" if value is None else str(value)).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Tuple[str, ...], values: Tuple[str, ...], extra: str = "") -> str:
+    parts = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) and not value.is_integer() else str(int(value))
+
+
+class _Metric(ABC):
+    """
+    Base class: a named family with fixed label names. Values live in per-thread
+    shards; shards of finished threads are folded into `_retired` at scrape time.
+    """
+
+    kind = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._local = threading.local()
+        self._shards: List[Tuple[threading.Thread, dict]] = []
+        self._retired: dict = {}
+        self._lock = threading.Lock()
+
+    def _shard(self) -> dict:
+        shard = getattr(self._local, "shard", None)
+        if shard is None:
+            shard = self._local.shard = {}
+            with self._lock:
+                self._shards.append((threading.current_thread(), shard))
+        return shard
+
+    def _key(self, labels: Dict[str, str]) -> Tuple[str, ...]:
+        return tuple(map(labels.get, self.labelnames)) if labels else ()
+
+    @abstractmethod
+    def _merge(self, into: dict, shard: dict):
+        """Adds the values of `shard` into `into` (both keyed by label values)."""
+        pass
+
+    @abstractmethod
+    def collect(self) -> dict:
+        pass
+
+    def _collect_shards(self) -> dict:
+        totals: dict = {}
+        with self._lock:
+            live = []
+            for thread, shard in self._shards:
+                if thread.is_alive():
+                    live.append((thread, shard))
+                else:
+                    # No writer left, so the shard can be folded in place
+                    self._merge(self._retired, shard)
+            self._shards = live
+            self._merge(totals, self._retired)
+            shards = [shard for _, shard in live]
+        for shard in shards:
+            # dict(...) of a dict with str/tuple keys runs without releasing the GIL
+            self._merge(totals, dict(shard))
+        return totals
+
+
+class Counter(_Metric):
+    """Monotonic counter; `callback` adds values kept elsewhere (e.g. an existing `stats` dict)."""
+
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = (),
+                 callback: Optional[Callable[[], Dict[Tuple[str, ...], float]]] = None):
+        super().__init__(name, documentation, labelnames)
+        self.callback = callback
+
+    def inc(self, amount: float = 1, **labels):
+        if not METRICS_ENABLED:
+            return
+        shard = self._shard()
+        key = self._key(labels)
+        shard[key] = shard.get(key, 0) + amount
+
+    def _merge(self, into: dict, shard: dict):
+        for key, value in shard.items():
+            into[key] = into.get(key, 0) + value
+
+    def collect(self) -> Dict[Tuple[str, ...], float]:
+        totals = self._collect_shards()
+        if self.callback is not None:
+            self._merge(totals, _safe_callback(self, self.callback))
+        return totals
+
+
+class Histogram(_Metric):
+    """Cumulative-bucket histogram; each shard entry is [per-bucket counts..., sum, count]."""
+
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = (),
+                 buckets: Tuple[float, ...] = LATENCY_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets)) + (float("inf"),)
+
+    def observe(self, value: float, **labels):
+        if not METRICS_ENABLED:
+            return
+        shard = self._shard()
+        key = self._key(labels)
+        row = shard.get(key)
+        if row is None:
+            row = shard[key] = [0] * (len(self.buckets) + 2)
+        row[bisect_left(self.buckets, value)] += 1
+        row[-2] += value
+        row[-1] += 1
+
+    def _merge(self, into: dict, shard: dict):
+        for key, row in shard.items():
+            total = into.setdefault(key, [0] * len(row))
+            for index, value in enumerate(list(row)):
+                total[index] += value
+
+    def collect(self) -> Dict[Tuple[str, ...], List[float]]:
+        return self._collect_shards()
+
+
+class Gauge(_Metric):
+    """Current value; set directly, moved with inc/dec, or read from a callback at scrape time."""
+
+    kind = "gauge"
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+        self._callbacks: List[Callable[[], Dict[Tuple[str, ...], float]]] = []
+
+    def add_callback(self, callback: Callable[[], Dict[Tuple[str, ...], float]]):
+        """`callback()` returns {label values tuple: value}, merged over the directly set values."""
+        with self._lock:
+            self._callbacks.append(callback)
+
+    def set(self, value: float, **labels):
+        with self._lock:
+            self._values[self._key(labels)] = value
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def dec(self, amount: float = 1, **labels):
+        self.inc(-amount, **labels)
+
+    def _merge(self, into: dict, shard: dict):
+        # Gauges keep no shards; values of several sources add up like in the multi-process merge
+        for key, value in shard.items():
+            into[key] = into.get(key, 0) + value
+
+    def collect(self) -> Dict[Tuple[str, ...], float]:
+        with self._lock:
+            values = dict(self._values)
+            callbacks = list(self._callbacks)
+        for callback in callbacks:
+            values.update(_safe_callback(self, callback))
+        return values
+
+
+def _safe_callback(metric, callback) -> dict:
+    try:
+        return callback()
+    except Exception as e:
+        print(f"WARN: Metrics callback for {metric.name} failed: {e}")
+        return {}
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+        self._lock = threading.Lock()
+        self._flusher = None
+
+    def _register(self, metric: _Metric) -> _Metric:
+        with self._lock:
+            existing = self._metrics.get(metric.name)
+            if existing is not None:
+                return existing
+            self._metrics[metric.name] = metric
+            return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Iterable[str] = (), callback=None) -> Counter:
+        return self._register(Counter(name, documentation, labelnames, callback))
+
+    def histogram(self, name: str, documentation: str, labelnames: Iterable[str] = (),
+                  buckets: Tuple[float, ...] = LATENCY_BUCKETS) -> Histogram:
+        return self._register(Histogram(name, documentation, labelnames, buckets))
+
+    def gauge(self, name: str, documentation: str, labelnames: Iterable[str] = ()) -> Gauge:
+        return self._register(Gauge(name, documentation, labelnames))
+
+    def snapshot(self) -> dict:
+        """JSON-serializable values of this process: {name: {"kind", "help", "labels", "buckets", "values"}}."""
+        with self._lock:
+            metrics = list(self._metrics.values())
+        data = {}
+        for metric in metrics:
+            data[metric.name] = {
+                "kind": metric.kind,
+                "help": metric.documentation,
+                "labels": list(metric.labelnames),
+                "buckets": [b for b in getattr(metric, "buckets", ()) if b != float("inf")],
+                "values": [[list(key), value] for key, value in metric.collect().items()],
+            }
+        return data
+
+    # --- Multi-process aggregation ---
+
+    def _path(self, pid: int) -> str:
+        return os.path.join(METRICS_MULTIPROC_DIR, f"metrics_{pid}.json")
+
+    def flush(self):
+        """Writes this process's snapshot for the other workers' scrapes (atomic replace)."""
+        if not METRICS_MULTIPROC_DIR:
+            return
+        path = self._path(os.getpid())
+        temp_path = f"{path}.tmp"
+        try:
+            with open(temp_path, "w", encoding="utf-8") as f:
+                json.dump({"pid": os.getpid(), "written_at": time.time(), "metrics": self.snapshot()}, f)
+            os.replace(temp_path, path)
+        except OSError as e:
+            print(f"WARN: Could not write metrics to {path}: {e}")
+
+    def start_flusher(self):
+        """Starts the periodic flush thread once per process (no-op without METRICS_MULTIPROC_DIR)."""
+        if not METRICS_MULTIPROC_DIR or not METRICS_ENABLED:
+            return
+        with self._lock:
+            if self._flusher is not None and self._flusher[0] == os.getpid():
+                return
+            os.makedirs(METRICS_MULTIPROC_DIR, exist_ok=True)
+
+            def loop():
+                while True:
+                    time.sleep(METRICS_FLUSH_INTERVAL)
+                    self.flush()
+
+            thread = threading.Thread(target=loop, name="metrics-flush", daemon=True)
+            self._flusher = (os.getpid(), thread)
+        thread.start()
+        atexit.register(self.flush)
+
+    def _merged(self) -> dict:
+        """This process's values plus the latest flushed values of every other worker."""
+        own = self.snapshot()
+        if not METRICS_MULTIPROC_DIR or not os.path.isdir(METRICS_MULTIPROC_DIR):
+            return own
+        self.flush()
+        merged: dict = {}
+        for filename in sorted(os.listdir(METRICS_MULTIPROC_DIR)):
+            if not (filename.startswith("metrics_") and filename.endswith(".json")):
+                continue
+            try:
+                with open(os.path.join(METRICS_MULTIPROC_DIR, filename), "r", encoding="utf-8") as f:
+                    payload = json.load(f)
+            except (OSError, ValueError):
+                continue
+            pid = payload.get("pid")
+            metrics = own if pid == os.getpid() else payload.get("metrics", {})
+            alive = pid == os.getpid() or _pid_alive(pid)
+            for name, family in metrics.items():
+                if family["kind"] == "gauge" and not alive:
+                    continue
+                target = merged.setdefault(name, {**family, "values": {}})
+                for key, value in family["values"]:
+                    key = tuple(key)
+                    if family["kind"] == "histogram":
+                        total = target["values"].setdefault(key, [0] * len(value))
+                        for index, part in enumerate(value):
+                            total[index] += part
+                    else:
+                        target["values"][key] = target["values"].get(key, 0) + value
+        for name, family in merged.items():
+            family["values"] = [[list(key), value] for key, value in family["values"].items()]
+        return merged
+
+    def exposition(self) -> str:
+        """Prometheus text format (0.0.4) of all metrics, merged across workers when configured."""
+        lines = []
+        for name, family in sorted(self._merged().items()):
+            labelnames = tuple(family["labels"])
+            lines.append(f"# HELP {name} {family['help']}")
+            lines.append(f"# TYPE {name} {family['kind']}")
+            for key, value in sorted(family["values"], key=lambda kv: [str(v) for v in kv[0]]):
+                key = tuple(key)
+                if family["kind"] != "histogram":
+                    lines.append(f"{name}{_format_labels(labelnames, key)} {_format_value(value)}")
+                    continue
+                cumulative = 0
+                for bound, count in zip(list(family["buckets"]) + [float("inf")], value):
+                    cumulative += count
+                    le = 'le="' + _format_value(bound) + '"'
+                    lines.append(f"{name}_bucket{_format_labels(labelnames, key, le)} {cumulative}")
+                lines.append(f"{name}_sum{_format_labels(labelnames, key)} {_format_value(value[-2])}")
+                lines.append(f"{name}_count{_format_labels(labelnames, key)} {_format_value(value[-1])}")
+        return "\n".join(lines) + "\n"
+
+
+def _pid_alive(pid) -> bool:
+    try:
+        os.kill(int(pid), 0)
+    except (OSError, TypeError, ValueError):
+        return False
+    return True
+
+
+REGISTRY = MetricsRegistry()
+
+# --- Metric families used across the backend ---
+
+HTTP_REQUESTS = REGISTRY.counter(
+    "intellitesting_http_requests_total", "HTTP requests by endpoint and status.", ("method", "path", "status"))
+HTTP_LATENCY = REGISTRY.histogram(
+    "intellitesting_http_request_duration_seconds", "HTTP request latency by endpoint.", ("method", "path"))
+HTTP_IN_PROGRESS = REGISTRY.gauge(
+    "intellitesting_http_requests_in_progress", "HTTP requests being served.", ("path",))
+RATE_LIMITED = REGISTRY.counter(
+    "intellitesting_rate_limit_rejections_total", "Requests rejected by check_rate_limit.")
+
+AGENT_ITERATIONS = REGISTRY.histogram(
+    "intellitesting_agent_iterations", "Agent (LLM) iterations per generation request.", buckets=COUNT_BUCKETS)
+AGENT_STOPS = REGISTRY.counter(
+    "intellitesting_agent_early_stops_total", "Agent runs stopped early, by reason.", ("reason",))
+
+LLM_CALLS = REGISTRY.counter("intellitesting_llm_calls_total", "LLM calls by outcome.", ("outcome",))
+LLM_LATENCY = REGISTRY.histogram(
+    "intellitesting_llm_call_duration_seconds", "LLM call latency including retries and hedges.")
+LLM_TOKENS = REGISTRY.counter("intellitesting_llm_tokens_total", "LLM tokens by kind.", ("kind",))
+LLM_RETRIES = REGISTRY.counter("intellitesting_llm_retries_total", "Retried transient LLM errors.")
+LLM_HEDGES = REGISTRY.counter("intellitesting_llm_hedged_requests_total", "Hedged LLM requests sent.")
+
+TEST_RUNS = REGISTRY.counter(
+    "intellitesting_test_runs_total", "Test runs by language and result.", ("language", "result"))
+TEST_RUN_LATENCY = REGISTRY.histogram(
+    "intellitesting_test_run_duration_seconds", "Test run latency (validation gate included).", ("language",))
+TEST_RUNS_IN_PROGRESS = REGISTRY.gauge(
+    "intellitesting_test_runs_in_progress", "Test runs executing right now.", ("language",))
+SUBPROCESS_SPAWNS = REGISTRY.counter(
+    "intellitesting_subprocess_spawns_total", "Subprocesses started, by program.", ("program",))
+TIMEOUTS = REGISTRY.counter(
+    "intellitesting_timeouts_total", "Timeouts, by what timed out.", ("kind",))
+POOL_SIZE = REGISTRY.gauge(
+    "intellitesting_pool_max_workers", "Worker threads/processes each pool may use.", ("pool",))
+POOL_BUSY = REGISTRY.gauge(
+    "intellitesting_pool_busy_workers", "Pool workers currently running a task.", ("pool",))
+POOL_QUEUED = REGISTRY.gauge(
+    "intellitesting_pool_queued_tasks", "Tasks waiting for a pool worker.", ("pool",))
@@ -0,0 +1,402 @@
+"""
+Mutation score for a generated test suite, within a fixed time budget.
+
+Instead of rewriting and re-running the suite once per mutant, all mutants of the
+selected range are compiled into one instrumented copy of the source (mutant
+schemata): every mutation point becomes a runtime switch on a mutant id, so the
+code is built once and each mutant is activated by setting a variable.
+
+1. Coverage pass (one process): every test runs once with a recorder as the
+   switch, which notes the mutation points it reaches. Failing tests are dropped.
+2. Mutant pass: covered mutants are sharded across MUTATION_WORKERS processes
+   (largest first, to the least-loaded worker). Each worker loads the suite once,
+   then for every mutant runs only the tests that reach it, stopping at the first
+   failure (killed). Hanging mutants are cut off by a per-test timeout.
+
+Workers write results as they go and stop starting mutants at the deadline, so a
+partial score is still returned when the budget runs out.
+
+Python only: an AST transformer builds the schema and a pytest plugin (conftest.py)
+drives both passes. Other languages get a "not supported" error.
+"""
+import os
+import ast
+import json
+import time
+import tempfile
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple
+
+from core import metrics
+from core.languages.java_strategy import tokenize
+
+MUTATION_TIME_BUDGET = float(os.getenv("MUTATION_TIME_BUDGET", 60))
+MUTATION_AFTER_GENERATION = os.getenv("MUTATION_AFTER_GENERATION", "false") == "true"
+MUTATION_WORKERS = int(os.getenv("MUTATION_WORKERS", min(4, os.cpu_count() or 1)))
+MAX_MUTANTS = int(os.getenv("MUTATION_MAX_MUTANTS", 500))
+MAX_SURVIVORS_REPORTED = 10
+# Third-party pytest plugins add seconds to every worker start; enable for suites that need them
+MUTATION_PYTEST_PLUGINS = os.getenv("MUTATION_PYTEST_PLUGINS", "false") == "true"
+
+SWITCH = "__mutant__"
+
+
+# --- Python -------------------------------------------------------------------------------
+
+_COMPARE_SWAPS = {
+    ast.Lt: [ast.LtE], ast.LtE: [ast.Lt], ast.Gt: [ast.GtE], ast.GtE: [ast.Gt],
+    ast.Eq: [ast.NotEq], ast.NotEq: [ast.Eq], ast.Is: [ast.IsNot], ast.IsNot: [ast.Is],
+    ast.In: [ast.NotIn], ast.NotIn: [ast.In],
+}
+_BINOP_SWAPS = {
+    ast.Add: ast.Sub, ast.Sub: ast.Add, ast.Mult: ast.Div, ast.Div: ast.Mult,
+    ast.FloorDiv: ast.Mult, ast.Mod: ast.Mult,
+}
+_SYMBOLS = {
+    ast.Lt: "<", ast.LtE: "<=", ast.Gt: ">", ast.GtE: ">=", ast.Eq: "==", ast.NotEq: "!=",
+    ast.Is: "is", ast.IsNot: "is not", ast.In: "in", ast.NotIn: "not in", ast.Add: "+", ast.Sub: "-",
+    ast.Mult: "*", ast.Div: "/", ast.FloorDiv: "//", ast.Mod: "%", ast.And: "and", ast.Or: "or",
+}
+
+
+class _PythonSchemata(ast.NodeTransformer):
+    """
+    Replaces each mutation point E inside function bodies of the selected lines with
+    `M1 if __mutant__ == 1 else (M2 if __mutant__ == 2 else E)`. Operand subtrees are
+    shared between the branches, and only one branch is evaluated.
+    """
+
+    def __init__(self, start: int, end: int):
+        self.start, self.end = start, end
+        self.mutants: List[Dict[str, Any]] = []
+        self._function_depth = 0
+
+    def _in_scope(self, node) -> bool:
+        return self._function_depth > 0 and self.start <= getattr(node, "lineno", 0) <= self.end \
+            and len(self.mutants) < MAX_MUTANTS
+
+    def _switch(self, original, variants: List[Tuple[Any, str]]):
+        expression = original
+        for variant, description in variants:
+            mutant_id = len(self.mutants) + 1
+            self.mutants.append({"id": mutant_id, "line": original.lineno, "description": description})
+            test = ast.Compare(left=ast.Name(id=SWITCH, ctx=ast.Load()), ops=[ast.Eq()],
+                               comparators=[ast.Constant(mutant_id)])
+            expression = ast.IfExp(test=test, body=variant, orelse=expression)
+        return ast.copy_location(expression, original)
+
+    def _visit_function(self, node):
+        # Decorators and defaults run at import time, before any mutant can be switched on
+        self._function_depth += 1
+        node.body = [self.visit(statement) for statement in node.body]
+        self._function_depth -= 1
+        return node
+
+    visit_FunctionDef = visit_AsyncFunctionDef = _visit_function
+
+    def visit_match_case(self, node):
+        # Patterns must stay literal
+        if node.guard:
+            node.guard = self.visit(node.guard)
+        node.body = [self.visit(statement) for statement in node.body]
+        return node
+
+    def visit_JoinedStr(self, node):
+        return node
+
+    def visit_Compare(self, node):
+        self.generic_visit(node)
+        if not self._in_scope(node) or len(node.ops) != 1:
+            return node
+        op = type(node.ops[0])
+        return self._switch(node, [
+            (ast.Compare(left=node.left, ops=[swap()], comparators=node.comparators),
+             f"{_SYMBOLS[op]} -> {_SYMBOLS[swap]}")
+            for swap in _COMPARE_SWAPS.get(op, [])
+        ])
+
+    def visit_BinOp(self, node):
+        self.generic_visit(node)
+        swap = _BINOP_SWAPS.get(type(node.op))
+        if not self._in_scope(node) or swap is None:
+            return node
+        return self._switch(node, [(ast.BinOp(left=node.left, op=swap(), right=node.right),
+                                    f"{_SYMBOLS[type(node.op)]} -> {_SYMBOLS[swap]}")])
+
+    def visit_BoolOp(self, node):
+        self.generic_visit(node)
+        if not self._in_scope(node):
+            return node
+        swap = ast.Or if isinstance(node.op, ast.And) else ast.And
+        return self._switch(node, [(ast.BoolOp(op=swap(), values=node.values),
+                                    f"{_SYMBOLS[type(node.op)]} -> {_SYMBOLS[swap]}")])
+
+    def visit_UnaryOp(self, node):
+        self.generic_visit(node)
+        if not self._in_scope(node) or not isinstance(node.op, ast.Not):
+            return node
+        return self._switch(node, [(node.operand, "remove not")])
+
+    def visit_Constant(self, node):
+        if not self._in_scope(node):
+            return node
+        if isinstance(node.value, bool):
+            return self._switch(node, [(ast.Constant(not node.value), f"{node.value} -> {not node.value}")])
+        if isinstance(node.value, int):
+            return self._switch(node, [(ast.Constant(node.value + 1), f"{node.value} -> {node.value + 1}")])
+        return node
+
+    def visit_Return(self, node):
+        self.generic_visit(node)
+        if not self._in_scope(node) or node.value is None or \
+                isinstance(node.value, ast.Constant) and node.value.value is None:
+            return node
+        node.value = self._switch(node.value, [(ast.Constant(None), "return None")])
+        return node
+
+
+def _python_schema(source: str, start: int, end: int) -> Tuple[str, List[Dict[str, Any]]]:
+    tree = ast.parse(source)
+    schemata = _PythonSchemata(start, end)
+    tree = schemata.visit(tree)
+    # The switch must exist before any function runs; keep docstring and __future__ imports first
+    position = 0
+    while position < len(tree.body) and (
+            isinstance(tree.body[position], ast.ImportFrom) and tree.body[position].module == "__future__"
+            or position == 0 and isinstance(tree.body[0], ast.Expr) and isinstance(tree.body[0].value, ast.Constant)):
+        position += 1
+    tree.body.insert(position, ast.Assign(targets=[ast.Name(id=SWITCH, ctx=ast.Store())], value=ast.Constant(0)))
+    ast.fix_missing_locations(tree)
+    return ast.unparse(tree), schemata.mutants
+
+
+# Written as conftest.py next to the suite; takes over pytest's run loop in each worker.
+PYTEST_MUTATION_PLUGIN = '''
+import json, os, signal, time, importlib
+from _pytest.runner import runtestprotocol
+
+_MODULE = os.environ["MUTATION_MODULE"]
+_PHASE = os.environ["MUTATION_PHASE"]
+_OUTPUT = os.environ["MUTATION_OUTPUT"]
+_DEADLINE = float(os.environ["MUTATION_DEADLINE"])
+_TEST_TIMEOUT = float(os.environ.get("MUTATION_TEST_TIMEOUT", "2"))
+
+
+class _Recorder:
+    """Stands in for the mutant id: every `__mutant__ == k` check records k."""
+
+    def __init__(self):
+        self.hits = set()
+
+    def __eq__(self, other):
+        self.hits.add(other)
+        return False
+
+    __hash__ = object.__hash__
+
+
+class _Timeout(BaseException):
+    pass
+
+
+def _alarm(signum, frame):
+    raise _Timeout()
+
+
+def _run(item):
+    """Runs one test with a timeout; returns 'passed', 'failed' or 'timeout'."""
+    signal.setitimer(signal.ITIMER_REAL, _TEST_TIMEOUT)
+    try:
+        reports = runtestprotocol(item, nextitem=None, log=False)
+    except _Timeout:
+        return "timeout"
+    finally:
+        signal.setitimer(signal.ITIMER_REAL, 0)
+    if any(getattr(r, "longrepr", None) and "_Timeout" in str(r.longrepr) for r in reports):
+        return "timeout"
+    return "failed" if any(r.failed for r in reports) else "passed"
+
+
+def pytest_runtestloop(session):
+    signal.signal(signal.SIGALRM, _alarm)
+    module = importlib.import_module(_MODULE)
+    with open(_OUTPUT, "w") as out:
+        if _PHASE == "coverage":
+            for item in session.items:
+                recorder = module.__mutant__ = _Recorder()
+                started = time.perf_counter()
+                status = _run(item)
+                out.write(json.dumps({"test": item.nodeid, "passed": status == "passed",
+                                      "seconds": time.perf_counter() - started,
+                                      "mutants": sorted(recorder.hits)}) + "\\n")
+        else:
+            items = {item.nodeid: item for item in session.items}
+            with open(os.environ["MUTATION_ASSIGNMENTS"]) as f:
+                assignments = json.load(f)
+            for mutant_id, tests in assignments:
+                if time.time() > _DEADLINE:
+                    break
+                module.__mutant__ = mutant_id
+                status = "survived"
+                for nodeid in tests:
+                    outcome = _run(items[nodeid])
+                    if outcome != "passed":
+                        status = "killed" if outcome == "failed" else "timeout"
+                        break
+                out.write(json.dumps({"id": mutant_id, "status": status}) + "\\n")
+                out.flush()
+    module.__mutant__ = 0
+    return True
+'''
+
+
+class PythonMutationRunner:
+    @staticmethod
+    def prepare(temp_dir: str, source: str, test_code: str, file_path: Optional[str],
+                start: int, end: int) -> Dict[str, Any]:
+        module = os.path.splitext(os.path.basename(file_path or ""))[0] or "source_under_test"
+        schema, mutants = _python_schema(source, start, end)
+        for name, content in ((f"{module}.py", schema), ("test_generated.py", test_code),
+                              ("conftest.py", PYTEST_MUTATION_PLUGIN)):
+            with open(os.path.join(temp_dir, name), "w", encoding="utf-8") as f:
+                f.write(content)
+        return {"module": module, "mutants": mutants}
+
+    @staticmethod
+    def run_phase(temp_dir: str, context: Dict[str, Any], phase: str, output: str, deadline: float,
+                  assignments: Optional[str] = None, test_timeout: float = 2.0) -> int:
+        env = {**os.environ, "MUTATION_MODULE": context["module"], "MUTATION_PHASE": phase,
+               "MUTATION_OUTPUT": output, "MUTATION_DEADLINE": str(deadline),
+               "MUTATION_TEST_TIMEOUT": str(test_timeout), "MUTATION_ASSIGNMENTS": assignments or ""}
+        if not MUTATION_PYTEST_PLUGINS:
+            env["PYTEST_DISABLE_PLUGIN_AUTOLOAD"] = "1"
+        try:
+            metrics.SUBPROCESS_SPAWNS.inc(program="pytest")
+            proc = subprocess.run(['pytest', '-q', '-p', 'no:cacheprovider', 'test_generated.py'],
+                                  capture_output=True, cwd=temp_dir, env=env,
+                                  timeout=max(1.0, deadline - time.time()) + 5)
+            return proc.returncode
+        except subprocess.TimeoutExpired:
+            return -1
+
+
+# --- Engine -------------------------------------------------------------------------------
+
+_RUNNERS = {"python": PythonMutationRunner}
+
+
+def _read_lines(path: str) -> List[Dict[str, Any]]:
+    if not os.path.exists(path):
+        return []
+    with open(path, "r", encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def assemble_test_file(language: str, imports_and_setup: str, test_cases: List[Dict[str, Any]]) -> str:
+    """The test file a generation result stands for: setup followed by every case's code."""
+    code = "\n\n".join([imports_and_setup or ""] + [case.get("code", "") for case in test_cases])
+    if language.lower() == "java":
+        # The setup opens the test class; close whatever is still open
+        tokens, _ = tokenize(code)
+        depth = sum({"{": 1, "}": -1}.get(text, 0) for kind, text, _ in tokens if kind == "op")
+        code += "\n" + "}\n" * max(0, depth)
+    return code
+
+
+class MutationEngine:
+    @staticmethod
+    def score(language: str, file_content: str, test_code: str, file_path: Optional[str] = None,
+              selection_range=None, time_budget: Optional[float] = None,
+              workers: Optional[int] = None) -> Dict[str, Any]:
+        """
+        Mutation score of `test_code` against the selected lines of `file_content`
+        (the whole file if no range is given). Tests must import the code under test
+        from the source module/class; suites that inline a copy of it kill nothing.
+        """
+        runner = _RUNNERS.get(language.lower())
+        if runner is None:
+            return {"error": f"Mutation testing not supported for {language}"}
+        started = time.time()
+        deadline = started + (time_budget or MUTATION_TIME_BUDGET)
+        workers = max(1, workers or MUTATION_WORKERS)
+        if selection_range is not None:
+            start, end = selection_range.start + 1, selection_range.end + 1
+        else:
+            start, end = 1, file_content.count("\n") + 1
+
+        with tempfile.TemporaryDirectory() as temp_dir:
+            try:
+                context = runner.prepare(temp_dir, file_content, test_code, file_path, start, end)
+            except (SyntaxError, ValueError) as e:
+                return {"error": f"Could not build mutants: {e}"}
+            except FileNotFoundError as e:
+                return {"error": f"Toolchain not found: {e}"}
+            mutants = {m["id"]: m for m in context["mutants"]}
+            if not mutants:
+                return {"error": "No mutation points in the selected range."}
+
+            # 1. Coverage: which passing tests reach which mutants
+            coverage_path = os.path.join(temp_dir, "coverage.jsonl")
+            runner.run_phase(temp_dir, context, "coverage", coverage_path, deadline)
+            tests = [t for t in _read_lines(coverage_path) if t["passed"]]
+            if not tests:
+                return {"error": "No passing tests to measure (the suite must pass on the original code)."}
+            covering: Dict[int, List[str]] = {}
+            for test in sorted(tests, key=lambda t: t["seconds"]):  # fastest killers first
+                for mutant_id in test["mutants"]:
+                    covering.setdefault(mutant_id, []).append(test["test"])
+            test_timeout = max(1.0, 10 * max(t["seconds"] for t in tests))
+
+            # 2. Mutants, largest first onto the least-loaded worker
+            shards: List[List[Tuple[int, List[str]]]] = [[] for _ in range(workers)]
+            loads = [0.0] * workers
+            cost = {t["test"]: t["seconds"] + 0.001 for t in tests}
+            for mutant_id, names in sorted(covering.items(), key=lambda kv: -sum(cost[n] for n in kv[1])):
+                if mutant_id not in mutants:
+                    continue
+                target = loads.index(min(loads))
+                shards[target].append((mutant_id, names))
+                loads[target] += sum(cost[n] for n in names)
+
+            def run_shard(index: int) -> List[Dict[str, Any]]:
+                output = os.path.join(temp_dir, f"mutants_{index}.jsonl")
+                remaining = shards[index]
+                metrics.POOL_QUEUED.dec(pool="mutation")
+                metrics.POOL_BUSY.inc(pool="mutation")
+                try:
+                    # Hanging tests are interrupted in-process, so one run per worker suffices
+                    if remaining and time.time() < deadline:
+                        assignments = os.path.join(temp_dir, f"assignments_{index}.json")
+                        with open(assignments, "w", encoding="utf-8") as f:
+                            json.dump(remaining, f)
+                        runner.run_phase(temp_dir, context, "mutants", output, deadline, assignments, test_timeout)
+                finally:
+                    metrics.POOL_BUSY.dec(pool="mutation")
+                return _read_lines(output)
+
+            metrics.POOL_QUEUED.inc(workers, pool="mutation")
+            with ThreadPoolExecutor(max_workers=workers) as pool:
+                results = [r for shard in pool.map(run_shard, range(workers)) for r in shard]
+
+        status = {r["id"]: r["status"] for r in results}
+        for mutant_id in mutants:
+            if mutant_id not in covering:
+                status[mutant_id] = "no_coverage"
+        counts = {key: sum(1 for s in status.values() if s == key)
+                  for key in ("killed", "timeout", "survived", "no_coverage")}
+        if counts["timeout"]:
+            metrics.TIMEOUTS.inc(counts["timeout"], kind="mutant")
+        measured = sum(counts.values())
+        detected = counts["killed"] + counts["timeout"]
+        survivors = [mutants[i] for i, s in sorted(status.items()) if s in ("survived", "no_coverage")]
+        return {
+            "score": round(detected / measured, 4) if measured else None,
+            **counts,
+            "not_run": len(mutants) - measured,
+            "total": len(mutants),
+            "complete": measured == len(mutants),
+            "elapsed_seconds": round(time.time() - started, 2),
+            "workers": workers,
+            "survivors": [f"line {m['line']}: {m['description']}" for m in survivors[:MAX_SURVIVORS_REPORTED]],
+        }
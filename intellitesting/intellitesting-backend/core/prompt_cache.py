@@ -0,0 +1,235 @@
+import os
+import json
+import time
+import hashlib
+import threading
+from typing import Any, List, Optional
+
+from langchain_core.messages import SystemMessage
+from langchain_core.utils.function_calling import convert_to_openai_tool
+
+from core import metrics
+from core.shared_state import get_shared_state
+
+PROMPT_CACHE_TTL = int(os.getenv("PROMPT_CACHE_TTL_SECONDS", 3600))
+# Context caches are billed to the project of the key that creates them, so requests made
+# with a user's own key only use them when this is explicitly enabled
+PROMPT_CACHE_USER_KEYS = os.getenv("PROMPT_CACHE_USER_KEYS", "false") == "true"
+
+
+def prefix_key(llm, prefix: str, tools: List[Any]) -> str:
+    """
+    Stable key for a (model, API key, static prefix, tool schema) combination.
+    Provider caches belong to the key's project, so user keys never share entries.
+    """
+    api_key = getattr(llm, "google_api_key", None)
+    if hasattr(api_key, "get_secret_value"):
+        api_key = api_key.get_secret_value()
+    tool_names = ",".join(getattr(t, "name", str(t)) for t in tools)
+    material = f"{getattr(llm, 'model', 'local')}\n{api_key}\n{tool_names}\n{prefix}"
+    return hashlib.sha256(material.encode("utf-8")).hexdigest()[:24]
+
+
+def tool_schema_text(tools: List[Any]) -> str:
+    """The tool schemas as sent to the model, used to size what a cache entry holds."""
+    return json.dumps([convert_to_openai_tool(t) for t in tools], sort_keys=True)
+
+
+class LocalPrefixCache:
+    """
+    In-process stand-in for provider-side context caching (benchmarks and local runs).
+    It only hands out names and remembers which prefix each name holds; models that
+    understand it (e.g. the benchmark ReplayChatModel) count those tokens as cached.
+    """
+
+    mode = "local"
+
+    def __init__(self, ttl: int = PROMPT_CACHE_TTL):
+        self.ttl = ttl
+        self._entries = {}
+        self._lock = threading.Lock()
+        self.stats = {"hits": 0, "misses": 0}
+
+    def get_or_create(self, llm, prefix: str, tools: List[Any]) -> Optional[str]:
+        key = prefix_key(llm, prefix, tools)
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry and entry[1] > now:
+                self.stats["hits"] += 1
+                return entry[0]
+            self.stats["misses"] += 1
+            name = f"cachedContents/local-{key}"
+            self._entries[key] = (name, now + self.ttl, f"{prefix}\n{tool_schema_text(tools)}")
+            return name
+
+    def prefix_for(self, name: str) -> Optional[str]:
+        """The cached content (system prefix plus tool schemas) behind a cache name."""
+        with self._lock:
+            for cached_name, _, content in self._entries.values():
+                if cached_name == name:
+                    return content
+        return None
+
+
+class GeminiContextCache(LocalPrefixCache):
+    """
+    Creates Gemini explicit context caches holding the system prefix and tool declarations.
+    Requests that use a cache must not resend either, which `PrefixCachingLLM` takes care of.
+    If cache creation fails (e.g. prefix below the model's minimum cacheable size),
+    the key is remembered as uncacheable and requests fall back to the full prompt.
+
+    Cache names are published to the shared state backend, so other workers (and nodes)
+    reuse one provider cache per prefix instead of each creating and paying for their own.
+    """
+
+    mode = "gemini"
+
+    def __init__(self, ttl: int = PROMPT_CACHE_TTL, state=None):
+        super().__init__(ttl)
+        self.state = state
+
+    def get_or_create(self, llm, prefix: str, tools: List[Any]) -> Optional[str]:
+        key = prefix_key(llm, prefix, tools)
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            # Refresh a little before expiry so in-flight requests never hit a dead cache
+            if entry and entry[1] > now + 60:
+                self.stats["hits"] += 1
+                return entry[0]
+        shared = self._shared_entry(key, now)
+        if shared is not None:
+            with self._lock:
+                self.stats["hits"] += 1
+                self._entries[key] = (shared[0], shared[1], f"{prefix}\n{tool_schema_text(tools)}")
+            return shared[0]
+        with self._lock:
+            self.stats["misses"] += 1
+        if self.state is not None and not self.state.set(f"prompt_cache:{key}:creating", "1", ttl=30, nx=True):
+            # Another worker is creating this cache right now; send the full prompt meanwhile
+            return None
+        shared = self._shared_entry(key, now)
+        if shared is not None:
+            # Published between our first look and taking the lock
+            self.state.delete(f"prompt_cache:{key}:creating")
+            with self._lock:
+                self._entries[key] = (shared[0], shared[1], f"{prefix}\n{tool_schema_text(tools)}")
+            return shared[0]
+        try:
+            from google.genai import types
+            from langchain_google_genai._function_utils import convert_to_genai_function_declarations
+
+            cache = llm.client.caches.create(
+                model=llm.model,
+                config=types.CreateCachedContentConfig(
+                    display_name=f"intellitesting-{key}",
+                    system_instruction=prefix,
+                    tools=convert_to_genai_function_declarations(tools),
+                    ttl=f"{self.ttl}s",
+                ),
+            )
+            name = cache.name
+        except Exception as e:
+            print(f"WARN: Context cache creation failed, sending full prompt: {e}")
+            name = None
+        with self._lock:
+            # Uncacheable prefixes are retried after the TTL
+            self._entries[key] = (name, now + self.ttl, f"{prefix}\n{tool_schema_text(tools)}")
+        if self.state is not None:
+            self.state.set(f"prompt_cache:{key}", json.dumps({"name": name, "expires": now + self.ttl}),
+                           ttl=self.ttl)
+            self.state.delete(f"prompt_cache:{key}:creating")
+        return name
+
+    def _shared_entry(self, key: str, now: float):
+        """(name, expires) published by another worker, if still comfortably alive."""
+        if self.state is None:
+            return None
+        raw = self.state.get(f"prompt_cache:{key}")
+        if raw is None:
+            return None
+        entry = json.loads(raw)
+        if entry["expires"] <= now + 60:
+            return None
+        return entry["name"], entry["expires"]
+
+
+class PrefixCachingLLM:
+    """
+    Runnable wrapper that serves the leading SystemMessage (the static strategy template)
+    and the tool schemas from a prefix cache when one is configured.
+
+    Cached calls send only the conversation after the SystemMessage, with
+    `cached_content` set and no tools bound; everything else goes through the
+    normal `llm.bind_tools(tools)` path.
+    """
+
+    def __init__(self, llm, tools: List[Any], cache: Optional[LocalPrefixCache] = None):
+        self.llm = llm
+        self.tools = tools
+        self.cache = cache
+        self.with_tools = llm.bind_tools(tools)
+
+    def invoke(self, messages, **kwargs):
+        if self.cache is not None and messages and isinstance(messages[0], SystemMessage):
+            name = self.cache.get_or_create(self.llm, messages[0].content, self.tools)
+            if name:
+                return self.llm.invoke(messages[1:], cached_content=name, **kwargs)
+        return self.with_tools.invoke(messages, **kwargs)
+
+
+_default_cache = None
+_cache_lock = threading.Lock()
+_warned_local = False
+
+
+def _cache_lookups():
+    with _cache_lock:
+        cache = _default_cache
+    if cache is None:
+        return {}
+    with cache._lock:
+        return {("hit",): cache.stats["hits"], ("miss",): cache.stats["misses"]}
+
+
+metrics.REGISTRY.counter(
+    "intellitesting_prompt_cache_lookups_total", "Prompt prefix cache lookups by result.",
+    ("result",), callback=_cache_lookups)
+
+
+def get_prefix_cache(mode: str = None) -> Optional[LocalPrefixCache]:
+    """
+    Returns the process-wide prefix cache for the PROMPT_CACHE mode: "gemini" (explicit
+    context caches), "local" (in-process stand-in for injected models; see
+    get_provider_cache) or "off" (default; the stable prefix still benefits from Gemini's
+    implicit caching). Returns None when off.
+    """
+    global _default_cache
+    mode = mode or os.getenv("PROMPT_CACHE", "off")
+    if mode == "off":
+        return None
+    with _cache_lock:
+        if _default_cache is None or _default_cache.mode != mode:
+            _default_cache = GeminiContextCache(state=get_shared_state()) if mode == "gemini" else LocalPrefixCache()
+        return _default_cache
+
+
+def get_provider_cache(user_key: bool = False) -> Optional[GeminiContextCache]:
+    """
+    The prefix cache for calls to the real Gemini API. The "local" stand-in's made-up
+    cache names would be rejected by the API, so in that mode Gemini gets the full prompt
+    (with a one-time warning) and only injected models such as the replay model use it.
+    With `user_key` (a request carrying the user's own API key) there is no cache unless
+    PROMPT_CACHE_USER_KEYS is set, so the server never creates billed caches on their project.
+    """
+    global _warned_local
+    if user_key and not PROMPT_CACHE_USER_KEYS:
+        return None
+    cache = get_prefix_cache()
+    if cache is None or isinstance(cache, GeminiContextCache):
+        return cache
+    if not _warned_local:
+        _warned_local = True
+        print("WARN: PROMPT_CACHE=local only applies to injected models; Gemini requests send the full prompt")
+    return None
@@ -0,0 +1,228 @@
+import os
+import glob
+import time
+import sqlite3
+import tempfile
+import threading
+from abc import ABC, abstractmethod
+from typing import Optional
+
+# sqlite:///<path> (default, shared by all workers on one host), memory:// (single process)
+# or redis://host:port/db (shared across hosts; needs the `redis` package)
+SHARED_STATE_URL = os.getenv(
+    "SHARED_STATE_URL", "sqlite:///" + os.path.join(tempfile.gettempdir(), "intellitesting_state.db"))
+EVICTION_INTERVAL = 60
+
+
+class SharedState(ABC):
+    """
+    Small key-value interface (a subset of Redis) for state that every worker must agree
+    on: rate-limit counters, result-cache entries and session replicas. Values are strings;
+    `ttl` is in seconds. `spans_hosts` is True when the backend is reachable from other
+    machines, i.e. when per-host files (session checkpoints) need replicating through it.
+    """
+
+    spans_hosts = False
+
+    @abstractmethod
+    def get(self, key: str) -> Optional[str]:
+        pass
+
+    @abstractmethod
+    def set(self, key: str, value: str, ttl: Optional[float] = None, nx: bool = False) -> bool:
+        """Stores `value`; with `nx` only if the key is absent. Returns whether it was stored."""
+        pass
+
+    @abstractmethod
+    def incr(self, key: str, amount: int = 1, ttl: Optional[float] = None) -> int:
+        """Atomically adds `amount` and returns the new value; `ttl` applies when the key is created."""
+        pass
+
+    @abstractmethod
+    def delete(self, *keys: str):
+        pass
+
+
+class MemoryState(SharedState):
+    """Process-local backend: only correct with a single worker."""
+
+    def __init__(self):
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    def _live(self, key: str, now: float):
+        entry = self._entries.get(key)
+        if entry and entry[1] is not None and entry[1] <= now:
+            del self._entries[key]
+            return None
+        return entry
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            entry = self._live(key, time.time())
+        return None if entry is None else str(entry[0])
+
+    def set(self, key: str, value: str, ttl: Optional[float] = None, nx: bool = False) -> bool:
+        now = time.time()
+        with self._lock:
+            if nx and self._live(key, now) is not None:
+                return False
+            self._entries[key] = (value, now + ttl if ttl else None)
+            return True
+
+    def incr(self, key: str, amount: int = 1, ttl: Optional[float] = None) -> int:
+        now = time.time()
+        with self._lock:
+            entry = self._live(key, now)
+            value, expires = (int(entry[0]) + amount, entry[1]) if entry else (amount, now + ttl if ttl else None)
+            self._entries[key] = (value, expires)
+            return value
+
+    def delete(self, *keys: str):
+        with self._lock:
+            for key in keys:
+                self._entries.pop(key, None)
+
+
+class SQLiteState(SharedState):
+    """
+    Backend on a local SQLite file in WAL mode, shared by every worker process on the host.
+    Each thread (and each forked process) opens its own connection; writers serialise on
+    SQLite's lock, which is far cheaper than the requests the state guards.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._local = threading.local()
+        self._last_eviction = 0.0
+        with self._conn() as conn:
+            conn.execute("CREATE TABLE IF NOT EXISTS kv (key TEXT PRIMARY KEY, value, expires_at REAL)")
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn, self._local.pid = conn, os.getpid()
+        return conn
+
+    def get(self, key: str) -> Optional[str]:
+        row = self._conn().execute(
+            "SELECT value FROM kv WHERE key = ? AND (expires_at IS NULL OR expires_at > ?)",
+            (key, time.time())).fetchone()
+        return None if row is None else str(row[0])
+
+    def set(self, key: str, value: str, ttl: Optional[float] = None, nx: bool = False) -> bool:
+        now = time.time()
+        self._evict_expired(now)
+        expires = now + ttl if ttl else None
+        if not nx:
+            self._conn().execute("INSERT OR REPLACE INTO kv (key, value, expires_at) VALUES (?, ?, ?)",
+                                 (key, value, expires))
+            return True
+        # An expired row counts as absent, so it may be overwritten
+        cur = self._conn().execute(
+            """
+            INSERT INTO kv (key, value, expires_at) VALUES (?, ?, ?)
+            ON CONFLICT(key) DO UPDATE SET value = excluded.value, expires_at = excluded.expires_at
+                WHERE kv.expires_at IS NOT NULL AND kv.expires_at <= ?
+            """,
+            (key, value, expires, now))
+        return cur.rowcount > 0
+
+    def incr(self, key: str, amount: int = 1, ttl: Optional[float] = None) -> int:
+        now = time.time()
+        self._evict_expired(now)
+        row = self._conn().execute(
+            """
+            INSERT INTO kv (key, value, expires_at) VALUES (?, ?, ?)
+            ON CONFLICT(key) DO UPDATE SET
+                value = CASE WHEN kv.expires_at IS NOT NULL AND kv.expires_at <= ?
+                        THEN excluded.value ELSE CAST(kv.value AS INTEGER) + excluded.value END,
+                expires_at = CASE WHEN kv.expires_at IS NOT NULL AND kv.expires_at <= ?
+                             THEN excluded.expires_at ELSE kv.expires_at END
+            RETURNING value
+            """,
+            (key, amount, now + ttl if ttl else None, now, now)).fetchone()
+        return int(row[0])
+
+    def delete(self, *keys: str):
+        if keys:
+            self._conn().execute(f"DELETE FROM kv WHERE key IN ({','.join('?' * len(keys))})", keys)
+
+    def _evict_expired(self, now: float):
+        if now - self._last_eviction < EVICTION_INTERVAL:
+            return
+        self._last_eviction = now
+        self._conn().execute("DELETE FROM kv WHERE expires_at IS NOT NULL AND expires_at <= ?", (now,))
+
+
+class RedisState(SharedState):
+    """Backend on any Redis-compatible server (Redis, Valkey, KeyDB, ...) for multi-host deployments."""
+
+    spans_hosts = True
+
+    def __init__(self, url: str):
+        try:
+            import redis
+        except ImportError:
+            raise RuntimeError(f"SHARED_STATE_URL={url} requires the `redis` package (pip install redis)")
+        self.client = redis.Redis.from_url(url, decode_responses=True)
+
+    def get(self, key: str) -> Optional[str]:
+        return self.client.get(key)
+
+    def set(self, key: str, value: str, ttl: Optional[float] = None, nx: bool = False) -> bool:
+        return bool(self.client.set(key, value, px=int(ttl * 1000) if ttl else None, nx=nx))
+
+    def incr(self, key: str, amount: int = 1, ttl: Optional[float] = None) -> int:
+        pipe = self.client.pipeline(transaction=True)
+        if ttl:
+            pipe.set(key, 0, px=int(ttl * 1000), nx=True)
+        pipe.incrby(key, amount)
+        return int(pipe.execute()[-1])
+
+    def delete(self, *keys: str):
+        if keys:
+            self.client.delete(*keys)
+
+
+_state = None
+_state_lock = threading.Lock()
+
+
+def open_state(url: str) -> SharedState:
+    if url.startswith("sqlite:///"):
+        return SQLiteState(url[len("sqlite:///"):])
+    if url.startswith("memory://"):
+        return MemoryState()
+    if url.startswith(("redis://", "rediss://", "unix://")):
+        return RedisState(url)
+    raise ValueError(f"Unsupported SHARED_STATE_URL: {url}")
+
+
+def get_shared_state() -> SharedState:
+    """Returns the process-wide shared state backend selected by SHARED_STATE_URL."""
+    global _state
+    with _state_lock:
+        if _state is None:
+            _state = open_state(SHARED_STATE_URL)
+        return _state
+
+
+def prepare_workers(workers: int, port: int):
+    """
+    Called once in the supervisor before worker processes start. Points the workers at a
+    common metrics directory (cleared of files from previous runs) so /metrics merges
+    across them, and warns about settings that are only correct with a single process.
+    """
+    metrics_dir = os.environ.setdefault(
+        "METRICS_MULTIPROC_DIR", os.path.join(tempfile.gettempdir(), f"intellitesting_metrics_{port}"))
+    os.makedirs(metrics_dir, exist_ok=True)
+    for stale in glob.glob(os.path.join(metrics_dir, "metrics_*.json")):
+        os.remove(stale)
+    url = os.getenv("SHARED_STATE_URL", SHARED_STATE_URL)
+    if url.startswith("memory://"):
+        print(f"WARN: SHARED_STATE_URL={url} is per-process; rate limits and caches will differ across {workers} workers")
+    print(f"--- Starting {workers} workers (shared state: {url.split('@')[-1]}, metrics: {metrics_dir}) ---")
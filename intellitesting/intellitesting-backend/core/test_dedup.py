@@ -0,0 +1,95 @@
+import os
+import hashlib
+import threading
+from typing import Any, Dict, List, Tuple
+
+from core import metrics
+from core.languages.factory import LanguageFactory
+
+TEST_DEDUP = os.getenv("TEST_DEDUP", "true") == "true"
+
+
+def _chain(previous: str, statement: str) -> str:
+    return hashlib.sha1(f"{previous}|{statement}".encode("utf-8")).hexdigest()[:16]
+
+
+class TestCaseDeduplicator:
+    """
+    Collapses redundant generated test cases before they are returned and executed.
+
+    Each `TestCase.code` is normalized by the language strategy (test name, local
+    variable names, literal formatting, whitespace and comments don't matter) into a
+    header fingerprint plus one fingerprint per top-level statement. Then:
+
+    - duplicate: same header and same statements as an earlier case;
+    - subsumed: same header, and its statements are a strict prefix of another case's,
+      which therefore runs the same checks and more.
+
+    Prefixes are compared through chained hashes, so the pass is linear in the total
+    number of statements. Cases that can't be analyzed are always kept.
+    """
+
+    stats = {"submitted": 0, "removed": 0}
+    _lock = threading.Lock()
+
+    @classmethod
+    def deduplicate(cls, test_cases: List[Any], language: str) -> Tuple[List[Any], List[Dict[str, str]]]:
+        """Returns (kept cases in their original order, removed cases with the id they collapse into)."""
+        if not TEST_DEDUP or len(test_cases) < 2:
+            return test_cases, []
+        try:
+            strategy = LanguageFactory.get_strategy(language)
+        except ValueError:
+            return test_cases, []
+
+        chains = []
+        # (header, prefix hash) -> (length, index) of the longest case starting with that prefix
+        longest: Dict[Tuple[str, str], Tuple[int, int]] = {}
+        for index, case in enumerate(test_cases):
+            code = case.get("code") if isinstance(case, dict) else None
+            fingerprint = strategy.fingerprint_test_case(code) if isinstance(code, str) else None
+            if fingerprint is None:
+                chains.append(None)
+                continue
+            header, statements = fingerprint
+            prefix = ""
+            for statement in statements:
+                prefix = _chain(prefix, statement)
+                key = (header, prefix)
+                if key not in longest or longest[key][0] < len(statements):
+                    longest[key] = (len(statements), index)
+            chains.append((header, prefix, len(statements)))
+
+        kept, removed = [], []
+        first_seen: Dict[Tuple[str, str], int] = {}
+        for index, case in enumerate(test_cases):
+            if chains[index] is None:
+                kept.append(case)
+                continue
+            header, full, length = chains[index]
+            longer_length, longer = longest.get((header, full), (length, index))
+            if longer_length > length:
+                removed.append({"id": str(case.get("id", index)), "reason": "subsumed",
+                                "kept": str(test_cases[longer].get("id", longer))})
+            elif (header, full) in first_seen:
+                original = first_seen[(header, full)]
+                removed.append({"id": str(case.get("id", index)), "reason": "duplicate",
+                                "kept": str(test_cases[original].get("id", original))})
+            else:
+                first_seen[(header, full)] = index
+                kept.append(case)
+
+        with cls._lock:
+            cls.stats["submitted"] += len(test_cases)
+            cls.stats["removed"] += len(removed)
+        return kept, removed
+
+    @classmethod
+    def snapshot(cls) -> Dict[str, int]:
+        with cls._lock:
+            return dict(cls.stats)
+
+
+metrics.REGISTRY.counter(
+    "intellitesting_test_dedup_cases_total", "Generated test cases submitted and removed as redundant.",
+    ("event",), callback=lambda: {(event,): count for event, count in TestCaseDeduplicator.snapshot().items()})
@@ -2,21 +2,60 @@ import subprocess
 import os
 import tempfile
 import re
-from typing import Dict, Any
+import time
+from typing import Dict, Any, Optional
+from core import metrics
+from core.validation import TestCodeValidator
+from core import coverage as cov
+from core.languages.java_strategy import tokenize, declarations
 
 class TestRunner:
     @staticmethod
-    def run_test(language: str, test_code: str) -> Dict[str, Any]:
+    def run_test(language: str, test_code: str, conventions: Optional[Dict[str, Any]] = None,
+                 coverage: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """
+        Runs a test file. With a `coverage` target (see core/coverage.py) the source under
+        test is provided next to the tests and the result gets a `coverage` summary.
+        """
+        started = time.perf_counter()
+        label = language if language in ("python", "java") else "other"
+        metrics.TEST_RUNS_IN_PROGRESS.inc(language=label)
+        try:
+            result = TestRunner._run(language, test_code, conventions, coverage)
+        finally:
+            metrics.TEST_RUNS_IN_PROGRESS.dec(language=label)
+        if result.get("validation_errors"):
+            outcome = "rejected"
+        elif "error" in result:
+            outcome = "error"
+        else:
+            outcome = "passed" if result.get("passed") else "failed"
+        metrics.TEST_RUNS.inc(language=label, result=outcome)
+        metrics.TEST_RUN_LATENCY.observe(time.perf_counter() - started, language=label)
+        return result
+
+    @staticmethod
+    def _run(language: str, test_code: str, conventions: Optional[Dict[str, Any]],
+             coverage: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+        if coverage and language == "python":
+            # The runner provides the source module, so importing it is fine
+            conventions = {**(conventions or {}), "provided_modules": [coverage["module"]]}
+        # Reject code that cannot pass before paying for a subprocess (see core/validation.py)
+        rejected = TestCodeValidator.validate(language, test_code, conventions)
+        if rejected:
+            return rejected
         if language == "python":
-            return PytestRunner.run(test_code)
+            return PytestRunner.run(test_code, coverage)
         elif language == "java":
-            return JUnitRunner.run(test_code)
+            return JUnitRunner.run(test_code, coverage)
         else:
             return {"error": f"Test execution not supported for {language}"}
 
 class PytestRunner:
     @staticmethod
-    def run(test_code: str) -> Dict[str, Any]:
+    def run(test_code: str, coverage: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        if coverage:
+            return PytestRunner._run_with_coverage(test_code, coverage)
         with tempfile.NamedTemporaryFile(mode='w', suffix='.py', delete=False, encoding='utf-8') as temp_file:
             temp_file.write(test_code)
             temp_path = temp_file.name
@@ -24,6 +63,7 @@ class PytestRunner:
         try:
             # Run pytest
             # Capture output as bytes to safely handle encoding issues
+            metrics.SUBPROCESS_SPAWNS.inc(program="pytest")
             result = subprocess.run(
                 ['pytest', temp_path],
                 capture_output=True,
@@ -37,6 +77,7 @@ class PytestRunner:
                 "passed": result.returncode == 0
             }
         except subprocess.TimeoutExpired:
+            metrics.TIMEOUTS.inc(kind="test_run")
             return {"error": "Test execution timed out."}
         except FileNotFoundError:
              return {"error": "pytest not found in PATH."}
@@ -44,15 +85,57 @@ class PytestRunner:
             if os.path.exists(temp_path):
                 os.remove(temp_path)
 
+    @staticmethod
+    def _run_with_coverage(test_code: str, coverage: Dict[str, Any]) -> Dict[str, Any]:
+        # A private directory: the source module, a conftest.py tracing plugin and the tests
+        with tempfile.TemporaryDirectory() as temp_dir:
+            source_path = os.path.join(temp_dir, coverage["source_file"])
+            output_path = os.path.join(temp_dir, "coverage.json")
+            test_path = os.path.join(temp_dir, "test_generated.py")
+            for path, content in ((source_path, coverage["file_content"]), (test_path, test_code),
+                                  (os.path.join(temp_dir, "conftest.py"), cov.PYTEST_PLUGIN)):
+                with open(path, 'w', encoding='utf-8') as f:
+                    f.write(content)
+
+            env = {**os.environ, cov.SOURCE_ENV: source_path, cov.OUTPUT_ENV: output_path}
+            try:
+                metrics.SUBPROCESS_SPAWNS.inc(program="pytest")
+                result = subprocess.run(
+                    ['pytest', '-p', 'no:cacheprovider', test_path],
+                    capture_output=True,
+                    timeout=30,
+                    cwd=temp_dir,
+                    env=env
+                )
+            except subprocess.TimeoutExpired:
+                metrics.TIMEOUTS.inc(kind="test_run")
+                return {"error": "Test execution timed out."}
+            except FileNotFoundError:
+                return {"error": "pytest not found in PATH."}
+
+            outcome = {
+                "stdout": result.stdout.decode('utf-8', errors='replace'),
+                "stderr": result.stderr.decode('utf-8', errors='replace'),
+                "exit_code": result.returncode,
+                "passed": result.returncode == 0
+            }
+            if os.path.exists(output_path):
+                covered, branches = cov.read_python_coverage(output_path, coverage)
+                outcome.update(cov.summarize(coverage, covered, branches, previous=coverage.get("previous")))
+            return outcome
+
 class JUnitRunner:
     @staticmethod
-    def run(test_code: str) -> Dict[str, Any]:
+    def run(test_code: str, coverage: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
         # 1. Extract Class Name to name the file correctly
         class_name_match = re.search(r'class\s+(\w+)', test_code)
         if not class_name_match:
             return {"error": "Could not find class name in Java test code."}
         
         class_name = class_name_match.group(1)
+        # Packaged test classes must be run by their fully qualified name
+        package = declarations(tokenize(test_code)[0])["package"]
+        qualified_name = f"{package}.{class_name}" if package else class_name
         
         # 2. Setup Temp Dir
         with tempfile.TemporaryDirectory() as temp_dir:
@@ -60,12 +143,22 @@ class JUnitRunner:
             
             with open(file_path, 'w', encoding='utf-8') as f:
                 f.write(test_code)
+            sources = [file_path]
+            if coverage:
+                # Compile the source under test too, so JaCoCo sees the exact classes that ran
+                source_dir = os.path.join(temp_dir, "src")
+                os.makedirs(source_dir)
+                sources.append(os.path.join(source_dir, coverage["source_file"]))
+                with open(sources[-1], 'w', encoding='utf-8') as f:
+                    f.write(coverage["file_content"])
             
             # 3. Compile
             classpath = os.environ.get("CLASSPATH", ".")
+            classes_dir = os.path.join(temp_dir, "classes")
             
             # Use raw bytes capture to prevent UnicodeDecodeError
-            compile_cmd = ['javac', '-encoding', 'UTF-8', '-cp', classpath, file_path]
+            compile_cmd = ['javac', '-encoding', 'UTF-8', '-d', classes_dir, '-cp', classpath, *sources]
+            metrics.SUBPROCESS_SPAWNS.inc(program="javac")
             compile_proc = subprocess.run(compile_cmd, capture_output=True)
             
             if compile_proc.returncode != 0:
@@ -76,22 +169,51 @@ class JUnitRunner:
                 }
             
             # 4. Run
-            run_cmd = ['java', '-cp', f"{temp_dir}{os.pathsep}{classpath}", 'org.junit.runner.JUnitCore', class_name]
+            agent = []
+            exec_path = os.path.join(temp_dir, "jacoco.exec")
+            if coverage:
+                agent = [f"-javaagent:{cov.JACOCO_AGENT_JAR}=destfile={exec_path},"
+                         f"includes={coverage['qualified_name']}*"]
+            run_cmd = ['java', *agent, '-cp', f"{classes_dir}{os.pathsep}{classpath}",
+                       'org.junit.runner.JUnitCore', qualified_name]
             
             try:
                 # Use raw bytes capture here as well
+                metrics.SUBPROCESS_SPAWNS.inc(program="java")
                 run_proc = subprocess.run(run_cmd, capture_output=True, timeout=30)
                 
                 stdout_str = run_proc.stdout.decode('utf-8', errors='replace')
                 stderr_str = run_proc.stderr.decode('utf-8', errors='replace')
                 
-                return {
+                result = {
                     "stdout": stdout_str,
                     "stderr": stderr_str,
                     "exit_code": run_proc.returncode,
                     "passed": run_proc.returncode == 0 and "FAILURES!!!" not in stdout_str
                 }
             except subprocess.TimeoutExpired:
+                 metrics.TIMEOUTS.inc(kind="test_run")
                  return {"error": "Test execution timed out."}
             except FileNotFoundError:
-                 return {"error": "java not found in PATH."}
\ No newline at end of file
+                 return {"error": "java not found in PATH."}
+
+            if coverage and os.path.exists(exec_path):
+                result.update(JUnitRunner._coverage_report(temp_dir, exec_path, classes_dir, coverage))
+            return result
+
+    @staticmethod
+    def _coverage_report(temp_dir: str, exec_path: str, classes_dir: str, coverage: Dict[str, Any]) -> Dict[str, Any]:
+        report_path = os.path.join(temp_dir, "jacoco.xml")
+        report_cmd = ['java', '-jar', cov.JACOCO_CLI_JAR, 'report', exec_path,
+                      '--classfiles', classes_dir, '--sourcefiles', os.path.join(temp_dir, "src"),
+                      '--xml', report_path]
+        try:
+            metrics.SUBPROCESS_SPAWNS.inc(program="jacoco")
+            report_proc = subprocess.run(report_cmd, capture_output=True, timeout=30)
+        except (subprocess.TimeoutExpired, FileNotFoundError):
+            return {}
+        if report_proc.returncode != 0 or not os.path.exists(report_path):
+            print(f"WARN: JaCoCo report failed: {report_proc.stderr.decode('utf-8', errors='replace')[:200]}")
+            return {}
+        covered, branches, executable = cov.read_jacoco_xml(report_path, coverage)
+        return cov.summarize(coverage, covered, branches, executable, previous=coverage.get("previous"))
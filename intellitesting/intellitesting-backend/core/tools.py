@@ -1,10 +1,17 @@
-from langchain_core.tools import tool
+from langchain_core.tools import tool, InjectedToolArg
 from core.test_runner import TestRunner
 from core.analyzer import CodeAnalyzer
+from core.workspace import Workspace, WorkspaceError
+from typing import Annotated, Optional
 import json
 
 @tool
-def run_unit_tests(test_code: str, language: str) -> str:
+def run_unit_tests(
+    test_code: str,
+    language: str,
+    conventions: Annotated[Optional[dict], InjectedToolArg] = None,
+    coverage: Annotated[Optional[dict], InjectedToolArg] = None
+) -> str:
     """
     Executes the provided unit test code and returns the results.
     Use this tool to verify if your generated test code compiles and passes.
@@ -15,9 +22,11 @@ def run_unit_tests(test_code: str, language: str) -> str:
         
     Returns:
         A JSON string containing 'passed' (bool), 'stdout', 'stderr', and 'error_message'.
+        Code that cannot compile or collect is rejected before running ('error': 'Validation Failed').
+        When coverage feedback is on, 'coverage' summarizes coverage of the selected lines.
     """
     try:
-        result = TestRunner.run_test(language, test_code)
+        result = TestRunner.run_test(language, test_code, conventions, coverage)
         return json.dumps(result)
     except Exception as e:
         return json.dumps({"passed": False, "error_message": str(e)})
@@ -42,23 +51,29 @@ def analyze_source_code(code: str, language: str) -> str:
         return f"Analysis failed: {str(e)}"
 
 @tool
-def read_file(file_path: str) -> str:
+def read_file(
+    file_path: str,
+    start_line: int = 1,
+    max_lines: int = 200,
+    session_id: Annotated[Optional[str], InjectedToolArg] = None
+) -> str:
     """
-    Reads the content of a file.
+    Reads a window of lines from a file in the workspace, with line numbers.
     Use this to inspect dependencies or related files found during analysis.
+    Large files are returned in windows; follow the hint at the end to read further.
+    Re-reading content you have already seen returns a short reference instead.
     
     Args:
         file_path: The relative path to the file.
+        start_line: The first line to return (1-based).
+        max_lines: The maximum number of lines to return.
         
     Returns:
-        The content of the file or an error message.
+        The requested lines with a header (line range, summary) or an error message.
     """
     try:
-        # Basic security check to prevent traversing up too much, though this runs locally.
-        if ".." in file_path:
-             return "Error: Cannot navigate to parent directories for security."
-        
-        with open(file_path, 'r', encoding='utf-8') as f:
-            return f.read()
+        return Workspace.read(file_path, start_line=start_line, max_lines=max_lines, session_id=session_id)
+    except WorkspaceError as e:
+        return f"Error: {str(e)}"
     except Exception as e:
         return f"Error reading file: {str(e)}"
@@ -0,0 +1,70 @@
+import os
+import time
+import threading
+from typing import Any, Dict, Optional
+
+from core import metrics
+from core.languages.factory import LanguageFactory
+
+VALIDATION_GATE = os.getenv("TEST_VALIDATION_GATE", "true") == "true"
+
+# Subprocess launches a rejected candidate would have cost (pytest; javac, which fails first)
+_LAUNCHES_PER_RUN = {"python": 1, "java": 1}
+
+
+class TestCodeValidator:
+    """
+    Pre-execution gate for generated test code.
+
+    Runs the language strategy's in-process checks (syntax, imports, class/file name,
+    package convention) before `TestRunner` launches any subprocess, so obviously broken
+    candidates go back to the agent in milliseconds. The result has the same shape as a
+    failed runner result: each error is an `error: <message>` line in `stderr` (Python
+    messages start with `file:line:`, Java ones with `line N:`, as compilers report them)
+    and the raw messages are in `validation_errors`.
+    """
+
+    stats = {"checked": 0, "rejected": 0, "subprocesses_avoided": 0, "validation_ms": 0.0}
+    _lock = threading.Lock()
+
+    @classmethod
+    def validate(cls, language: str, test_code: str,
+                 conventions: Optional[Dict[str, Any]] = None) -> Optional[Dict[str, Any]]:
+        """Returns a failed test result if the code cannot possibly pass, otherwise None."""
+        if not VALIDATION_GATE:
+            return None
+        try:
+            strategy = LanguageFactory.get_strategy(language)
+        except ValueError:
+            return None
+
+        started = time.perf_counter()
+        errors = strategy.validate_test_code(test_code, conventions)
+        elapsed = 1000 * (time.perf_counter() - started)
+
+        with cls._lock:
+            cls.stats["checked"] += 1
+            cls.stats["validation_ms"] += elapsed
+            if errors:
+                cls.stats["rejected"] += 1
+                cls.stats["subprocesses_avoided"] += _LAUNCHES_PER_RUN.get(language.lower(), 1)
+        if not errors:
+            return None
+        print(f"--- Validation gate rejected {language} test code ({elapsed:.1f} ms): {errors[0]} ---")
+        return {
+            "error": "Validation Failed",
+            "stdout": "",
+            "stderr": "\n".join(f"error: {e}" for e in errors),
+            "validation_errors": errors,
+            "passed": False
+        }
+
+    @classmethod
+    def snapshot(cls) -> Dict[str, Any]:
+        with cls._lock:
+            return dict(cls.stats)
+
+
+metrics.REGISTRY.counter(
+    "intellitesting_validation_gate_total", "Generated test files checked and rejected before execution.",
+    ("event",), callback=lambda: {(event,): TestCodeValidator.snapshot()[event] for event in ("checked", "rejected")})
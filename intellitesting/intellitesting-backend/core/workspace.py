@@ -0,0 +1,203 @@
+import os
+import mmap
+import hashlib
+import threading
+from array import array
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+
+from core.languages.factory import LanguageFactory
+
+WORKSPACE_ROOT = os.getenv("WORKSPACE_ROOT", os.getcwd())
+MMAP_THRESHOLD = int(os.getenv("WORKSPACE_MMAP_THRESHOLD", 256 * 1024))
+MAX_WINDOW_LINES = int(os.getenv("WORKSPACE_MAX_WINDOW_LINES", 400))
+MAX_WINDOW_BYTES = int(os.getenv("WORKSPACE_MAX_WINDOW_BYTES", 48 * 1024))
+MAX_SUMMARY_BYTES = 1024 * 1024
+MAX_SESSIONS = int(os.getenv("WORKSPACE_MAX_SESSIONS", 256))
+MAX_CACHED_FILES = int(os.getenv("WORKSPACE_MAX_CACHED_FILES", 128))
+
+_EXTENSION_LANGUAGES = {".py": "python", ".java": "java"}
+
+
+class WorkspaceError(Exception):
+    pass
+
+
+class _FileInfo:
+    """Line-offset index, content hash and summary of one file version (path + mtime + size)."""
+
+    def __init__(self, path: str, size: int):
+        self.path = path
+        self.size = size
+        self.line_starts, self.sha = self._index()
+        self._summary = None
+
+    def _open_buffer(self, f):
+        # Large files are memory-mapped so only the pages we touch are read
+        if self.size >= MMAP_THRESHOLD:
+            return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        return f.read()
+
+    def _index(self) -> Tuple[array, str]:
+        line_starts = array("Q", [0])
+        digest = hashlib.sha256()
+        if self.size == 0:
+            return line_starts, digest.hexdigest()
+        with open(self.path, "rb") as f:
+            buffer = self._open_buffer(f)
+            try:
+                digest.update(buffer)
+                pos = buffer.find(b"\n")
+                while pos != -1:
+                    line_starts.append(pos + 1)
+                    pos = buffer.find(b"\n", pos + 1)
+            finally:
+                if isinstance(buffer, mmap.mmap):
+                    buffer.close()
+        if line_starts[-1] == self.size:
+            line_starts.pop()  # trailing newline doesn't start a new line
+        return line_starts, digest.hexdigest()
+
+    @property
+    def line_count(self) -> int:
+        return len(self.line_starts) if self.size else 0
+
+    def read_lines(self, start: int, end: int) -> str:
+        """Reads 0-based lines [start, end) using the offset index (no full-file read)."""
+        begin = self.line_starts[start]
+        stop = self.line_starts[end] if end < len(self.line_starts) else self.size
+        with open(self.path, "rb") as f:
+            if self.size >= MMAP_THRESHOLD:
+                with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as m:
+                    data = m[begin:stop]
+            else:
+                f.seek(begin)
+                data = f.read(stop - begin)
+        return data.decode("utf-8", errors="replace")
+
+    def summary(self) -> str:
+        if self._summary is None:
+            parts = [f"{self.line_count} lines, {self.size} bytes"]
+            language = _EXTENSION_LANGUAGES.get(os.path.splitext(self.path)[1].lower())
+            if language and self.size <= MAX_SUMMARY_BYTES:
+                analysis = LanguageFactory.get_strategy(language).analyze_code(self.read_lines(0, self.line_count))
+                for key in ("package", "classes", "functions", "methods"):
+                    if analysis.get(key):
+                        value = analysis[key]
+                        parts.append(f"{key}: {', '.join(value) if isinstance(value, list) else value}")
+            self._summary = "; ".join(parts)
+        return self._summary
+
+
+class WorkspaceSession:
+    """Per-request record of what has already been shown to the model."""
+
+    def __init__(self):
+        self.seen_windows: Dict[Tuple[str, int, int], str] = {}
+        self.seen_files: Dict[str, str] = {}
+
+
+class Workspace:
+    """
+    Bounded, indexed access to files under WORKSPACE_ROOT for the agent's `read_file` tool.
+
+    - Paths are resolved and must stay inside the root (symlinks included).
+    - Reads are windowed by line range and capped in lines and bytes.
+    - File line indexes are cached per (path, mtime, size); large files are memory-mapped.
+    - Each session remembers which content (by hash) it has already returned, so
+      repeated reads of unchanged content return a short reference instead of text.
+    """
+
+    _files: "OrderedDict[tuple, _FileInfo]" = OrderedDict()
+    _sessions: "OrderedDict[str, WorkspaceSession]" = OrderedDict()
+    _lock = threading.Lock()
+
+    @classmethod
+    def resolve(cls, file_path: str, root: str = None) -> str:
+        root = os.path.realpath(root or WORKSPACE_ROOT)
+        full = os.path.realpath(os.path.join(root, file_path))
+        if os.path.commonpath([root, full]) != root:
+            raise WorkspaceError("Cannot read files outside the workspace.")
+        if not os.path.isfile(full):
+            raise WorkspaceError(f"File not found: {file_path}")
+        return full
+
+    @classmethod
+    def _file_info(cls, full_path: str) -> _FileInfo:
+        stat = os.stat(full_path)
+        key = (full_path, stat.st_mtime_ns, stat.st_size)
+        with cls._lock:
+            info = cls._files.get(key)
+            if info is not None:
+                cls._files.move_to_end(key)
+                return info
+        info = _FileInfo(full_path, stat.st_size)
+        with cls._lock:
+            cls._files[key] = info
+            while len(cls._files) > MAX_CACHED_FILES:
+                cls._files.popitem(last=False)
+        return info
+
+    @classmethod
+    def session(cls, session_id: Optional[str]) -> Optional[WorkspaceSession]:
+        if not session_id:
+            return None
+        with cls._lock:
+            session = cls._sessions.get(session_id)
+            if session is None:
+                session = cls._sessions[session_id] = WorkspaceSession()
+                while len(cls._sessions) > MAX_SESSIONS:
+                    cls._sessions.popitem(last=False)
+            else:
+                cls._sessions.move_to_end(session_id)
+            return session
+
+    @classmethod
+    def end_session(cls, session_id: Optional[str]):
+        with cls._lock:
+            cls._sessions.pop(session_id, None)
+
+    @classmethod
+    def read(cls, file_path: str, start_line: int = 1, max_lines: int = 200,
+             session_id: Optional[str] = None, root: str = None) -> str:
+        """
+        Returns lines [start_line, start_line + max_lines) of a file (1-based) prefixed
+        with their line numbers, plus a header with the file summary and a hint on how
+        to continue if the window was truncated.
+        """
+        full = cls.resolve(file_path, root)
+        info = cls._file_info(full)
+        total = info.line_count
+
+        start = max(1, start_line) - 1
+        if total and start >= total:
+            return f"File: {file_path} has only {total} lines (requested start_line={start_line})."
+        end = min(total, start + max(1, min(max_lines, MAX_WINDOW_LINES)))
+
+        text = info.read_lines(start, end)
+        if len(text.encode("utf-8")) > MAX_WINDOW_BYTES:
+            # Shrink to the byte budget on a line boundary
+            text = text.encode("utf-8")[:MAX_WINDOW_BYTES].decode("utf-8", errors="ignore")
+            text = text[:text.rfind("\n") + 1] or text
+            end = start + max(1, text.count("\n"))
+
+        footer = ""
+        if end < total:
+            footer = f"\n[Truncated: call read_file with start_line={end + 1} to continue]"
+
+        # Keyed on the lines actually returned, so a byte-truncated window never hides the rest
+        session = cls.session(session_id)
+        window_key = (info.sha, start, end)
+        if session is not None and window_key in session.seen_windows:
+            return (f"File: {file_path} lines {start + 1}-{end} (sha {info.sha[:12]}) are unchanged since you "
+                    f"last read them; reuse that content. Summary: {info.summary()}{footer}")
+
+        numbered = "\n".join(f"{start + i + 1:>6} | {line}" for i, line in enumerate(text.splitlines()))
+        header = f"File: {file_path} (lines {start + 1}-{end} of {total}, sha {info.sha[:12]})"
+        if session is None or session.seen_files.get(full) != info.sha:
+            header += f"\nSummary: {info.summary()}"
+
+        if session is not None:
+            session.seen_windows[window_key] = file_path
+            session.seen_files[full] = info.sha
+        return f"{header}\n{numbered}{footer}"
@@ -0,0 +1,25 @@
+"""
+Multi-worker deployment with gunicorn as process manager and uvicorn workers:
+
+    pip install gunicorn
+    gunicorn -c gunicorn.conf.py main:app
+
+Without gunicorn, `WEB_CONCURRENCY=4 python main.py` starts the same layout under uvicorn's
+own supervisor. Workers share rate limits, prompt caches and sessions through
+SHARED_STATE_URL (see core/shared_state.py) and merge /metrics via METRICS_MULTIPROC_DIR.
+"""
+import os
+
+from core.shared_state import prepare_workers
+
+port = int(os.environ.get("PORT", 8000))
+bind = f"0.0.0.0:{port}"
+workers = int(os.environ.get("WEB_CONCURRENCY", os.cpu_count() or 1))
+worker_class = "uvicorn.workers.UvicornWorker"
+# Generation requests run the agent for up to AGENT_REQUEST_DEADLINE seconds
+timeout = int(float(os.environ.get("AGENT_REQUEST_DEADLINE", 300))) + 60
+graceful_timeout = 30
+
+
+def on_starting(server):
+    prepare_workers(workers, port)
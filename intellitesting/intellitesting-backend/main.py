@@ -1,19 +1,33 @@
 from fastapi import FastAPI, HTTPException, Request
+from fastapi.responses import PlainTextResponse
 from fastapi.middleware.cors import CORSMiddleware
 from schemas import (
     TestGenerationRequest,
     TestGenerationResponse,
     TestExecutionRequest,
-    TestExecutionResponse
+    TestExecutionResponse,
+    MutationScoreRequest,
+    MutationScoreResponse
 )
 from services.test_generation import TestGenerationService
 from services.test_execution import TestExecutionService
+from services.mutation_testing import MutationTestingService
+from middleware import CompressionMiddleware, MetricsMiddleware
+from core import metrics
+from core.shared_state import get_shared_state, prepare_workers
 import uvicorn
 import os
 from datetime import date
 
 app = FastAPI()
 
+# Request size limits + gzip/zstd request and response bodies (see middleware.py)
+app.add_middleware(CompressionMiddleware)
+
+# Per-endpoint request counts and latency; wraps compression so its time is included
+app.add_middleware(MetricsMiddleware)
+metrics.REGISTRY.start_flusher()
+
 # CORS — allow VS Code extension to call from any origin
 app.add_middleware(
     CORSMiddleware,
@@ -22,21 +36,15 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# In-memory rate limiter: { ip: (count, date_str) }
-rate_limit_store: dict[str, tuple[int, str]] = {}
-DAILY_LIMIT = 10
+# Daily per-IP rate limiter. Counters live in the shared state backend so every worker
+# (and every node, with a Redis SHARED_STATE_URL) enforces the same limit.
+DAILY_LIMIT = int(os.getenv("RATE_LIMIT_DAILY", 10))
 
 def check_rate_limit(ip: str) -> bool:
     """Returns True if request is allowed, False if rate limited."""
     today = date.today().isoformat()
-    if ip not in rate_limit_store or rate_limit_store[ip][1] != today:
-        rate_limit_store[ip] = (1, today)
-        return True
-    count, _ = rate_limit_store[ip]
-    if count >= DAILY_LIMIT:
-        return False
-    rate_limit_store[ip] = (count + 1, today)
-    return True
+    count = get_shared_state().incr(f"ratelimit:{today}:{ip}", ttl=2 * 24 * 3600)
+    return count <= DAILY_LIMIT
 
 @app.post("/generate_tests", response_model=TestGenerationResponse)
 async def generate_tests(request: TestGenerationRequest, raw_request: Request):
@@ -47,6 +55,7 @@ async def generate_tests(request: TestGenerationRequest, raw_request: Request):
     if not user_api_key:
         client_ip = raw_request.client.host if raw_request.client else "unknown"
         if not check_rate_limit(client_ip):
+            metrics.RATE_LIMITED.inc()
             raise HTTPException(
                 status_code=429,
                 detail=f"Daily limit of {DAILY_LIMIT} requests reached. Provide your own Gemini API key in extension settings to remove this limit."
@@ -64,7 +73,8 @@ async def generate_tests(request: TestGenerationRequest, raw_request: Request):
             instruction=request.instruction,
             specification=request.specification,
             chat_history=request.chat_history,
-            api_key=user_api_key
+            api_key=user_api_key,
+            session_id=request.session_id
         )
 
         if "error" in result:
@@ -79,7 +89,9 @@ async def generate_tests(request: TestGenerationRequest, raw_request: Request):
             test_cases=result.get("test_cases"),
             suggested_file_path=result.get("suggested_file_path"),
             interactive_questions=result.get("interactive_questions"),
-            proposed_plan=result.get("proposed_plan")
+            proposed_plan=result.get("proposed_plan"),
+            session_id=result.get("session_id"),
+            mutation_score=result.get("mutation_score")
         )
 
     except Exception as e:
@@ -121,6 +133,42 @@ async def run_tests(request: TestExecutionRequest):
             error_message=str(e)
         )
 
+@app.post("/mutation_score", response_model=MutationScoreResponse)
+def mutation_score(request: MutationScoreRequest):
+    # Runs test subprocesses for up to the time budget; a sync endpoint keeps it off the event loop
+    if os.getenv("DISABLE_TEST_EXECUTION", "false") == "true":
+        raise HTTPException(status_code=403, detail="Remote test execution is disabled. Tests run locally via the extension.")
+
+    try:
+        result = MutationTestingService.score(
+            language=request.language,
+            file_content=request.file_content,
+            test_code=request.test_code,
+            file_path=request.file_path,
+            selection_range=request.selection_range,
+            time_budget=request.time_budget
+        )
+        if "error" in result:
+            return MutationScoreResponse(status="error", error_message=result["error"])
+        return MutationScoreResponse(status="success", **result)
+
+    except Exception as e:
+        return MutationScoreResponse(
+            status="error",
+            error_message=str(e)
+        )
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics_endpoint():
+    # Prometheus text format; merged across workers when METRICS_MULTIPROC_DIR is set
+    return PlainTextResponse(metrics.REGISTRY.exposition(), media_type=metrics.CONTENT_TYPE)
+
 if __name__ == "__main__":
     port = int(os.environ.get("PORT", 8000))
-    uvicorn.run(app, host="0.0.0.0", port=port)
+    workers = int(os.environ.get("WEB_CONCURRENCY", 1))
+    if workers > 1:
+        # Separate worker processes behind one socket; see core/shared_state.py and gunicorn.conf.py
+        prepare_workers(workers, port)
+        uvicorn.run("main:app", host="0.0.0.0", port=port, workers=workers)
+    else:
+        uvicorn.run(app, host="0.0.0.0", port=port)
@@ -0,0 +1,263 @@
+"""
+ASGI middleware for request size limits, compressed transport and request metrics.
+
+- Requests larger than MAX_REQUEST_BYTES are rejected with 413 as soon as that is
+  known (from Content-Length, or while streaming the body), before JSON parsing.
+- `Content-Encoding: gzip` / `zstd` request bodies are decompressed incrementally,
+  with the decompressed size capped by MAX_DECOMPRESSED_BYTES (zip-bomb guard).
+- Responses are compressed with zstd or gzip when the client accepts it.
+
+zstd needs the optional `zstandard` package; without it only gzip is offered and
+zstd-encoded requests get 415.
+
+`MetricsMiddleware` records per-endpoint request counts and latency (see core/metrics.py).
+"""
+import gzip
+import json
+import os
+import time
+import zlib
+
+from core import metrics
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+MAX_REQUEST_BYTES = int(os.getenv("MAX_REQUEST_BYTES", 2 * 1024 * 1024))
+MAX_DECOMPRESSED_BYTES = int(os.getenv("MAX_DECOMPRESSED_BYTES", 8 * 1024 * 1024))
+MIN_COMPRESS_BYTES = int(os.getenv("MIN_COMPRESS_BYTES", 1024))
+
+
+class PayloadTooLarge(Exception):
+    pass
+
+
+class UnsupportedEncoding(Exception):
+    pass
+
+
+class _Decoder:
+    """
+    Incremental decoder for one request body that enforces the decompressed size cap.
+    Output is produced in bounded pieces, so a small, highly compressible chunk can never
+    expand past MAX_DECOMPRESSED_BYTES (plus one zstd write block) before it is rejected.
+    """
+
+    def __init__(self, encoding: str):
+        self.size = 0
+        self._parts = []
+        self._zlib = self._zstd = None
+        if encoding == "gzip":
+            self._zlib = zlib.decompressobj(16 + zlib.MAX_WBITS)
+        elif encoding == "zstd" and zstandard is not None:
+            # The stream writer hands output to `write` in write_size pieces as it decodes
+            self._zstd = zstandard.ZstdDecompressor().stream_writer(self, write_size=64 * 1024)
+        elif encoding not in ("", "identity"):
+            raise UnsupportedEncoding(encoding)
+
+    def feed(self, chunk: bytes) -> bytes:
+        if self._zlib is not None:
+            while chunk:
+                # Ask for at most one byte past the cap; anything left stays in unconsumed_tail
+                self.write(self._zlib.decompress(chunk, MAX_DECOMPRESSED_BYTES - self.size + 1))
+                chunk = self._zlib.unconsumed_tail
+        elif self._zstd is not None:
+            self._zstd.write(chunk)
+        else:
+            self.write(chunk)
+        data = b"".join(self._parts)
+        self._parts.clear()
+        return data
+
+    def write(self, data) -> int:
+        self.size += len(data)
+        if self.size > MAX_DECOMPRESSED_BYTES:
+            raise PayloadTooLarge(f"Decompressed request body exceeds {MAX_DECOMPRESSED_BYTES} bytes.")
+        self._parts.append(bytes(data))
+        return len(data)
+
+
+def _header(scope, name: bytes) -> str:
+    for key, value in scope.get("headers", []):
+        if key == name:
+            return value.decode("latin-1")
+    return ""
+
+
+def _choose_encoding(accept_encoding: str):
+    accepted = {part.split(";")[0].strip().lower() for part in accept_encoding.split(",")}
+    if "zstd" in accepted and zstandard is not None:
+        return "zstd"
+    if "gzip" in accepted:
+        return "gzip"
+    return None
+
+
+async def _send_error(send, status: int, detail: str):
+    body = json.dumps({"detail": detail}).encode("utf-8")
+    await send({"type": "http.response.start", "status": status,
+                "headers": [(b"content-type", b"application/json"), (b"content-length", str(len(body)).encode())]})
+    await send({"type": "http.response.body", "body": body})
+
+
+class CompressionMiddleware:
+    """Pure ASGI middleware (no BaseHTTPMiddleware) so the body is never buffered twice."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        content_length = _header(scope, b"content-length")
+        if content_length.isdigit() and int(content_length) > MAX_REQUEST_BYTES:
+            await _send_error(send, 413, f"Request body exceeds {MAX_REQUEST_BYTES} bytes.")
+            return
+
+        encoding = _header(scope, b"content-encoding").strip().lower()
+        try:
+            decoder = _Decoder(encoding)
+        except UnsupportedEncoding:
+            await _send_error(send, 415, f"Unsupported Content-Encoding: {encoding}")
+            return
+
+        # Read and decode the body up front so size errors become proper 413s
+        body = bytearray()
+        received = 0
+        more_body = True
+        try:
+            while more_body:
+                message = await receive()
+                if message["type"] == "http.disconnect":
+                    return
+                chunk = message.get("body", b"")
+                received += len(chunk)
+                if received > MAX_REQUEST_BYTES:
+                    raise PayloadTooLarge(f"Request body exceeds {MAX_REQUEST_BYTES} bytes.")
+                body += decoder.feed(chunk)
+                more_body = message.get("more_body", False)
+        except PayloadTooLarge as e:
+            await _send_error(send, 413, str(e))
+            return
+        except (zlib.error, EOFError, ValueError) as e:
+            await _send_error(send, 400, f"Malformed {encoding} request body: {e}")
+            return
+        except Exception as e:
+            if zstandard is not None and isinstance(e, zstandard.ZstdError):
+                await _send_error(send, 400, f"Malformed zstd request body: {e}")
+                return
+            raise
+
+        if encoding not in ("", "identity"):
+            headers = [(k, v) for k, v in scope["headers"] if k not in (b"content-encoding", b"content-length")]
+            headers.append((b"content-length", str(len(body)).encode()))
+            scope = {**scope, "headers": headers}
+
+        delivered = False
+
+        async def replay_receive():
+            nonlocal delivered
+            if not delivered:
+                delivered = True
+                return {"type": "http.request", "body": bytes(body), "more_body": False}
+            return await receive()
+
+        response_encoding = _choose_encoding(_header(scope, b"accept-encoding"))
+        if response_encoding is None:
+            await self.app(scope, replay_receive, send)
+            return
+        await self.app(scope, replay_receive, _CompressingSend(send, response_encoding))
+
+
+class _CompressingSend:
+    """Buffers a (small, JSON) response and compresses it if it is worth it."""
+
+    def __init__(self, send, encoding: str):
+        self.send = send
+        self.encoding = encoding
+        self.start = None
+        self.body = bytearray()
+
+    async def __call__(self, message):
+        if message["type"] == "http.response.start":
+            self.start = message
+            return
+        if message["type"] != "http.response.body" or self.start is None:
+            await self.send(message)
+            return
+
+        self.body += message.get("body", b"")
+        if message.get("more_body", False):
+            return
+
+        headers = [(k, v) for k, v in self.start["headers"] if k != b"content-length"]
+        already_encoded = any(k == b"content-encoding" for k, _ in headers)
+        body = bytes(self.body)
+        if not already_encoded and len(body) >= MIN_COMPRESS_BYTES:
+            if self.encoding == "zstd":
+                body = zstandard.ZstdCompressor(level=3).compress(body)
+            else:
+                body = gzip.compress(body, compresslevel=6)
+            headers.append((b"content-encoding", self.encoding.encode()))
+            headers.append((b"vary", b"Accept-Encoding"))
+        headers.append((b"content-length", str(len(body)).encode()))
+        await self.send({**self.start, "headers": headers})
+        await self.send({"type": "http.response.body", "body": body})
+
+
+class MetricsMiddleware:
+    """
+    Counts requests and records latency per route template (unknown paths are grouped
+    as "other" so scanners can't blow up label cardinality). Also samples the
+    threadpool that sync endpoints and blocking calls run on.
+    """
+
+    def __init__(self, app):
+        self.app = app
+        self._paths = None
+        self._limiter = None
+
+    def _route(self, scope) -> str:
+        if self._paths is None:
+            app = scope.get("app")
+            self._paths = {getattr(route, "path", None) for route in getattr(app, "routes", [])}
+        return scope["path"] if scope["path"] in self._paths else "other"
+
+    def _sample_threadpool(self):
+        if self._limiter is None:
+            import anyio.to_thread
+            # Only reachable from the event loop; keep the object so scrapes can read it from any thread
+            self._limiter = anyio.to_thread.current_default_thread_limiter()
+            metrics.POOL_SIZE.add_callback(lambda: {("http",): self._limiter.total_tokens})
+            metrics.POOL_BUSY.add_callback(lambda: {("http",): self._limiter.borrowed_tokens})
+            metrics.POOL_QUEUED.add_callback(lambda: {("http",): self._limiter.statistics().tasks_waiting})
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        if self._limiter is None:
+            self._sample_threadpool()
+
+        path = self._route(scope)
+        method = scope.get("method", "")
+        status = 500
+        started = time.perf_counter()
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        metrics.HTTP_IN_PROGRESS.inc(path=path)
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            metrics.HTTP_IN_PROGRESS.dec(path=path)
+            metrics.HTTP_REQUESTS.inc(method=method, path=path, status=status)
+            metrics.HTTP_LATENCY.observe(time.perf_counter() - started, method=method, path=path)
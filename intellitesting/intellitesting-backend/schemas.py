@@ -1,6 +1,13 @@
-from pydantic import BaseModel, Field
+import os
+from pydantic import BaseModel, Field, field_validator, model_validator
 from typing import Optional, Dict, Any, List
 
+# Per-field caps (characters). The raw body is capped separately in middleware.py.
+MAX_SOURCE_CHARS = int(os.getenv("MAX_SOURCE_CHARS", 500_000))
+MAX_SPEC_CHARS = int(os.getenv("MAX_SPEC_CHARS", 200_000))
+MAX_CHAT_TURNS = int(os.getenv("MAX_CHAT_TURNS", 50))
+MAX_CHAT_MESSAGE_CHARS = int(os.getenv("MAX_CHAT_MESSAGE_CHARS", 20_000))
+
 class TestCase(BaseModel):
     id: str = Field(description="A unique identifier for the test case, e.g., 'test_balance_exact_20000'.")
     intent: str = Field(description="A brief explanation of what this test case is verifying and why.")
@@ -24,17 +31,35 @@ class SelectionRange(BaseModel):
 class TestGenerationRequest(BaseModel):
     """
     Defines the structure for the incoming request to the /generate_tests endpoint.
+    `selected_code` may be omitted, in which case it is sliced out of `file_content`
+    using `selection_range` (0-based, inclusive lines) instead of sending a second copy.
     """
-    file_content: str
+    file_content: str = Field(max_length=MAX_SOURCE_CHARS)
     file_path: Optional[str] = None
-    selected_code: str
+    selected_code: Optional[str] = Field(default=None, max_length=MAX_SOURCE_CHARS)
     selection_range: SelectionRange
     language: str
     configuration: Dict[str, Any]
     framework: str
-    instruction: Optional[str] = None
-    specification: Optional[str] = None
-    chat_history: Optional[List[Dict[str, str]]] = []
+    instruction: Optional[str] = Field(default=None, max_length=MAX_CHAT_MESSAGE_CHARS)
+    specification: Optional[str] = Field(default=None, max_length=MAX_SPEC_CHARS)
+    chat_history: Optional[List[Dict[str, str]]] = Field(default=[], max_length=MAX_CHAT_TURNS)
+    session_id: Optional[str] = Field(default=None, description="Resume a server-side session returned by a previous response.")
+
+    @field_validator("chat_history")
+    @classmethod
+    def _cap_chat_messages(cls, history):
+        for msg in history or []:
+            if len(msg.get("content", "")) > MAX_CHAT_MESSAGE_CHARS:
+                raise ValueError(f"chat_history messages are limited to {MAX_CHAT_MESSAGE_CHARS} characters")
+        return history
+
+    @model_validator(mode="after")
+    def _resolve_selected_code(self):
+        if self.selected_code is None:
+            lines = self.file_content.splitlines()
+            self.selected_code = "\n".join(lines[self.selection_range.start:self.selection_range.end + 1])
+        return self
 
 class ProposedTestCase(BaseModel):
     scenario: str = Field(description="The description of the test scenario.")
@@ -51,6 +76,8 @@ class TestGenerationResponse(BaseModel):
     suggested_file_path: Optional[str] = None
     interactive_questions: Optional[str] = None
     proposed_plan: Optional[List[ProposedTestCase]] = None
+    session_id: Optional[str] = None
+    mutation_score: Optional[Dict[str, Any]] = None
     error_message: Optional[str] = None
 
 class TestExecutionRequest(BaseModel):
@@ -68,4 +95,35 @@ class TestExecutionResponse(BaseModel):
     stderr: Optional[str] = ""
     exit_code: Optional[int] = None
     passed: bool
-    error_message: Optional[str] = None
\ No newline at end of file
+    error_message: Optional[str] = None
+
+class MutationScoreRequest(BaseModel):
+    """
+    Defines the structure for the incoming request to the /mutation_score endpoint.
+    Without `selection_range` the whole file is mutated.
+    """
+    file_content: str = Field(max_length=MAX_SOURCE_CHARS)
+    file_path: Optional[str] = None
+    test_code: str = Field(max_length=MAX_SOURCE_CHARS)
+    language: str
+    selection_range: Optional[SelectionRange] = None
+    time_budget: Optional[float] = Field(default=None, gt=0, description="Seconds; capped by the server.")
+
+class MutationScoreResponse(BaseModel):
+    """
+    Defines the structure for the outgoing response from the /mutation_score endpoint.
+    `score` is (killed + timeout) / measured mutants; `complete` is False if the time
+    budget ran out first (`not_run` mutants).
+    """
+    status: str
+    score: Optional[float] = None
+    killed: int = 0
+    timeout: int = 0
+    survived: int = 0
+    no_coverage: int = 0
+    not_run: int = 0
+    total: int = 0
+    complete: bool = False
+    elapsed_seconds: Optional[float] = None
+    survivors: List[str] = []
+    error_message: Optional[str] = None
@@ -1,4 +1,5 @@
 import os
+import time
 import operator
 import json
 from typing import TypedDict, Annotated, List, Union, Optional
@@ -9,6 +10,12 @@ from langgraph.graph import StateGraph, END
 from langgraph.prebuilt import ToolNode
 
 from core.tools import run_unit_tests, analyze_source_code, read_file
+from core.llm_client import ResilientLLMClient, get_shared_transport, LLM_REQUEST_DEADLINE
+from core.convergence import failure_signature, tool_call_signature, attach_notice
+from core.prompt_cache import PrefixCachingLLM, get_prefix_cache, get_provider_cache
+from core.languages.factory import LanguageFactory
+from core.test_dedup import TestCaseDeduplicator
+from services.session_store import SessionStore
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -64,16 +71,51 @@ class AgentState(TypedDict):
     proposed_plan: List[dict]
     interactive_questions: Optional[List[str]]
     iterations: int
+    # Budget and convergence tracking (see should_continue / check_test_results)
+    started_at: float
+    deadline_at: float
+    tokens_used: int
+    last_call_tokens: int
+    last_call_signature: str
+    call_streak: int
+    last_failure_signature: Optional[str]
+    failure_streak: int
+    stop_reason: Optional[str]
+    # Key for the per-request read_file index (see core/workspace.py)
+    workspace_session: Optional[str]
+    # Optional coverage feedback for the selected range (see core/coverage.py)
+    coverage_target: Optional[dict]
+    covered_lines: List[int]
+    coverage: Optional[dict]
 
 # 2. Setup LLM and Tools
 tools = [analyze_source_code, run_unit_tests, read_file, submit_final_result, submit_test_plan]
 
-# Cache for the default (server-key) app to avoid rebuilding every request
+# Iteration/latency/token budget per request. The hard iteration cap is kept as a
+# backstop; the deadline and token budget shrink it adaptively.
+MAX_ITERATIONS = int(os.getenv("AGENT_MAX_ITERATIONS", 8))
+REQUEST_DEADLINE = float(os.getenv("AGENT_REQUEST_DEADLINE", 300))
+TOKEN_BUDGET = int(os.getenv("AGENT_TOKEN_BUDGET", 400000))
+# Number of identical consecutive failures / tool-call batches that counts as "stuck"
+STALL_LIMIT = int(os.getenv("AGENT_STALL_LIMIT", 3))
+
+SUBMIT_TOOLS = ["submit_final_result", "submit_test_plan"]
+
+# Cache for the default (server-key) app to avoid rebuilding every request. It is a per-process
+# build cache of code and client objects, not state, so each worker simply keeps its own.
 _default_app = None
 
-def build_agent_app(api_key: str = None):
-    """Build a compiled LangGraph app, optionally with a user-provided API key."""
+def build_agent_app(api_key: str = None, llm=None):
+    """
+    Build a compiled LangGraph app, optionally with a user-provided API key.
+    A pre-built chat model can be injected via `llm` (used by the offline benchmarks);
+    such apps are never cached.
+    """
     global _default_app
+    if llm is not None:
+        return _compile_graph(ResilientLLMClient(PrefixCachingLLM(llm, tools, get_prefix_cache())),
+                              SessionStore.checkpointer())
+
     resolved_key = api_key or os.getenv("GEMINI_API_KEY")
 
     # Return cached app if using the server's default key
@@ -83,25 +125,75 @@ def build_agent_app(api_key: str = None):
     llm = ChatGoogleGenerativeAI(
         model="gemini-2.5-flash",
         google_api_key=resolved_key,
-        temperature=0
+        temperature=0,
+        base_url=os.getenv("GEMINI_BASE_URL"),
+        # Retries are handled by ResilientLLMClient; share one connection pool across keys
+        max_retries=1,
+        # Bounds how long a call abandoned at its deadline keeps a pool thread busy
+        timeout=LLM_REQUEST_DEADLINE,
+        client_args={"transport": get_shared_transport()}
     )
-    llm_with_tools = llm.bind_tools(tools)
+    llm_with_tools = ResilientLLMClient(PrefixCachingLLM(llm, tools, get_provider_cache(user_key=bool(api_key))))
 
-    compiled = _compile_graph(llm_with_tools)
+    compiled = _compile_graph(llm_with_tools, SessionStore.checkpointer())
 
     if not api_key:
         _default_app = compiled
 
     return compiled
 
-def _compile_graph(llm_with_tools):
-    """Compile a LangGraph agent with the given LLM."""
+def _budget_exhausted(state: AgentState, now: float) -> Optional[str]:
+    """
+    Returns a reason string if another agent iteration would not fit the request's
+    iteration cap, latency deadline or token budget, otherwise None.
+    """
+    iterations = state.get("iterations", 0)
+    if iterations > MAX_ITERATIONS:
+        return f"iteration cap ({MAX_ITERATIONS}) reached"
+    if iterations:
+        per_iteration = (now - state["started_at"]) / iterations
+        if now + per_iteration > state["deadline_at"]:
+            return f"latency deadline: next iteration (~{per_iteration:.1f}s) would overrun"
+        if state.get("tokens_used", 0) + state.get("last_call_tokens", 0) > TOKEN_BUDGET:
+            return f"token budget ({TOKEN_BUDGET}) would be exceeded"
+    return None
+
+def _coverage_feedback(result: str):
+    """
+    Splits the runner's coverage data into the compact summary shown to the agent and
+    the covered lines kept in state; steers the agent when tests pass below target.
+    """
+    try:
+        data = json.loads(result)
+    except json.JSONDecodeError:
+        return result, None
+    if "coverage" not in data:
+        return result, None
+    update = {"coverage": data["coverage"], "covered_lines": data.pop("covered_lines", [])}
+    coverage = data["coverage"]
+    # A passing run that gained no lines ends the graph (see check_test_results), so only
+    # runs that still make progress get a notice the agent will read
+    if data.get("passed") is True and not coverage["target_met"] and coverage["new_lines"] > 0:
+        data["notice"] = (
+            f"All tests pass, but coverage of the selected range ({coverage['lines']} lines, "
+            f"{coverage['branches']} branches) is below the {coverage['target']} target. Add tests for "
+            f"missing lines {coverage['missing_lines'] or '-'} and partial branches "
+            f"{coverage['partial_branches'] or '-'}, then run the tests again."
+        )
+    return json.dumps(data), update
+
+def _compile_graph(llm_with_tools, checkpointer=None):
+    """Compile a LangGraph agent with the given LLM (and optional session checkpointer)."""
+    early_exit = os.getenv("AGENT_EARLY_EXIT", "true") == "true"
 
     def agent_node(state: AgentState):
         messages = state["messages"]
+        now = time.time()
+        started_at = state.get("started_at") or now
+        deadline_at = state.get("deadline_at") or started_at + REQUEST_DEADLINE
         try:
             print("--- Invoking LLM ---")
-            response = llm_with_tools.invoke(messages)
+            response = llm_with_tools.invoke(messages, deadline=max(0.0, deadline_at - now))
             print(f"DEBUG: LLM Response Type: {type(response)}")
             print(f"DEBUG: LLM Tool Calls: {response.tool_calls}")
             if response.content:
@@ -109,8 +201,22 @@ def _compile_graph(llm_with_tools):
         except Exception as e:
             print(f"ERROR: LLM Invocation Failed: {e}")
             response = AIMessage(content=f"Error invoking LLM: {str(e)}")
-        iterations = state.get("iterations", 0) + 1
-        return {"messages": [response], "iterations": iterations}
+        usage = getattr(response, "usage_metadata", None) or {}
+        call_tokens = usage.get("total_tokens", 0)
+        update = {
+            "messages": [response],
+            "iterations": state.get("iterations", 0) + 1,
+            "started_at": started_at,
+            "deadline_at": deadline_at,
+            "tokens_used": state.get("tokens_used", 0) + call_tokens,
+            "last_call_tokens": call_tokens,
+        }
+        if early_exit and not state.get("stop_reason"):
+            reason = _budget_exhausted({**state, **update}, time.time())
+            if reason:
+                print(f"DEBUG: Stopping agent: {reason}")
+                update["stop_reason"] = reason
+        return update
 
     def tool_node_wrapper(state: AgentState):
         messages = state["messages"]
@@ -122,6 +228,7 @@ def _compile_graph(llm_with_tools):
         print(f"DEBUG: Processing {len(tool_calls)} tool calls...")
         outputs = []
         final_code_update = None
+        coverage_update = None
         imports_update = None
         cases_update = None
         plan_update = None
@@ -135,9 +242,14 @@ def _compile_graph(llm_with_tools):
 
             if tool_name == "submit_final_result":
                 imports_update = tool_args.get("imports_and_setup", "")
-                cases_update = tool_args.get("test_cases", [])
+                cases_update, removed = TestCaseDeduplicator.deduplicate(
+                    tool_args.get("test_cases", []), state["language"])
                 questions_update = tool_args.get("interactive_questions", [])
                 result_content = "Submission accepted."
+                if removed:
+                    print(f"DEBUG: Removed {len(removed)} redundant test case(s)")
+                    result_content += " Removed redundant test cases: " + ", ".join(
+                        f"{r['id']} ({r['reason']}, kept {r['kept']})" for r in removed) + "."
             elif tool_name == "submit_test_plan":
                 plan_update = tool_args.get("plan_cases", [])
                 questions_update = [tool_args.get("explanation", "Please review the proposed test plan.")]
@@ -145,8 +257,16 @@ def _compile_graph(llm_with_tools):
             elif tool_name == "run_unit_tests":
                 final_code_update = tool_args.get("test_code")
                 try:
-                    result = run_unit_tests.invoke(tool_args)
+                    # The package convention from the prompt, for the pre-execution validation gate
+                    conventions = LanguageFactory.get_strategy(state["language"]).get_test_conventions(
+                        state.get("file_content", ""))
+                    target = state.get("coverage_target")
+                    if target:
+                        target = {**target, "previous": state.get("covered_lines", [])}
+                    result = run_unit_tests.invoke({**tool_args, "conventions": conventions, "coverage": target})
                     result_content = result
+                    if target:
+                        result_content, coverage_update = _coverage_feedback(result)
                 except Exception as e:
                     result_content = json.dumps({"passed": False, "error_message": f"Tool execution failed: {str(e)}"})
             elif tool_name == "analyze_source_code":
@@ -157,7 +277,7 @@ def _compile_graph(llm_with_tools):
                     result_content = f"Analysis failed: {str(e)}"
             elif tool_name == "read_file":
                 try:
-                    result = read_file.invoke(tool_args)
+                    result = read_file.invoke({**tool_args, "session_id": state.get("workspace_session")})
                     result_content = result
                 except Exception as e:
                     result_content = f"Read file failed: {str(e)}"
@@ -167,8 +287,13 @@ def _compile_graph(llm_with_tools):
             outputs.append(ToolMessage(content=result_content, name=tool_name, tool_call_id=tool_call["id"]))
 
         update_dict = {"messages": outputs}
+        if early_exit:
+            update_dict.update(_track_convergence(state, tool_calls, outputs))
         if final_code_update:
             update_dict["final_test_code"] = final_code_update
+        if coverage_update:
+            update_dict["covered_lines"] = coverage_update.pop("covered_lines")
+            update_dict["coverage"] = coverage_update["coverage"]
         if imports_update is not None:
             update_dict["imports_and_setup"] = imports_update
         if cases_update is not None:
@@ -184,16 +309,34 @@ def _compile_graph(llm_with_tools):
         last_message = messages[-1]
         if not hasattr(last_message, "tool_calls") or not last_message.tool_calls:
             return END
-        if state["iterations"] > 8:
-            return END
+        out_of_budget = state.get("stop_reason") if early_exit else state["iterations"] > MAX_ITERATIONS
+        if out_of_budget:
+            # Still honour a final submission instead of throwing it away
+            if any(call["name"] in SUBMIT_TOOLS for call in last_message.tool_calls):
+                return "tools"
+            return "stop"
         return "tools"
 
+    def stop_node(state: AgentState):
+        """
+        Answers the tool calls the agent asked for but won't get, so the saved session
+        never ends on an AIMessage with unanswered calls (a follow-up would be rejected).
+        """
+        reason = state.get("stop_reason") or f"iteration cap ({MAX_ITERATIONS}) reached"
+        return {"messages": [
+            ToolMessage(content=f"Not executed: the agent was stopped ({reason}).",
+                        name=call["name"], tool_call_id=call["id"])
+            for call in state["messages"][-1].tool_calls
+        ]}
+
     def check_test_results(state: AgentState):
         messages = state["messages"]
+        if state.get("stop_reason"):
+            return END
         for msg in reversed(messages):
             if not isinstance(msg, ToolMessage):
                 break
-            if msg.name in ["submit_final_result", "submit_test_plan"]:
+            if msg.name in SUBMIT_TOOLS:
                 return END
         for msg in reversed(messages):
             if not isinstance(msg, ToolMessage):
@@ -201,6 +344,10 @@ def _compile_graph(llm_with_tools):
             if msg.name == "run_unit_tests":
                 try:
                     data = json.loads(msg.content)
+                    coverage = data.get("coverage")
+                    # Below the coverage target, keep going while runs still gain lines
+                    if coverage and not coverage["target_met"] and coverage["new_lines"] > 0:
+                        return "agent"
                     if data.get("passed") is True:
                         return END
                 except json.JSONDecodeError:
@@ -208,10 +355,57 @@ def _compile_graph(llm_with_tools):
                 break
         return "agent"
 
+    def _track_convergence(state: AgentState, tool_calls: List[dict], outputs: List[ToolMessage]) -> dict:
+        """
+        Detects a stuck agent: the same tool-call batch repeated, or the same set of
+        failing tests / compile errors on consecutive `run_unit_tests` calls.
+        One step before the limit the agent is nudged to change strategy; at the limit
+        the run is stopped.
+        """
+        call_signature = tool_call_signature(tool_calls)
+        call_streak = state.get("call_streak", 0) + 1 if call_signature == state.get("last_call_signature") else 1
+        update = {"last_call_signature": call_signature, "call_streak": call_streak}
+
+        failure_streak = state.get("failure_streak", 0)
+        test_runs = [m for m in outputs if m.name == "run_unit_tests"]
+        if test_runs:
+            signature = failure_signature(test_runs[-1].content)
+            if signature is None:
+                failure_streak = 0
+            elif signature == state.get("last_failure_signature"):
+                failure_streak += 1
+            else:
+                failure_streak = 1
+            update["last_failure_signature"] = signature
+            update["failure_streak"] = failure_streak
+
+        if failure_streak >= STALL_LIMIT:
+            update["stop_reason"] = f"same test failure repeated {failure_streak} times"
+        elif call_streak >= STALL_LIMIT:
+            update["stop_reason"] = f"identical tool calls repeated {call_streak} times"
+        elif failure_streak == STALL_LIMIT - 1 or call_streak == STALL_LIMIT - 1:
+            outputs[-1].content = attach_notice(
+                outputs[-1].content,
+                "You are repeating the same attempt with the same result. Change strategy: re-read the "
+                "error, fix its root cause (imports, class/package names, syntax) or drop the failing test, "
+                "and call `submit_final_result` with the tests that work if you cannot fix it."
+            )
+        elif state.get("iterations", 0) == MAX_ITERATIONS:
+            outputs[-1].content = attach_notice(
+                outputs[-1].content,
+                "This is your last iteration. Call `submit_final_result` now with the best suite you have."
+            )
+
+        if "stop_reason" in update:
+            print(f"DEBUG: Stopping agent: {update['stop_reason']}")
+        return update
+
     workflow = StateGraph(AgentState)
     workflow.add_node("agent", agent_node)
     workflow.add_node("tools", tool_node_wrapper)
+    workflow.add_node("stop", stop_node)
     workflow.set_entry_point("agent")
-    workflow.add_conditional_edges("agent", should_continue, {"tools": "tools", END: END})
+    workflow.add_conditional_edges("agent", should_continue, {"tools": "tools", "stop": "stop", END: END})
+    workflow.add_edge("stop", END)
     workflow.add_conditional_edges("tools", check_test_results, {"agent": "agent", END: END})
-    return workflow.compile()
+    return workflow.compile(checkpointer=checkpointer)
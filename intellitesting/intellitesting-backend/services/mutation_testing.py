@@ -0,0 +1,14 @@
+from core.mutation import MutationEngine, MUTATION_TIME_BUDGET
+
+
+class MutationTestingService:
+    @staticmethod
+    def score(language: str, file_content: str, test_code: str, file_path: str = None,
+              selection_range=None, time_budget: float = None):
+        """
+        Mutation score of a test suite against the (selected) source. The budget is
+        capped at MUTATION_TIME_BUDGET so one request can't hold the workers longer.
+        """
+        budget = min(time_budget or MUTATION_TIME_BUDGET, MUTATION_TIME_BUDGET)
+        return MutationEngine.score(language, file_content, test_code, file_path=file_path,
+                                    selection_range=selection_range, time_budget=budget)
@@ -0,0 +1,199 @@
+import os
+import json
+import time
+import base64
+import sqlite3
+import tempfile
+import threading
+from typing import Optional
+
+from langgraph.checkpoint.sqlite import SqliteSaver
+
+from core.shared_state import get_shared_state
+
+SESSION_DB_PATH = os.getenv("SESSION_DB_PATH", os.path.join(tempfile.gettempdir(), "intellitesting_sessions.db"))
+SESSION_TTL = int(os.getenv("SESSION_TTL_SECONDS", 3600))
+SESSION_MAX_BYTES = int(os.getenv("SESSION_MAX_BYTES", 2 * 1024 * 1024))
+SESSION_MAX_TURNS = int(os.getenv("SESSION_MAX_TURNS", 20))
+EVICTION_INTERVAL = 60
+
+
+class SessionStore:
+    """
+    Server-side agent sessions for Interactive Mode follow-ups.
+
+    Graph state lives in a LangGraph SQLite checkpointer keyed by `thread_id = session_id`;
+    a small `sessions` table next to it tracks last use, turn count and the hashes of the
+    source/spec the session was built from. Sessions expire after SESSION_TTL seconds of
+    inactivity and are dropped once they exceed SESSION_MAX_BYTES or SESSION_MAX_TURNS,
+    in which case the client simply starts a fresh one.
+
+    Workers on one host share the SQLite file (WAL mode, waiting on each other's locks).
+    When the shared state backend spans hosts (Redis), every saved turn is also published
+    there and a node that sees a newer turn than its local copy imports it before resuming,
+    so follow-ups can land on any node behind the load balancer.
+    """
+
+    _saver: Optional[SqliteSaver] = None
+    _lock = threading.Lock()
+    _last_eviction = 0.0
+
+    @classmethod
+    def checkpointer(cls) -> SqliteSaver:
+        with cls._lock:
+            if cls._saver is None:
+                conn = sqlite3.connect(SESSION_DB_PATH, check_same_thread=False, timeout=30)
+                saver = SqliteSaver(conn)
+                saver.setup()
+                with saver.cursor() as cur:
+                    cur.execute(
+                        """
+                        CREATE TABLE IF NOT EXISTS sessions (
+                            session_id TEXT PRIMARY KEY,
+                            source_hash TEXT,
+                            spec_hash TEXT,
+                            turns INTEGER NOT NULL DEFAULT 0,
+                            last_used REAL NOT NULL
+                        )
+                        """
+                    )
+                cls._saver = saver
+            return cls._saver
+
+    @classmethod
+    def get(cls, session_id: str, source_hash: str) -> Optional[dict]:
+        """Returns the live session row, or None if unknown, expired or built from different source."""
+        cls._evict_expired()
+        saver = cls.checkpointer()
+        if get_shared_state().spans_hosts:
+            cls._pull(session_id)
+        with saver.cursor() as cur:
+            cur.execute("SELECT spec_hash, turns, last_used, source_hash FROM sessions WHERE session_id = ?",
+                        (session_id,))
+            row = cur.fetchone()
+        if row is None:
+            return None
+        spec_hash, turns, last_used, stored_source_hash = row
+        if time.time() - last_used > SESSION_TTL or stored_source_hash != source_hash:
+            cls.delete(session_id)
+            return None
+        return {"session_id": session_id, "spec_hash": spec_hash, "turns": turns}
+
+    @classmethod
+    def save(cls, session_id: str, source_hash: str, spec_hash: str) -> bool:
+        """
+        Records a completed turn and trims the thread to its latest checkpoint.
+        Returns False (and deletes the session) if it is over its storage or turn bound.
+        """
+        # Most sessions are never resumed, so eviction must not depend on get() alone
+        cls._evict_expired()
+        saver = cls.checkpointer()
+        with saver.cursor() as cur:
+            # Resuming only needs the latest checkpoint (ids are time-ordered); drop the rest
+            for table in ("checkpoints", "writes"):
+                cur.execute(
+                    f"""
+                    DELETE FROM {table} WHERE thread_id = ? AND checkpoint_id <
+                        (SELECT MAX(checkpoint_id) FROM checkpoints WHERE thread_id = ?)
+                    """,
+                    (session_id, session_id),
+                )
+            cur.execute(
+                """
+                INSERT INTO sessions (session_id, source_hash, spec_hash, turns, last_used)
+                VALUES (?, ?, ?, 1, ?)
+                ON CONFLICT(session_id) DO UPDATE SET
+                    spec_hash = excluded.spec_hash, turns = turns + 1, last_used = excluded.last_used
+                """,
+                (session_id, source_hash, spec_hash, time.time()),
+            )
+            cur.execute("SELECT turns FROM sessions WHERE session_id = ?", (session_id,))
+            turns = cur.fetchone()[0]
+            cur.execute(
+                """
+                SELECT COALESCE(SUM(LENGTH(checkpoint) + LENGTH(metadata)), 0) FROM checkpoints WHERE thread_id = ?
+                UNION ALL
+                SELECT COALESCE(SUM(LENGTH(value)), 0) FROM writes WHERE thread_id = ?
+                """,
+                (session_id, session_id),
+            )
+            size = sum(r[0] for r in cur.fetchall())
+
+        if size > SESSION_MAX_BYTES or turns >= SESSION_MAX_TURNS:
+            print(f"--- Session {session_id} dropped ({size} bytes, {turns} turns) ---")
+            cls.delete(session_id)
+            return False
+        if get_shared_state().spans_hosts:
+            cls._publish(session_id)
+        return True
+
+    @classmethod
+    def delete(cls, session_id: str, shared: bool = True):
+        saver = cls.checkpointer()
+        saver.delete_thread(session_id)
+        with saver.cursor() as cur:
+            cur.execute("DELETE FROM sessions WHERE session_id = ?", (session_id,))
+        state = get_shared_state()
+        if shared and state.spans_hosts:
+            state.delete(f"session:{session_id}", f"session:{session_id}:turns")
+
+    @classmethod
+    def _publish(cls, session_id: str):
+        """Copies the session row and its (trimmed) checkpoint rows to the shared state."""
+        snapshot = {}
+        with cls.checkpointer().cursor() as cur:
+            for table in ("sessions", "checkpoints", "writes"):
+                key = "session_id" if table == "sessions" else "thread_id"
+                cur.execute(f"SELECT * FROM {table} WHERE {key} = ?", (session_id,))
+                columns = [d[0] for d in cur.description]
+                snapshot[table] = [
+                    {c: {"b64": base64.b64encode(v).decode("ascii")} if isinstance(v, bytes) else v
+                     for c, v in zip(columns, row)}
+                    for row in cur.fetchall()
+                ]
+        state = get_shared_state()
+        state.set(f"session:{session_id}", json.dumps(snapshot), ttl=SESSION_TTL)
+        state.set(f"session:{session_id}:turns", str(snapshot["sessions"][0]["turns"]), ttl=SESSION_TTL)
+
+    @classmethod
+    def _pull(cls, session_id: str):
+        """Replaces the local copy with the shared one if another node has saved a newer turn."""
+        state = get_shared_state()
+        remote_turns = state.get(f"session:{session_id}:turns")
+        if remote_turns is None:
+            return
+        saver = cls.checkpointer()
+        with saver.cursor() as cur:
+            cur.execute("SELECT turns FROM sessions WHERE session_id = ?", (session_id,))
+            row = cur.fetchone()
+        if row is not None and row[0] >= int(remote_turns):
+            return
+        raw = state.get(f"session:{session_id}")
+        if raw is None:
+            return
+        snapshot = json.loads(raw)
+        saver.delete_thread(session_id)
+        with saver.cursor() as cur:
+            for table in ("sessions", "checkpoints", "writes"):
+                for row in snapshot.get(table, []):
+                    values = [base64.b64decode(v["b64"]) if isinstance(v, dict) else v for v in row.values()]
+                    cur.execute(
+                        f"INSERT OR REPLACE INTO {table} ({', '.join(row)}) VALUES ({', '.join('?' * len(row))})",
+                        values)
+
+    @classmethod
+    def _evict_expired(cls):
+        now = time.time()
+        with cls._lock:
+            if now - cls._last_eviction < EVICTION_INTERVAL:
+                return
+            cls._last_eviction = now
+        saver = cls.checkpointer()
+        with saver.cursor() as cur:
+            cur.execute("SELECT session_id FROM sessions WHERE last_used < ?", (now - SESSION_TTL,))
+            expired = [r[0] for r in cur.fetchall()]
+        for session_id in expired:
+            # A local copy going stale says nothing about the replica other nodes may be using
+            cls.delete(session_id, shared=False)
+        if expired:
+            print(f"--- Evicted {len(expired)} expired session(s) ---")
@@ -1,8 +1,51 @@
-from services.agent_service import build_agent_app
+from services.agent_service import build_agent_app, REQUEST_DEADLINE
+from services.session_store import SessionStore
 from schemas import SelectionRange
-from langchain_core.messages import HumanMessage, AIMessage
+from langchain_core.messages import SystemMessage, HumanMessage, AIMessage
 from core.languages.factory import LanguageFactory
+from core.workspace import Workspace
+from core import coverage
+from core import metrics
+from core.mutation import assemble_test_file, MUTATION_AFTER_GENERATION
+from services.mutation_testing import MutationTestingService
 import re
+import time
+import uuid
+import hashlib
+import inspect
+
+def _hash(text: str) -> str:
+    return hashlib.sha1((text or "").encode("utf-8")).hexdigest()
+
+def _run_fields() -> dict:
+    """Per-run state that is reset at the start of every turn (fresh or resumed)."""
+    return {
+        "iterations": 0,
+        "final_test_code": "",
+        "imports_and_setup": "",
+        "test_cases": [],
+        "proposed_plan": [],
+        "interactive_questions": [],
+        "started_at": time.time(),
+        "deadline_at": time.time() + REQUEST_DEADLINE,
+        "tokens_used": 0,
+        "last_call_tokens": 0,
+        "last_call_signature": "",
+        "call_streak": 0,
+        "last_failure_signature": None,
+        "failure_streak": 0,
+        "stop_reason": None,
+        "workspace_session": uuid.uuid4().hex,
+        "covered_lines": [],
+        "coverage": None
+    }
+
+def _stop_kind(stop_reason: str) -> str:
+    """Bounded metric label for a free-text stop reason (see agent_service)."""
+    for kind in ("iteration cap", "latency deadline", "token budget", "same test failure", "identical tool calls"):
+        if stop_reason.startswith(kind):
+            return kind.replace(" ", "_")
+    return "other"
 
 class TestGenerationService:
     @staticmethod
@@ -17,20 +60,95 @@ class TestGenerationService:
         instruction: str = None,
         specification: str = None,
         chat_history: list = None,
-        api_key: str = None
+        api_key: str = None,
+        session_id: str = None,
+        llm=None,
+        callbacks: list = None
     ):
         # 1. Get Language Strategy
-        source_package = None
-        source_classes = []
         try:
             strategy = LanguageFactory.get_strategy(language)
-            # Analyze FULL content to get package and class info
-            analysis = strategy.analyze_code(file_content)
-            source_package = analysis.get("package")
-            source_classes = analysis.get("classes", [])
         except ValueError as e:
             return {"error": str(e)}
 
+        source_hash = _hash(file_content + selected_code)
+        spec_hash = _hash(specification)
+        session = SessionStore.get(session_id, source_hash) if session_id else None
+        if session:
+            # Follow-up: resume the checkpointed graph with only the new user input
+            print(f"--- Resuming session {session_id} (turn {session['turns'] + 1}) ---")
+            agent_input = {"messages": TestGenerationService._follow_up_messages(
+                session, specification, spec_hash, instruction, chat_history), **_run_fields()}
+        else:
+            session_id = uuid.uuid4().hex
+            agent_input = TestGenerationService._initial_state(
+                strategy, file_content, selected_code, language, framework, file_path,
+                instruction, specification, chat_history)
+            target = coverage.build_target(
+                language, file_path, file_content, selection_range, (configuration or {}).get("coverage_target"))
+            agent_input["coverage_target"] = target
+            if target:
+                where = f"import it from module `{target['module']}`" if language == "python" \
+                    else f"it is compiled alongside the tests as `{target['qualified_name']}`"
+                agent_input["messages"].append(HumanMessage(content=(
+                    f"COVERAGE: `run_unit_tests` reports coverage of lines {target['start']}-{target['end']} of the "
+                    f"source ({where}). Aim for {target['target']:.0%} line and branch coverage of that range."
+                )))
+
+        print("--- Executing Agent ---")
+        agent_app = build_agent_app(api_key, llm=llm)
+        config = {"configurable": {"thread_id": session_id}}
+        if callbacks:
+            config["callbacks"] = callbacks
+        try:
+            final_state = agent_app.invoke(agent_input, config=config)
+        except Exception:
+            SessionStore.delete(session_id)
+            raise
+        finally:
+            Workspace.end_session(agent_input["workspace_session"])
+        if not SessionStore.save(session_id, source_hash, spec_hash):
+            session_id = None
+        metrics.AGENT_ITERATIONS.observe(final_state.get("iterations", 0))
+        if final_state.get("stop_reason"):
+            metrics.AGENT_STOPS.inc(reason=_stop_kind(final_state["stop_reason"]))
+
+        result = TestGenerationService._extract_result(final_state, strategy, file_path, session_id)
+        if result["test_cases"] and ((configuration or {}).get("mutation_score") or MUTATION_AFTER_GENERATION):
+            # Optional post-generation step: how many seeded faults the returned suite detects
+            print("--- Measuring mutation score ---")
+            result["mutation_score"] = MutationTestingService.score(
+                language, file_content,
+                assemble_test_file(language, result["imports_and_setup"], result["test_cases"]),
+                file_path=file_path, selection_range=selection_range,
+                time_budget=(configuration or {}).get("mutation_time_budget"))
+        return result
+
+    @staticmethod
+    def _follow_up_messages(session: dict, specification: str, spec_hash: str,
+                            instruction: str, chat_history: list) -> list:
+        messages = []
+        if specification and spec_hash != session["spec_hash"]:
+            messages.append(HumanMessage(content=(
+                f"SPECIFICATION (Oracle - The Source of Truth):\n{specification}\n"
+                "- Oracle Mode: Follow the spec strictly. Prioritize spec over code logic."
+            )))
+        latest_user = next((m["content"] for m in reversed(chat_history or []) if m.get("role") == "user"), None)
+        if instruction:
+            messages.append(HumanMessage(content=f"User Instruction: {instruction}"))
+        elif latest_user:
+            messages.append(HumanMessage(content=latest_user))
+        if not messages:
+            messages.append(HumanMessage(content="Please continue."))
+        return messages
+
+    @staticmethod
+    def _initial_state(strategy, file_content: str, selected_code: str, language: str, framework: str,
+                       file_path: str, instruction: str, specification: str, chat_history: list) -> dict:
+        # Analyze FULL content to get package and class info
+        conventions = strategy.get_test_conventions(file_content)
+        source_package = conventions["source_package"]
+
         # 2. Build Prompt using Strategy
         has_context = (specification and len(specification.strip()) > 0) or (instruction and len(instruction.strip()) > 5)
 
@@ -38,10 +156,10 @@ class TestGenerationService:
         package_instruction = ""
         if source_package:
             # Derived Test Package: change 'main' to 'test'
-            test_package = source_package.replace("main", "test")
+            test_package = conventions["test_package"]
             
             # Identify the class to import
-            class_to_test = source_classes[0] if source_classes else "Unknown"
+            class_to_test = conventions["source_class"] or "Unknown"
             
             package_instruction = f"""
             PROJECT STRUCTURE CONVENTION:
@@ -66,12 +184,12 @@ class TestGenerationService:
             - **CRITICAL**: Do NOT call `submit_final_result` or generate any code yet.
             """
         
-        lang_specific_prompt = strategy.get_test_prompt_template()
+        # The static prefix (strategy template) goes first as a SystemMessage so it is
+        # byte-identical across requests and can be served from a prompt cache.
+        static_prefix = inspect.cleandoc(strategy.get_test_prompt_template())
+        static_prefix += "\n\nGOAL: Generate a comprehensive unit test suite."
 
-        initial_prompt = f"""
-        {lang_specific_prompt}
-        GOAL: Generate a comprehensive unit test suite.
-        
+        request_prompt = f"""
         {package_instruction}
         
         INPUTS:
@@ -82,7 +200,7 @@ class TestGenerationService:
         METHODOLOGY: {behavior_instruction}
         """
         
-        initial_messages = [HumanMessage(content=initial_prompt)]
+        initial_messages = [SystemMessage(content=static_prefix), HumanMessage(content=request_prompt)]
         if chat_history:
             for msg in chat_history:
                 if msg["role"] == "user":
@@ -92,30 +210,25 @@ class TestGenerationService:
         if instruction:
              initial_messages.append(HumanMessage(content=f"User Instruction: {instruction}"))
 
-        initial_state = {
+        return {
             "messages": initial_messages,
             "file_content": file_content,
             "selected_code": selected_code,
             "language": language,
             "framework": framework,
-            "iterations": 0,
-            "final_test_code": "",
-            "imports_and_setup": "",
-            "test_cases": [],
-            "proposed_plan": [],
-            "interactive_questions": []
+            **_run_fields()
         }
 
-        print("--- Executing Agent ---")
-        agent_app = build_agent_app(api_key)
-        final_state = agent_app.invoke(initial_state)
-        
+    @staticmethod
+    def _extract_result(final_state: dict, strategy, file_path: str, session_id: str) -> dict:
         # --- STRUCTURED EXTRACTION ---
         # Look for code, plan, or questions in the final state
         imports_and_setup = final_state.get("imports_and_setup", "")
         test_cases = final_state.get("test_cases", [])
         proposed_plan_raw = final_state.get("proposed_plan", [])
         questions = final_state.get("interactive_questions", [])
+        if final_state.get("stop_reason"):
+            print(f"--- Agent stopped early: {final_state['stop_reason']} ---")
 
         # Normalize proposed_plan: ensure inputs/expected_output are strings
         proposed_plan = []
@@ -139,7 +252,11 @@ class TestGenerationService:
             "test_cases": test_cases,
             "proposed_plan": proposed_plan,
             "suggested_file_path": strategy.get_suggested_test_path(file_path),
-            "interactive_questions": formatted_questions
+            "interactive_questions": formatted_questions,
+            "stop_reason": final_state.get("stop_reason"),
+            "llm_calls": final_state.get("iterations", 0),
+            "coverage": final_state.get("coverage"),
+            "session_id": session_id
         }
 
     @staticmethod
@@ -0,0 +1,25 @@
+import os
+import sys
+
+import pytest
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if BACKEND_DIR not in sys.path:
+    sys.path.insert(0, BACKEND_DIR)
+
+from benchmarks.fake_gemini_server import start_in_thread
+
+
+@pytest.fixture
+def fake_gemini():
+    """Starts a fake Gemini server with the given options; all are shut down after the test."""
+    servers = []
+
+    def start(**kwargs):
+        server = start_in_thread(**kwargs)
+        servers.append(server)
+        return server
+
+    yield start
+    for server in servers:
+        server.shutdown()
@@ -0,0 +1,134 @@
+import json
+
+import pytest
+from langchain_core.messages import AIMessage, HumanMessage, SystemMessage, ToolMessage
+
+import services.agent_service as agent_service
+import services.session_store as session_store
+from benchmarks.replay_model import ReplayChatModel
+from core import shared_state
+from services.agent_service import build_agent_app
+from services.session_store import SessionStore
+from services.test_generation import _run_fields
+
+SOURCE = "def add(a, b):\n    return a + b\n"
+
+
+@pytest.fixture(autouse=True)
+def sessions(tmp_path, monkeypatch):
+    monkeypatch.setattr(shared_state, "_state", shared_state.MemoryState())
+    monkeypatch.setattr(session_store, "SESSION_DB_PATH", str(tmp_path / "sessions.db"))
+    monkeypatch.setattr(SessionStore, "_saver", None)
+    monkeypatch.setattr(agent_service, "MAX_ITERATIONS", 8)
+    monkeypatch.setattr(agent_service, "STALL_LIMIT", 3)
+
+
+def analyze(n: int = 0) -> dict:
+    return {"tool_calls": [{"name": "analyze_source_code", "args": {"code": SOURCE + "#" * n, "language": "python"}}]}
+
+
+def run_tests(code: str) -> dict:
+    return {"tool_calls": [{"name": "run_unit_tests", "args": {"test_code": code, "language": "python"}}]}
+
+
+SUBMIT = {"tool_calls": [{"name": "submit_final_result", "args": {
+    "explanation": "done", "interactive_questions": [], "imports_and_setup": "from calc import add",
+    "test_cases": [{"id": "t1", "intent": "sum", "expected_behavior": "3", "code": "def test_add():\n    assert add(1, 2) == 3\n"}],
+}}]}
+
+
+def invoke(steps: list, thread: str = "t", messages: list = None) -> dict:
+    app = build_agent_app(llm=ReplayChatModel(steps=steps))
+    state = {**_run_fields(), "messages": messages or [SystemMessage(content="system"), HumanMessage(content="go")],
+             "file_content": SOURCE, "selected_code": SOURCE, "language": "python", "framework": "pytest",
+             "coverage_target": None}
+    return app.invoke(state, {"configurable": {"thread_id": thread}})
+
+
+def tool_messages(state: dict) -> list:
+    return [m for m in state["messages"] if isinstance(m, ToolMessage)]
+
+
+def unanswered_calls(messages: list) -> list:
+    answered = {m.tool_call_id for m in messages if isinstance(m, ToolMessage)}
+    return [call["id"] for m in messages if isinstance(m, AIMessage) for call in m.tool_calls
+            if call["id"] not in answered]
+
+
+def test_iteration_cap_stops_and_answers_pending_calls(monkeypatch):
+    monkeypatch.setattr(agent_service, "MAX_ITERATIONS", 2)
+    state = invoke([analyze(n) for n in range(5)])
+    assert state["stop_reason"] == "iteration cap (2) reached"
+    assert state["iterations"] == 3
+    # The second batch ran with a last-iteration notice; the third was closed without running
+    assert "This is your last iteration" in tool_messages(state)[1].content
+    last = state["messages"][-1]
+    assert isinstance(last, ToolMessage) and last.content.startswith("Not executed: the agent was stopped")
+    assert unanswered_calls(state["messages"]) == []
+
+
+def test_resumed_session_after_budget_stop_has_no_dangling_calls(monkeypatch):
+    monkeypatch.setattr(agent_service, "MAX_ITERATIONS", 1)
+    first = invoke([analyze(0), analyze(1)], thread="resume")
+    assert first["stop_reason"]
+
+    monkeypatch.setattr(agent_service, "MAX_ITERATIONS", 8)
+    follow_up = {**_run_fields(), "messages": [HumanMessage(content="Please continue.")]}
+    app = build_agent_app(llm=ReplayChatModel(steps=[SUBMIT]))
+    second = app.invoke(follow_up, {"configurable": {"thread_id": "resume"}})
+    assert second["stop_reason"] is None
+    assert [c["id"] for c in second["test_cases"]] == ["t1"]
+    assert unanswered_calls(second["messages"]) == []
+
+
+def test_pending_submission_is_honoured_over_budget(monkeypatch):
+    monkeypatch.setattr(agent_service, "MAX_ITERATIONS", 1)
+    state = invoke([analyze(0), SUBMIT])
+    assert state["stop_reason"] == "iteration cap (1) reached"
+    assert [c["id"] for c in state["test_cases"]] == ["t1"]
+    assert tool_messages(state)[-1].content == "Submission accepted."
+
+
+def test_token_budget_stops_before_the_next_call(monkeypatch):
+    monkeypatch.setattr(agent_service, "TOKEN_BUDGET", 1)
+    state = invoke([analyze(n) for n in range(3)])
+    assert state["stop_reason"] == "token budget (1) would be exceeded"
+    assert state["iterations"] == 1
+    assert unanswered_calls(state["messages"]) == []
+
+
+def test_budget_exhausted_latency_deadline():
+    state = {"iterations": 2, "started_at": 100.0, "deadline_at": 130.0, "tokens_used": 0, "last_call_tokens": 0}
+    # Two iterations took 20s, so a third (~10s) would end at 130s
+    assert agent_service._budget_exhausted(state, 120.0) is None
+    assert agent_service._budget_exhausted(state, 121.0).startswith("latency deadline")
+
+
+def test_repeated_tool_calls_get_a_notice_then_stop():
+    state = invoke([analyze(0)] * 5)
+    outputs = tool_messages(state)
+    assert len(outputs) == 3
+    assert "notice" not in json.loads(outputs[0].content)
+    assert json.loads(outputs[1].content)["notice"].startswith("You are repeating the same attempt")
+    assert state["stop_reason"] == "identical tool calls repeated 3 times"
+
+
+def test_repeated_test_failure_gets_a_notice_then_stops():
+    # Different code each time, so only the failure repeats
+    steps = [run_tests(f"def test_add():\n    assert {n} == -1\n") for n in range(5)]
+    state = invoke(steps)
+    outputs = tool_messages(state)
+    assert len(outputs) == 3
+    assert json.loads(outputs[0].content)["passed"] is False
+    assert json.loads(outputs[1].content)["notice"].startswith("You are repeating the same attempt")
+    assert state["stop_reason"] == "same test failure repeated 3 times"
+
+
+def test_passing_run_resets_the_failure_streak():
+    steps = [run_tests("def test_a():\n    assert 1 == 2\n"),
+             run_tests("def test_a():\n    assert 2 == 3\n"),
+             run_tests("def test_a():\n    assert 1 == 1\n")]
+    state = invoke(steps)
+    assert state["stop_reason"] is None
+    assert state["failure_streak"] == 0
+    assert json.loads(tool_messages(state)[-1].content)["passed"] is True
@@ -0,0 +1,19 @@
+import pytest
+
+from benchmarks.run_benchmark import percentile
+
+
+@pytest.mark.parametrize("values, pct, expected", [
+    ([], 50, 0.0),
+    ([7], 95, 7),
+    ([1, 2], 50, 1),
+    ([1, 2], 51, 2),
+    ([1, 2, 3, 4], 50, 2),
+    ([1, 2, 3, 4], 75, 3),
+    ([4, 1, 3, 2], 100, 4),
+    ([1, 2, 3, 4], 0, 1),
+    (list(range(1, 21)), 95, 19),
+    (list(range(1, 101)), 99, 99),
+])
+def test_nearest_rank_percentile(values, pct, expected):
+    assert percentile(values, pct) == expected
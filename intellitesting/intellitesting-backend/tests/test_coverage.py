@@ -0,0 +1,105 @@
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+
+import core.coverage as cov
+from core.test_runner import PytestRunner
+from schemas import SelectionRange
+
+SOURCE = """\
+def grade(score):
+    if score >= 50:
+        return "pass"
+    return "fail"
+
+
+def sign(x):
+    return "+" if x >= 0 else "-"
+
+
+def total(items):
+    result = 0
+    for item in items:
+        result += item
+    return result
+"""
+
+
+def selection(start_line: int, end_line: int) -> SelectionRange:
+    return SelectionRange(start=start_line - 1, end=end_line - 1)
+
+
+def test_build_target_is_off_by_default(monkeypatch):
+    monkeypatch.setattr(cov, "COVERAGE_FEEDBACK", False)
+    assert cov.build_target("python", "calc.py", SOURCE, selection(1, 4)) is None
+
+
+def test_build_target_python_lines_and_branches():
+    target = cov.build_target("python", "src/grades.py", SOURCE, selection(1, 16), target=0.8)
+    assert target["module"] == "grades"
+    assert target["source_file"] == "grades.py"
+    assert (target["start"], target["end"], target["target"]) == (1, 16, 0.8)
+    assert target["executable"] == [1, 2, 3, 4, 7, 8, 11, 12, 13, 14, 15]
+    # The `if` statement and the `for` loop; the conditional expression on line 8 is not a branch line
+    assert target["branches"] == [2, 13]
+
+
+def test_build_target_limits_to_the_selection():
+    target = cov.build_target("python", "grades.py", SOURCE, selection(11, 16), target=0.9)
+    assert target["executable"] == [11, 12, 13, 14, 15]
+    assert target["branches"] == [13]
+
+
+def test_build_target_rejects_unparsable_source():
+    assert cov.build_target("python", "bad.py", "def broken(:\n", selection(1, 1), target=0.9) is None
+
+
+def test_build_target_java_needs_jacoco(monkeypatch):
+    monkeypatch.setattr(cov, "JACOCO_AGENT_JAR", None)
+    source = "package demo;\npublic class Calc {\n  int one() { return 1; }\n}\n"
+    assert cov.build_target("java", "Calc.java", source, selection(1, 4), target=0.9) is None
+
+
+def test_read_python_coverage_counts_branch_directions(tmp_path):
+    target = {"branches": [2, 13, 20]}
+    output = tmp_path / "coverage.json"
+    # Line 2 went both ways, line 13 only into the loop body, line 20 never ran
+    output.write_text(json.dumps({"lines": [1, 2, 3, 4, 13, 14],
+                                  "arcs": [[2, 3], [2, 4], [13, 14], [14, 13], [3, 0]]}))
+    covered, branches = cov.read_python_coverage(str(output), target)
+    assert covered == {1, 2, 3, 4, 13, 14}
+    assert branches == {2: (2, 2), 13: (1, 2), 20: (0, 2)}
+
+
+def test_plugin_uninstalls_its_tracer_before_writing(tmp_path):
+    source = tmp_path / "grades.py"
+    source.write_text(SOURCE)
+    output = tmp_path / "coverage.json"
+    script = cov.PYTEST_PLUGIN + (
+        "\nimport importlib, threading\n"
+        f"sys.path.insert(0, {str(tmp_path)!r})\n"
+        "importlib.import_module('grades').grade(70)\n"
+        "_write()\n"
+        "print(sys.gettrace() is None, threading.gettrace() is None if hasattr(threading, 'gettrace') else True)\n")
+    env = {**os.environ, cov.SOURCE_ENV: str(source), cov.OUTPUT_ENV: str(output)}
+    result = subprocess.run([sys.executable, "-c", script], capture_output=True, text=True, env=env, timeout=30)
+    assert result.returncode == 0, result.stderr
+    assert result.stdout.split() == ["True", "True"]
+    assert {2, 3} <= set(json.loads(output.read_text())["lines"])
+
+
+def test_pytest_run_reports_partial_coverage():
+    target = cov.build_target("python", "grades.py", SOURCE, selection(1, 4), target=0.9)
+    tests = "from grades import grade\n\n\ndef test_pass():\n    assert grade(80) == 'pass'\n"
+    result = PytestRunner.run(tests, target)
+    assert result["passed"], result["stdout"]
+    summary = result["coverage"]
+    assert summary["lines"] == "3/4"
+    assert summary["missing_lines"] == "4"
+    assert summary["branches"] == "1/2"
+    assert summary["partial_branches"] == "2"
+    assert summary["target_met"] is False
+    assert result["covered_lines"] == [1, 2, 3]
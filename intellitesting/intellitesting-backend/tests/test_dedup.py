@@ -0,0 +1,68 @@
+import pytest
+
+import core.test_dedup as test_dedup
+from core.test_dedup import TestCaseDeduplicator
+
+
+def case(case_id: str, code: str) -> dict:
+    return {"id": case_id, "code": code}
+
+
+def ids(cases: list) -> list:
+    return [c["id"] for c in cases]
+
+
+def test_python_renamed_duplicate_is_removed():
+    cases = [
+        case("a", "def test_add():\n    result = add(1, 2)\n    assert result == 3\n"),
+        case("b", "def test_add_again():\n    # same check\n    total = add(1,  2)\n    assert total == 3\n"),
+    ]
+    kept, removed = TestCaseDeduplicator.deduplicate(cases, "python")
+    assert ids(kept) == ["a"]
+    assert removed == [{"id": "b", "reason": "duplicate", "kept": "a"}]
+
+
+def test_python_prefix_case_is_subsumed_by_longer_one():
+    cases = [
+        case("short", "def test_a():\n    x = make()\n    assert x.ok\n"),
+        case("long", "def test_b():\n    y = make()\n    assert y.ok\n    assert y.size == 2\n"),
+    ]
+    kept, removed = TestCaseDeduplicator.deduplicate(cases, "python")
+    assert ids(kept) == ["long"]
+    assert removed == [{"id": "short", "reason": "subsumed", "kept": "long"}]
+
+
+@pytest.mark.parametrize("other", [
+    "def test_b():\n    assert add(2, 2) == 4\n",             # different literal
+    "def test_b(tmp_path):\n    assert add(1, 2) == 3\n",      # different fixture
+    "async def test_b():\n    assert add(1, 2) == 3\n",        # different kind
+])
+def test_python_different_cases_are_kept(other):
+    cases = [case("a", "def test_a():\n    assert add(1, 2) == 3\n"), case("b", other)]
+    kept, removed = TestCaseDeduplicator.deduplicate(cases, "python")
+    assert ids(kept) == ["a", "b"] and removed == []
+
+
+def test_unparseable_cases_are_always_kept():
+    cases = [case("a", "def test_a(:\n"), case("b", "def test_a(:\n"), {"id": "c"}]
+    kept, removed = TestCaseDeduplicator.deduplicate(cases, "python")
+    assert ids(kept) == ["a", "b", "c"] and removed == []
+
+
+def test_java_duplicate_and_subsumed_cases_are_removed():
+    cases = [
+        case("a", "@Test\npublic void adds() {\n    int r = calc.add(1, 2);\n    assertEquals(3, r);\n}"),
+        case("b", "@Test\npublic void addsAgain() {\n    int total = calc.add(1, 2); // same\n    assertEquals(3, total);\n}"),
+        case("c", "@Test\npublic void addsMore() {\n    int v = calc.add(1, 2);\n    assertEquals(3, v);\n    assertTrue(v > 0);\n}"),
+    ]
+    kept, removed = TestCaseDeduplicator.deduplicate(cases, "java")
+    assert ids(kept) == ["c"]
+    assert {(r["id"], r["reason"]) for r in removed} == {("a", "subsumed"), ("b", "subsumed")}
+
+
+def test_order_is_preserved_and_disabled_flag_passes_through(monkeypatch):
+    cases = [case("x", "def test_x():\n    assert 1\n"), case("y", "def test_y():\n    assert 2\n")]
+    assert ids(TestCaseDeduplicator.deduplicate(cases, "python")[0]) == ["x", "y"]
+    monkeypatch.setattr(test_dedup, "TEST_DEDUP", False)
+    duplicates = [cases[0], case("z", cases[0]["code"])]
+    assert TestCaseDeduplicator.deduplicate(duplicates, "python") == (duplicates, [])
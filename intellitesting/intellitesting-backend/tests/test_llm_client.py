@@ -0,0 +1,125 @@
+import time
+
+import httpx
+import pytest
+from langchain_google_genai import ChatGoogleGenerativeAI
+
+from core import metrics
+from core.llm_client import ResilientLLMClient, LLMDeadlineExceeded, get_shared_transport
+
+
+def gemini(server) -> ChatGoogleGenerativeAI:
+    # Same construction as build_agent_app, pointed at the fake server
+    return ChatGoogleGenerativeAI(model="gemini-2.5-flash", google_api_key="fake", base_url=server.url,
+                                  max_retries=1, client_args={"transport": get_shared_transport()})
+
+
+def server_stats(server) -> dict:
+    return httpx.get(server.url).json()
+
+
+@pytest.mark.parametrize("status", [429, 503])
+def test_transient_errors_are_retried(fake_gemini, status):
+    server = fake_gemini(fail_first=2, error_codes=[status])
+    client = ResilientLLMClient(gemini(server), max_attempts=4, base_delay=0.01, max_delay=0.02)
+
+    assert client.invoke("hello").content == "OK"
+    assert server_stats(server)["requests"] == 3
+    assert client.stats["retries"] == 2
+
+
+def test_non_transient_errors_are_not_retried(fake_gemini):
+    server = fake_gemini(fail_first=1, error_codes=[400])
+    client = ResilientLLMClient(gemini(server), max_attempts=4, base_delay=0.01)
+
+    with pytest.raises(Exception):
+        client.invoke("hello")
+    assert server_stats(server)["requests"] == 1
+    assert client.stats["retries"] == 0
+
+
+def test_gives_up_after_max_attempts(fake_gemini):
+    server = fake_gemini(error_rate=1.0, error_codes=[503])
+    client = ResilientLLMClient(gemini(server), max_attempts=3, base_delay=0.01, max_delay=0.02)
+
+    with pytest.raises(Exception):
+        client.invoke("hello")
+    assert server_stats(server)["requests"] == 3
+
+
+def test_deadline_expires_on_slow_call(fake_gemini):
+    server = fake_gemini(latency=1.0)
+    client = ResilientLLMClient(gemini(server), deadline=0.2)
+
+    started = time.monotonic()
+    with pytest.raises(LLMDeadlineExceeded):
+        client.invoke("hello")
+    assert time.monotonic() - started < 0.8
+    assert client.stats["deadline_exceeded"] == 1
+
+
+def test_deadline_covers_backoff(fake_gemini):
+    server = fake_gemini(error_rate=1.0, error_codes=[503])
+    client = ResilientLLMClient(gemini(server), max_attempts=10, base_delay=5.0, max_delay=5.0, deadline=0.5)
+
+    started = time.monotonic()
+    with pytest.raises(LLMDeadlineExceeded):
+        # The jittered first backoff may be short; later ones can't all fit in the deadline
+        client.invoke("hello")
+    assert time.monotonic() - started < 1.0
+
+
+def test_hedge_wins_over_slow_primary(fake_gemini):
+    server = fake_gemini(slow_first=1, slow_extra=1.5)
+    client = ResilientLLMClient(gemini(server), hedge_percentile=50, hedge_min_samples=1)
+    client._record_latency(0.05)
+
+    started = time.monotonic()
+    assert client.invoke("hello").content == "OK"
+    assert time.monotonic() - started < 1.0
+    assert client.stats["hedges"] == 1
+    assert client.stats["hedge_wins"] == 1
+
+
+def test_no_hedge_without_latency_history(fake_gemini):
+    server = fake_gemini()
+    client = ResilientLLMClient(gemini(server), hedge_percentile=50, hedge_min_samples=5)
+
+    client.invoke("hello")
+    assert client.hedge_delay() is None
+    assert client.stats["hedges"] == 0
+
+
+def test_connections_are_reused_across_calls_and_clients(fake_gemini):
+    server = fake_gemini()
+    for _ in range(3):
+        ResilientLLMClient(gemini(server)).invoke("hello")
+
+    stats = server_stats(server)
+    assert stats["requests"] == 3
+    assert stats["distinct_connections"] == 1
+
+
+def llm_pool_busy() -> float:
+    values = metrics.REGISTRY.snapshot()["intellitesting_pool_busy_workers"]["values"]
+    return next((value for labels, value in values if labels == ["llm"]), 0)
+
+
+def test_http_timeout_frees_pool_thread_of_abandoned_call(fake_gemini):
+    server = fake_gemini(latency=3.0)
+    llm = ChatGoogleGenerativeAI(model="gemini-2.5-flash", google_api_key="fake", base_url=server.url,
+                                 max_retries=1, timeout=0.5, client_args={"transport": get_shared_transport()})
+    busy_before = llm_pool_busy()
+
+    with pytest.raises(LLMDeadlineExceeded):
+        ResilientLLMClient(llm, deadline=0.2).invoke("hello")
+    assert llm_pool_busy() == busy_before + 1  # abandoned, still running
+
+    time.sleep(1.0)
+    assert llm_pool_busy() == busy_before
+
+
+def test_backoff_ceiling_doubles_from_base():
+    client = ResilientLLMClient(object(), base_delay=1.0, max_delay=3.0)
+    for attempt, ceiling in ((1, 1.0), (2, 2.0), (3, 3.0), (4, 3.0)):
+        assert all(0 <= client._backoff(attempt) <= ceiling for _ in range(50))
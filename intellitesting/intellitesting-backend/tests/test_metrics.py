@@ -0,0 +1,161 @@
+import json
+import os
+import subprocess
+import sys
+import threading
+
+import pytest
+
+import core.metrics as metrics
+from core.metrics import MetricsRegistry
+
+
+@pytest.fixture
+def registry(monkeypatch):
+    monkeypatch.setattr(metrics, "METRICS_ENABLED", True)
+    monkeypatch.setattr(metrics, "METRICS_MULTIPROC_DIR", None)
+    return MetricsRegistry()
+
+
+def dead_pid() -> int:
+    proc = subprocess.Popen([sys.executable, "-c", "pass"])
+    proc.wait()
+    return proc.pid
+
+
+def values(family: dict) -> dict:
+    return {tuple(key): value for key, value in family["values"]}
+
+
+def test_base_metric_is_abstract():
+    with pytest.raises(TypeError):
+        metrics._Metric("x", "doc")
+
+
+def test_counter_sums_shards_of_live_and_finished_threads(registry):
+    counter = registry.counter("c_total", "doc", ("kind",))
+    ready, release = threading.Barrier(5), threading.Event()
+
+    def work(n):
+        for _ in range(1000):
+            counter.inc(kind="a")
+        counter.inc(n, kind="b")
+        ready.wait()
+        if n % 2:
+            release.wait()  # odd threads stay alive during the first scrape
+
+    threads = [threading.Thread(target=work, args=(n,)) for n in range(4)]
+    for thread in threads:
+        thread.start()
+    ready.wait()
+    for thread in threads[::2]:
+        thread.join()
+    assert counter.collect() == {("a",): 4000, ("b",): 6}
+
+    release.set()
+    for thread in threads:
+        thread.join()
+    counter.inc(kind="a")
+    # Finished shards are folded into the retired totals exactly once
+    assert counter.collect() == {("a",): 4001, ("b",): 6}
+    assert counter.collect() == {("a",): 4001, ("b",): 6}
+    assert len(counter._shards) == 1
+
+
+def test_counter_callback_is_added(registry):
+    counter = registry.counter("c_total", "doc", ("kind",), callback=lambda: {("a",): 5})
+    counter.inc(kind="a")
+    assert counter.collect() == {("a",): 6}
+
+
+def test_disabled_metrics_record_nothing(registry, monkeypatch):
+    monkeypatch.setattr(metrics, "METRICS_ENABLED", False)
+    counter = registry.counter("c_total", "doc")
+    counter.inc()
+    assert counter.collect() == {}
+
+
+def test_histogram_buckets(registry):
+    histogram = registry.histogram("h_seconds", "doc", buckets=(0.1, 1, 10))
+    for value in (0.05, 0.1, 0.5, 1, 5, 50):
+        histogram.observe(value)
+    # Upper bounds are inclusive (le); the last slot is +Inf, then sum and count
+    assert histogram.collect() == {(): [2, 2, 1, 1, 56.65, 6]}
+
+
+def test_exposition_text(registry):
+    registry.counter("app_requests_total", "Requests.", ("path",)).inc(3, path='/a"b')
+    registry.gauge("app_in_progress", "In progress.").set(2)
+    histogram = registry.histogram("app_latency_seconds", "Latency.", buckets=(0.5, 1))
+    histogram.observe(0.25)
+    histogram.observe(0.75)
+    assert registry.exposition() == "\n".join([
+        "# HELP app_in_progress In progress.",
+        "# TYPE app_in_progress gauge",
+        "app_in_progress 2",
+        "# HELP app_latency_seconds Latency.",
+        "# TYPE app_latency_seconds histogram",
+        'app_latency_seconds_bucket{le="0.5"} 1',
+        'app_latency_seconds_bucket{le="1"} 2',
+        'app_latency_seconds_bucket{le="+Inf"} 2',
+        "app_latency_seconds_sum 1",
+        "app_latency_seconds_count 2",
+        "# HELP app_requests_total Requests.",
+        "# TYPE app_requests_total counter",
+        'app_requests_total{path="/a\\"b"} 3',
+    ]) + "\n"
+
+
+def test_gauge_callbacks_override_set_values(registry):
+    gauge = registry.gauge("g", "doc", ("pool",))
+    gauge.set(1, pool="a")
+    gauge.inc(2, pool="b")
+    gauge.dec(pool="b")
+    gauge.add_callback(lambda: {("a",): 7})
+    assert gauge.collect() == {("a",): 7, ("b",): 1}
+
+
+def test_failing_callback_is_skipped(registry):
+    gauge = registry.gauge("g", "doc")
+    gauge.add_callback(lambda: 1 / 0)
+    gauge.set(4)
+    assert gauge.collect() == {(): 4}
+
+
+def write_worker(directory, pid: int, counter: float, gauge: float, histogram: list):
+    payload = {"pid": pid, "written_at": 0, "metrics": {
+        "c_total": {"kind": "counter", "help": "doc", "labels": [], "buckets": [], "values": [[[], counter]]},
+        "g": {"kind": "gauge", "help": "doc", "labels": [], "buckets": [], "values": [[[], gauge]]},
+        "h_seconds": {"kind": "histogram", "help": "doc", "labels": [], "buckets": [1],
+                      "values": [[[], histogram]]},
+    }}
+    (directory / f"metrics_{pid}.json").write_text(json.dumps(payload))
+
+
+def test_multiprocess_merge_drops_gauges_of_dead_workers(registry, tmp_path, monkeypatch):
+    monkeypatch.setattr(metrics, "METRICS_MULTIPROC_DIR", str(tmp_path))
+    registry.counter("c_total", "doc").inc(1)
+    registry.gauge("g", "doc").set(1)
+    registry.histogram("h_seconds", "doc", buckets=(1,)).observe(0.5)
+
+    live = subprocess.Popen([sys.executable, "-c", "import time; time.sleep(30)"])
+    try:
+        write_worker(tmp_path, live.pid, counter=10, gauge=3, histogram=[1, 1, 2.5, 2])
+        write_worker(tmp_path, dead_pid(), counter=100, gauge=50, histogram=[4, 0, 1.0, 4])
+        (tmp_path / "metrics_garbage.json").write_text("{not json")
+        merged = registry._merged()
+    finally:
+        live.kill()
+        live.wait()
+
+    # Our own snapshot was flushed for the other workers
+    assert os.path.exists(tmp_path / f"metrics_{os.getpid()}.json")
+    # Counters and histograms are cumulative over every worker that ran; gauges only live ones
+    assert values(merged["c_total"]) == {(): 111}
+    assert values(merged["g"]) == {(): 4}
+    assert values(merged["h_seconds"]) == {(): [6, 1, 4.0, 7]}
+
+
+def test_merge_without_directory_is_the_local_snapshot(registry):
+    registry.counter("c_total", "doc").inc(2)
+    assert values(registry._merged()["c_total"]) == {(): 2}
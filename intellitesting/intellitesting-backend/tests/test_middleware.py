@@ -0,0 +1,87 @@
+import gzip
+import tracemalloc
+
+import pytest
+from fastapi import FastAPI, Request
+from fastapi.testclient import TestClient
+
+import middleware
+from middleware import CompressionMiddleware, PayloadTooLarge, _Decoder
+
+CAP = 1024 * 1024
+
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.setattr(middleware, "MAX_REQUEST_BYTES", 64 * 1024)
+    monkeypatch.setattr(middleware, "MAX_DECOMPRESSED_BYTES", CAP)
+    app = FastAPI()
+    app.add_middleware(CompressionMiddleware)
+
+    @app.post("/echo")
+    async def echo(request: Request):
+        body = await request.body()
+        return {"size": len(body), "text": body.decode("latin-1")}
+
+    return TestClient(app)
+
+
+def zstd_compress(data: bytes) -> bytes:
+    zstandard = pytest.importorskip("zstandard")
+    return zstandard.ZstdCompressor(level=19).compress(data)
+
+
+def test_plain_body_passes_through(client):
+    response = client.post("/echo", content=b"hello")
+    assert response.json() == {"size": 5, "text": "hello"}
+
+
+@pytest.mark.parametrize("encoding, compress", [("gzip", gzip.compress), ("zstd", zstd_compress)])
+def test_compressed_body_is_decoded(client, encoding, compress):
+    data = b"def test_add():\n    assert add(1, 2) == 3\n" * 100
+    response = client.post("/echo", content=compress(data), headers={"Content-Encoding": encoding})
+    assert response.status_code == 200
+    assert response.json()["text"] == data.decode()
+
+
+def test_oversized_body_is_rejected(client):
+    response = client.post("/echo", content=b"x" * (64 * 1024 + 1))
+    assert response.status_code == 413
+
+
+@pytest.mark.parametrize("encoding, compress", [("gzip", gzip.compress), ("zstd", zstd_compress)])
+def test_decompression_bomb_is_rejected(client, encoding, compress):
+    bomb = compress(b"\0" * (50 * CAP))
+    assert len(bomb) < 64 * 1024
+    response = client.post("/echo", content=bomb, headers={"Content-Encoding": encoding})
+    assert response.status_code == 413
+
+
+@pytest.mark.parametrize("encoding, compress", [("gzip", gzip.compress), ("zstd", zstd_compress)])
+def test_decoder_output_is_bounded_within_one_chunk(monkeypatch, encoding, compress):
+    monkeypatch.setattr(middleware, "MAX_DECOMPRESSED_BYTES", CAP)
+    bomb = compress(b"\0" * (100 * CAP))
+    tracemalloc.start()
+    try:
+        with pytest.raises(PayloadTooLarge):
+            _Decoder(encoding).feed(bomb)
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    assert peak < 4 * CAP
+
+
+def test_unknown_encoding_is_rejected(client):
+    response = client.post("/echo", content=b"data", headers={"Content-Encoding": "br"})
+    assert response.status_code == 415
+
+
+def test_malformed_gzip_is_a_client_error(client):
+    response = client.post("/echo", content=b"not gzip", headers={"Content-Encoding": "gzip"})
+    assert response.status_code == 400
+
+
+def test_large_responses_are_compressed(client):
+    response = client.post("/echo", content=b"a" * 4096, headers={"Accept-Encoding": "gzip"})
+    assert response.headers["content-encoding"] == "gzip"
+    assert response.json()["size"] == 4096
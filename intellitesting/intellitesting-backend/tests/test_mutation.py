@@ -0,0 +1,109 @@
+import os
+
+import pytest
+
+import core.mutation as mutation
+import services.mutation_testing as mutation_testing
+from core.mutation import MutationEngine, _python_schema
+from schemas import SelectionRange
+from services.mutation_testing import MutationTestingService
+
+CORPUS = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "benchmarks", "corpus")
+with open(os.path.join(CORPUS, "calculator.py"), encoding="utf-8") as f:
+    CALCULATOR = f.read()
+
+# clamp() spans lines 10-17
+CLAMP = SelectionRange(start=9, end=16)
+CLAMP_TESTS = """\
+from calculator import clamp
+
+
+def test_inside():
+    assert clamp(5, 0, 10) == 5
+
+
+def test_below():
+    assert clamp(-1, 0, 10) == 0
+"""
+
+
+@pytest.fixture(autouse=True)
+def one_worker(monkeypatch):
+    monkeypatch.setattr(mutation, "MUTATION_WORKERS", 1)
+
+
+def test_schema_lists_the_mutants_of_the_range():
+    schema, mutants = _python_schema(CALCULATOR, 10, 17)
+    assert [(m["line"], m["description"]) for m in mutants] == [
+        (11, "> -> >="), (13, "< -> <="), (14, "return None"),
+        (15, "> -> >="), (16, "return None"), (17, "return None"),
+    ]
+    # The schema is valid Python and behaves like the original while no mutant is active
+    namespace = {}
+    exec(compile(schema, "calculator.py", "exec"), namespace)
+    assert namespace["clamp"](12, 0, 10) == 10
+
+
+def test_known_mutants_are_killed_or_survive():
+    result = MutationEngine.score("python", CALCULATOR, CLAMP_TESTS, file_path="calculator.py",
+                                  selection_range=CLAMP, time_budget=60)
+    assert result["total"] == 6
+    # `return low` and `return value` are checked; no test probes a boundary or a value above high
+    assert (result["killed"], result["survived"], result["no_coverage"], result["timeout"]) == (2, 3, 1, 0)
+    assert result["score"] == round(2 / 6, 4)
+    assert result["complete"] is True and result["not_run"] == 0
+    assert result["survivors"] == ["line 11: > -> >=", "line 13: < -> <=", "line 15: > -> >=",
+                                   "line 16: return None"]
+
+
+def test_boundary_tests_leave_only_equivalent_mutants():
+    tests = CLAMP_TESTS + """
+
+def test_above():
+    assert clamp(11, 0, 10) == 10
+
+
+def test_boundaries():
+    assert clamp(0, 0, 10) == 0
+    assert clamp(10, 0, 10) == 10
+    assert clamp(3, 3, 3) == 3
+"""
+    result = MutationEngine.score("python", CALCULATOR, tests, file_path="calculator.py",
+                                  selection_range=CLAMP, time_budget=60)
+    assert result["killed"] == 4
+    # `<` -> `<=` and `>` -> `>=` on value only differ at value == low/high, where both branches agree
+    assert result["survivors"] == ["line 13: < -> <=", "line 15: > -> >="]
+    assert result["score"] == round(4 / 6, 4)
+
+
+def test_failing_suite_is_not_measured():
+    tests = "from calculator import clamp\n\n\ndef test_wrong():\n    assert clamp(5, 0, 10) == 6\n"
+    result = MutationEngine.score("python", CALCULATOR, tests, file_path="calculator.py", selection_range=CLAMP)
+    assert result == {"error": "No passing tests to measure (the suite must pass on the original code)."}
+
+
+def test_unsupported_language():
+    result = MutationTestingService.score("java", "class A {}", "class ATest {}")
+    assert result == {"error": "Mutation testing not supported for java"}
+
+
+def test_time_budget_stops_the_run(monkeypatch):
+    # Every mutant costs a quarter second, far more than the budget allows for all 27
+    tests = """\
+import time
+from calculator import clamp, divide, is_leap_year
+
+
+def test_slow():
+    time.sleep(0.25)
+    divide(4, 2), clamp(5, 0, 10), clamp(-1, 0, 10), clamp(11, 0, 10), clamp(1, 0, 0)
+    is_leap_year(2000), is_leap_year(1900), is_leap_year(2024)
+"""
+    monkeypatch.setattr(mutation_testing, "MUTATION_TIME_BUDGET", 3)
+    # The requested budget is capped at the server's MUTATION_TIME_BUDGET
+    result = MutationTestingService.score("python", CALCULATOR, tests, file_path="calculator.py", time_budget=600)
+    assert result["total"] == 27
+    assert result["complete"] is False
+    assert result["not_run"] > 0
+    assert result["killed"] + result["survived"] + result["timeout"] + result["no_coverage"] + result["not_run"] == 27
+    assert result["elapsed_seconds"] < 3 + 5
@@ -0,0 +1,171 @@
+import json
+import threading
+from types import SimpleNamespace
+
+import pytest
+from langchain_core.messages import HumanMessage, SystemMessage
+from langchain_core.tools import tool
+
+import core.prompt_cache as prompt_cache
+from core.prompt_cache import GeminiContextCache, LocalPrefixCache, PrefixCachingLLM, prefix_key
+from core.shared_state import MemoryState
+
+
+@tool
+def lookup(query: str) -> str:
+    """Looks something up."""
+    return query
+
+
+TOOLS = [lookup]
+PREFIX = "You are a test generator."
+
+
+class FakeCaches:
+    def __init__(self, fail: bool = False):
+        self.fail = fail
+        self.created = []
+
+    def create(self, model, config):
+        self.created.append(config)
+        if self.fail:
+            raise RuntimeError("cached content is too small")
+        return SimpleNamespace(name=f"cachedContents/{len(self.created)}")
+
+
+def fake_llm(caches: FakeCaches, api_key: str = "server-key"):
+    return SimpleNamespace(model="gemini-2.5-flash", google_api_key=api_key, client=SimpleNamespace(caches=caches))
+
+
+def test_local_cache_hit_and_miss():
+    cache = LocalPrefixCache(ttl=60)
+    llm = fake_llm(FakeCaches())
+    name = cache.get_or_create(llm, PREFIX, TOOLS)
+    assert name.startswith("cachedContents/local-")
+    assert cache.get_or_create(llm, PREFIX, TOOLS) == name
+    assert cache.get_or_create(llm, PREFIX + " Changed.", TOOLS) != name
+    assert cache.stats == {"hits": 1, "misses": 2}
+    assert cache.prefix_for(name).startswith(PREFIX + "\n")
+    assert cache.prefix_for("cachedContents/unknown") is None
+
+
+def test_local_cache_entries_expire(monkeypatch):
+    cache = LocalPrefixCache(ttl=60)
+    llm = fake_llm(FakeCaches())
+    cache.get_or_create(llm, PREFIX, TOOLS)
+    now = prompt_cache.time.time()
+    monkeypatch.setattr(prompt_cache.time, "time", lambda: now + 61)
+    cache.get_or_create(llm, PREFIX, TOOLS)
+    assert cache.stats == {"hits": 0, "misses": 2}
+
+
+def test_keys_differ_per_api_key():
+    caches = FakeCaches()
+    assert prefix_key(fake_llm(caches, "a"), PREFIX, TOOLS) != prefix_key(fake_llm(caches, "b"), PREFIX, TOOLS)
+
+
+def test_gemini_cache_is_created_once_and_shared_between_workers():
+    state, caches = MemoryState(), FakeCaches()
+    first, second = GeminiContextCache(ttl=3600, state=state), GeminiContextCache(ttl=3600, state=state)
+    assert first.get_or_create(fake_llm(caches), PREFIX, TOOLS) == "cachedContents/1"
+    # The other worker reuses the published name instead of paying for its own cache
+    assert second.get_or_create(fake_llm(caches), PREFIX, TOOLS) == "cachedContents/1"
+    assert len(caches.created) == 1
+    assert caches.created[0].system_instruction == PREFIX
+    assert state.get(f"prompt_cache:{prefix_key(fake_llm(caches), PREFIX, TOOLS)}:creating") is None
+
+
+def test_gemini_cache_creation_lock_sends_full_prompt_meanwhile():
+    state, caches = MemoryState(), FakeCaches()
+    key = prefix_key(fake_llm(caches), PREFIX, TOOLS)
+    state.set(f"prompt_cache:{key}:creating", "1", ttl=30, nx=True)  # another worker is creating it
+    cache = GeminiContextCache(ttl=3600, state=state)
+    assert cache.get_or_create(fake_llm(caches), PREFIX, TOOLS) is None
+    assert caches.created == []
+
+
+def test_concurrent_workers_create_one_cache():
+    state, caches = MemoryState(), FakeCaches()
+    workers = [GeminiContextCache(ttl=3600, state=state) for _ in range(8)]
+    barrier = threading.Barrier(len(workers))
+    names = []
+
+    def work(cache):
+        barrier.wait()
+        names.append(cache.get_or_create(fake_llm(caches), PREFIX, TOOLS))
+
+    threads = [threading.Thread(target=work, args=(w,)) for w in workers]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(caches.created) == 1
+    assert set(names) <= {"cachedContents/1", None}
+
+
+def test_uncacheable_prefix_is_published_and_not_retried():
+    state, caches = MemoryState(), FakeCaches(fail=True)
+    first, second = GeminiContextCache(ttl=3600, state=state), GeminiContextCache(ttl=3600, state=state)
+    assert first.get_or_create(fake_llm(caches), PREFIX, TOOLS) is None
+    key = prefix_key(fake_llm(caches), PREFIX, TOOLS)
+    assert json.loads(state.get(f"prompt_cache:{key}"))["name"] is None
+    # Neither this worker nor another one tries again before the TTL
+    assert first.get_or_create(fake_llm(caches), PREFIX, TOOLS) is None
+    assert second.get_or_create(fake_llm(caches), PREFIX, TOOLS) is None
+    assert len(caches.created) == 1
+
+
+class RecordingLLM:
+    def __init__(self):
+        self.calls = []
+        self.model = "fake"
+        self.google_api_key = "k"
+
+    def bind_tools(self, tools):
+        return SimpleNamespace(invoke=lambda messages, **kwargs: self.calls.append(("tools", messages, kwargs)))
+
+    def invoke(self, messages, **kwargs):
+        self.calls.append(("cached", messages, kwargs))
+
+
+def test_prefix_caching_llm_strips_the_cached_prefix():
+    llm = RecordingLLM()
+    wrapper = PrefixCachingLLM(llm, TOOLS, LocalPrefixCache())
+    wrapper.invoke([SystemMessage(content=PREFIX), HumanMessage(content="go")])
+    kind, messages, kwargs = llm.calls[-1]
+    assert kind == "cached" and [m.content for m in messages] == ["go"]
+    assert kwargs["cached_content"].startswith("cachedContents/local-")
+
+    PrefixCachingLLM(llm, TOOLS, None).invoke([SystemMessage(content=PREFIX), HumanMessage(content="go")])
+    assert llm.calls[-1][0] == "tools" and len(llm.calls[-1][1]) == 2
+
+
+@pytest.fixture
+def cache_mode(monkeypatch):
+    monkeypatch.setattr(prompt_cache, "_default_cache", None)
+    monkeypatch.setattr(prompt_cache, "get_shared_state", MemoryState)
+
+    def use(mode):
+        monkeypatch.setenv("PROMPT_CACHE", mode)
+    return use
+
+
+def test_mode_selects_the_cache(cache_mode):
+    cache_mode("off")
+    assert prompt_cache.get_prefix_cache() is None
+    cache_mode("local")
+    local = prompt_cache.get_prefix_cache()
+    assert type(local) is LocalPrefixCache and local.mode == "local"
+    assert prompt_cache.get_prefix_cache() is local
+    assert prompt_cache.get_provider_cache() is None  # made-up names would be rejected by Gemini
+    cache_mode("gemini")
+    gemini = prompt_cache.get_prefix_cache()
+    assert isinstance(gemini, GeminiContextCache) and gemini.mode == "gemini"
+
+
+def test_user_keys_get_no_provider_cache_by_default(cache_mode, monkeypatch):
+    cache_mode("gemini")
+    assert isinstance(prompt_cache.get_provider_cache(), GeminiContextCache)
+    assert prompt_cache.get_provider_cache(user_key=True) is None
+    monkeypatch.setattr(prompt_cache, "PROMPT_CACHE_USER_KEYS", True)
+    assert isinstance(prompt_cache.get_provider_cache(user_key=True), GeminiContextCache)
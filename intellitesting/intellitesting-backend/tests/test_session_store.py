@@ -0,0 +1,123 @@
+import operator
+import time
+from typing import Annotated, TypedDict
+
+import pytest
+from langgraph.graph import StateGraph, START, END
+
+import services.session_store as session_store
+from core import shared_state
+from services.session_store import SessionStore
+
+
+class State(TypedDict):
+    log: Annotated[list, operator.add]
+
+
+def _graph():
+    graph = StateGraph(State)
+    graph.add_node("step", lambda state: {"log": ["step"]})
+    graph.add_edge(START, "step")
+    graph.add_edge("step", END)
+    return graph
+
+
+@pytest.fixture
+def node(tmp_path, monkeypatch):
+    """Switches SessionStore to a node-local database; returns a graph compiled against it."""
+    monkeypatch.setattr(shared_state, "_state", shared_state.MemoryState())
+    monkeypatch.setattr(SessionStore, "_last_eviction", 0.0)
+
+    def open_node(name: str = "node"):
+        monkeypatch.setattr(session_store, "SESSION_DB_PATH", str(tmp_path / f"{name}.db"))
+        monkeypatch.setattr(SessionStore, "_saver", None)
+        return _graph().compile(checkpointer=SessionStore.checkpointer())
+
+    return open_node
+
+
+def turn(app, session_id: str, text: str):
+    app.invoke({"log": [text]}, {"configurable": {"thread_id": session_id}})
+    return SessionStore.save(session_id, "source", "spec")
+
+
+def checkpoint_rows(session_id: str) -> int:
+    with SessionStore.checkpointer().cursor() as cur:
+        cur.execute("SELECT COUNT(*) FROM checkpoints WHERE thread_id = ?", (session_id,))
+        return cur.fetchone()[0]
+
+
+def test_resumes_and_counts_turns(node):
+    app = node()
+    assert turn(app, "s1", "first")
+    assert SessionStore.get("s1", "source") == {"session_id": "s1", "spec_hash": "spec", "turns": 1}
+
+    assert turn(app, "s1", "second")
+    assert SessionStore.get("s1", "source")["turns"] == 2
+    state = app.get_state({"configurable": {"thread_id": "s1"}}).values
+    assert state["log"] == ["first", "step", "second", "step"]
+
+
+def test_trims_to_latest_checkpoint(node):
+    app = node()
+    turn(app, "s1", "first")
+    turn(app, "s1", "second")
+    assert checkpoint_rows("s1") == 1
+
+
+def test_changed_source_starts_over(node):
+    app = node()
+    turn(app, "s1", "first")
+    assert SessionStore.get("s1", "other source") is None
+    assert SessionStore.get("s1", "source") is None
+    assert checkpoint_rows("s1") == 0
+
+
+def test_expired_session_is_not_resumed(node, monkeypatch):
+    app = node()
+    turn(app, "s1", "first")
+    monkeypatch.setattr(session_store, "SESSION_TTL", -1)
+    assert SessionStore.get("s1", "source") is None
+
+
+def test_save_evicts_sessions_that_are_never_resumed(node, monkeypatch):
+    app = node()
+    turn(app, "idle", "first")
+    monkeypatch.setattr(session_store, "SESSION_TTL", 0)
+    monkeypatch.setattr(SessionStore, "_last_eviction", 0.0)
+    time.sleep(0.01)
+
+    turn(app, "fresh", "first")
+    assert checkpoint_rows("idle") == 0
+
+
+def test_turn_bound_drops_session(node, monkeypatch):
+    monkeypatch.setattr(session_store, "SESSION_MAX_TURNS", 2)
+    app = node()
+    assert turn(app, "s1", "first")
+    assert not turn(app, "s1", "second")
+    assert SessionStore.get("s1", "source") is None
+
+
+def test_size_bound_drops_session(node, monkeypatch):
+    monkeypatch.setattr(session_store, "SESSION_MAX_BYTES", 10)
+    app = node()
+    assert not turn(app, "s1", "first")
+    assert checkpoint_rows("s1") == 0
+
+
+def test_follow_up_on_another_node_resumes_replica(node):
+    shared_state._state.spans_hosts = True
+    first = node("a")
+    turn(first, "s1", "on a")
+
+    second = node("b")
+    assert SessionStore.get("s1", "source")["turns"] == 1
+    turn(second, "s1", "on b")
+
+    first = node("a")
+    assert SessionStore.get("s1", "source")["turns"] == 2
+    assert first.get_state({"configurable": {"thread_id": "s1"}}).values["log"] == ["on a", "step", "on b", "step"]
+
+    SessionStore.delete("s1")
+    assert shared_state._state.get("session:s1") is None
@@ -0,0 +1,148 @@
+import os
+import subprocess
+import sys
+import threading
+import time
+from datetime import date
+
+import pytest
+
+import core.shared_state as shared_state
+from core.shared_state import MemoryState, RedisState, SQLiteState, open_state
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def state(request, tmp_path):
+    if request.param == "memory":
+        return MemoryState()
+    return SQLiteState(str(tmp_path / "state.db"))
+
+
+def test_set_get_delete(state):
+    assert state.get("a") is None
+    assert state.set("a", "1")
+    assert state.get("a") == "1"
+    state.delete("a", "missing")
+    assert state.get("a") is None
+
+
+def test_set_nx_only_stores_absent_keys(state):
+    assert state.set("lock", "first", nx=True)
+    assert not state.set("lock", "second", nx=True)
+    assert state.get("lock") == "first"
+    # A plain set always overwrites
+    assert state.set("lock", "third")
+    assert state.get("lock") == "third"
+
+
+def test_set_nx_overwrites_an_expired_key(state):
+    assert state.set("lock", "old", ttl=0.05, nx=True)
+    time.sleep(0.1)
+    assert state.get("lock") is None
+    assert state.set("lock", "new", ttl=10, nx=True)
+    assert state.get("lock") == "new"
+
+
+def test_incr_ttl_applies_on_creation_only(state):
+    assert state.incr("n", ttl=0.2) == 1
+    assert state.incr("n", 2, ttl=100) == 3  # does not extend the window
+    time.sleep(0.3)
+    assert state.get("n") is None
+    assert state.incr("n", ttl=0.2) == 1
+
+
+def test_incr_without_ttl_never_expires(state):
+    state.incr("n")
+    assert state.incr("n") == 2
+    assert state.get("n") == "2"
+
+
+def test_incr_is_atomic_across_threads(tmp_path):
+    state = SQLiteState(str(tmp_path / "state.db"))
+    results, threads = [], []
+    lock = threading.Lock()
+
+    def work():
+        mine = [state.incr("counter", ttl=60) for _ in range(50)]
+        with lock:
+            results.extend(mine)
+
+    for _ in range(8):
+        threads.append(threading.Thread(target=work))
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    # Every increment returned a distinct value: none were lost or duplicated
+    assert sorted(results) == list(range(1, 401))
+    assert state.get("counter") == "400"
+
+
+def test_sqlite_state_is_shared_between_instances(tmp_path):
+    path = str(tmp_path / "state.db")
+    first, second = SQLiteState(path), SQLiteState(path)
+    first.incr("n", ttl=60)
+    assert second.incr("n", ttl=60) == 2
+    assert first.set("lock", "x", nx=True)
+    assert not second.set("lock", "y", nx=True)
+
+
+def test_open_state_selects_the_backend(tmp_path):
+    assert isinstance(open_state("memory://"), MemoryState)
+    sqlite = open_state("sqlite:///" + str(tmp_path / "s.db"))
+    assert isinstance(sqlite, SQLiteState) and sqlite.path == str(tmp_path / "s.db")
+    assert not sqlite.spans_hosts
+    with pytest.raises(ValueError, match="Unsupported SHARED_STATE_URL"):
+        open_state("postgres://localhost/db")
+
+
+def test_open_state_redis_urls(monkeypatch):
+    created = []
+    monkeypatch.setattr(RedisState, "__init__", lambda self, url: created.append(url))
+    for url in ("redis://localhost:6379/0", "rediss://cache:6380/1", "unix:///tmp/redis.sock"):
+        backend = open_state(url)
+        assert isinstance(backend, RedisState) and backend.spans_hosts
+    assert created == ["redis://localhost:6379/0", "rediss://cache:6380/1", "unix:///tmp/redis.sock"]
+
+
+def test_get_shared_state_is_a_process_singleton(monkeypatch, tmp_path):
+    monkeypatch.setattr(shared_state, "_state", None)
+    monkeypatch.setattr(shared_state, "SHARED_STATE_URL", "sqlite:///" + str(tmp_path / "s.db"))
+    backend = shared_state.get_shared_state()
+    assert isinstance(backend, SQLiteState)
+    assert shared_state.get_shared_state() is backend
+
+
+class _Day(date):
+    current = date(2024, 1, 1)
+
+    @classmethod
+    def today(cls):
+        return cls.current
+
+
+@pytest.fixture
+def rate_limit(monkeypatch, tmp_path):
+    import main
+    monkeypatch.setattr(main, "get_shared_state", lambda: SQLiteState(str(tmp_path / "limits.db")))
+    monkeypatch.setattr(main, "date", _Day)
+    monkeypatch.setattr(_Day, "current", date(2024, 1, 1))
+    return main
+
+
+def test_rate_limit_allows_daily_limit_per_ip_per_day(rate_limit):
+    limit = rate_limit.DAILY_LIMIT
+    assert [rate_limit.check_rate_limit("1.1.1.1") for _ in range(limit + 2)] == [True] * limit + [False, False]
+    # Other IPs have their own counter
+    assert rate_limit.check_rate_limit("2.2.2.2")
+    # A new day starts a new counter
+    _Day.current = date(2024, 1, 2)
+    assert rate_limit.check_rate_limit("1.1.1.1")
+
+
+def test_daily_limit_comes_from_the_environment():
+    env = dict(os.environ, RATE_LIMIT_DAILY="3")
+    backend = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    output = subprocess.run([sys.executable, "-c", "import main; print(main.DAILY_LIMIT)"],
+                            cwd=backend, env=env, capture_output=True, text=True, timeout=60)
+    assert output.stdout.strip().splitlines()[-1] == "3", output.stderr
@@ -0,0 +1,107 @@
+import pytest
+
+import core.validation as validation
+from core.validation import TestCodeValidator
+
+JAVA_CONVENTIONS = {"test_package": "com.acme.test", "source_package": "com.acme", "source_class": "Calc"}
+JAVA_SUITE = """package com.acme.test;
+
+import com.acme.Calc;
+import org.junit.Test;
+import static org.junit.Assert.assertEquals;
+
+public class CalcTest {
+    @Test
+    public void addsNumbers() {
+        assertEquals(3, new Calc().add(1, 2));
+    }
+}
+"""
+
+
+def errors(language: str, code: str, conventions=None) -> list:
+    result = TestCodeValidator.validate(language, code, conventions)
+    return [] if result is None else result["validation_errors"]
+
+
+@pytest.mark.parametrize("code", [
+    "def test_add():\n    assert 1 + 2 == 3\n",
+    "class TestCalc:\n    def test_add(self):\n        assert True\n",
+    "import unittest\n\nclass CalcTests(unittest.TestCase):\n    def test_add(self):\n        self.assertEqual(1 + 2, 3)\n",
+    "class CalcChecks:\n    def test_add(self):\n        assert True\n",
+])
+def test_python_collectable_suites_pass(code):
+    assert errors("python", code) == []
+
+
+def test_python_syntax_error_is_rejected_with_line():
+    assert errors("python", "def test_a(:\n    pass\n") == ["test_generated.py:1: SyntaxError: invalid syntax"]
+
+
+def test_python_compile_only_errors_are_rejected():
+    assert "SyntaxError" in errors("python", "return 1\ndef test_a():\n    pass\n")[0]
+
+
+def test_python_missing_module_is_rejected():
+    found = errors("python", "import not_a_real_module_xyz\n\ndef test_a():\n    pass\n")
+    assert found and "No module named 'not_a_real_module_xyz'" in found[0]
+
+
+@pytest.mark.parametrize("code", [
+    "try:\n    import not_a_real_module_xyz\nexcept ImportError:\n    pass\n\ndef test_a():\n    pass\n",
+    "import sys\nif sys.platform == 'win32':\n    import winreg\n\ndef test_a():\n    pass\n",
+    "from typing import TYPE_CHECKING\nif TYPE_CHECKING:\n    import not_a_real_module_xyz\n\ndef test_a():\n    pass\n",
+])
+def test_python_guarded_imports_are_not_resolved(code):
+    assert errors("python", code) == []
+
+
+def test_python_provided_modules_count_as_importable():
+    code = "from calc import add\n\ndef test_add():\n    assert add(1, 2) == 3\n"
+    assert errors("python", code, {"provided_modules": ["calc"]}) == []
+
+
+def test_python_file_without_tests_is_rejected():
+    found = errors("python", "def helper():\n    return 1\n")
+    assert found and "no tests collected" in found[0]
+
+
+def test_java_valid_suite_passes():
+    assert errors("java", JAVA_SUITE, JAVA_CONVENTIONS) == []
+
+
+@pytest.mark.parametrize("code, message", [
+    ("public class CalcTest { @Test public void t() { }", "'{' is never closed"),
+    ('public class CalcTest { void t() { String s = "abc; } }', "unterminated literal"),
+    ("class Helper {}\npublic class CalcTest { @Test public void t() {} }", "should be declared in a file named CalcTest.java"),
+])
+def test_java_structural_errors_are_rejected(code, message):
+    assert any(message in e for e in errors("java", code))
+
+
+def test_java_package_and_import_conventions_are_enforced():
+    code = JAVA_SUITE.replace("package com.acme.test;\n", "").replace("import com.acme.Calc;\n", "")
+    found = errors("java", code, JAVA_CONVENTIONS)
+    assert any("requires `package com.acme.test;`" in e for e in found)
+    assert any("missing `import com.acme.Calc;`" in e for e in found)
+
+
+def test_java_suite_without_tests_is_rejected():
+    found = errors("java", "public class CalcTest { }")
+    assert any("no @Test methods found" in e for e in found)
+
+
+def test_rejection_has_runner_result_shape_and_counts():
+    before = TestCodeValidator.snapshot()
+    result = TestCodeValidator.validate("python", "def test_a(:\n")
+    assert result["passed"] is False
+    assert result["stderr"].startswith("error: test_generated.py:1:")
+    after = TestCodeValidator.snapshot()
+    assert after["rejected"] == before["rejected"] + 1
+    assert after["subprocesses_avoided"] == before["subprocesses_avoided"] + 1
+
+
+def test_unknown_language_and_disabled_gate_pass_through(monkeypatch):
+    assert TestCodeValidator.validate("kotlin", "garbage") is None
+    monkeypatch.setattr(validation, "VALIDATION_GATE", False)
+    assert TestCodeValidator.validate("python", "def test_a(:\n") is None
@@ -0,0 +1,97 @@
+import os
+
+import pytest
+
+import core.workspace as workspace
+from core.workspace import Workspace, WorkspaceError
+
+
+@pytest.fixture
+def root(tmp_path):
+    (tmp_path / "root").mkdir()
+    return tmp_path / "root"
+
+
+def test_repeated_window_returns_a_reference(root):
+    (root / "calc.py").write_text("".join(f"x{i} = {i}\n" for i in range(10)))
+    first = Workspace.read("calc.py", session_id="s1", root=str(root))
+    second = Workspace.read("calc.py", session_id="s1", root=str(root))
+    assert "     1 | x0 = 0" in first
+    assert "are unchanged since you last read them" in second
+    assert "lines 1-10" in second
+    assert "x0 = 0" not in second
+    Workspace.end_session("s1")
+
+
+def test_changed_file_is_returned_again(root):
+    path = root / "calc.py"
+    path.write_text("a = 1\n")
+    Workspace.read("calc.py", session_id="s2", root=str(root))
+    path.write_text("a = 2\nb = 3\n")
+    assert "a = 2" in Workspace.read("calc.py", session_id="s2", root=str(root))
+    Workspace.end_session("s2")
+
+
+def test_byte_truncated_window_is_keyed_on_the_returned_lines(root, monkeypatch):
+    monkeypatch.setattr(workspace, "MAX_WINDOW_BYTES", 1000)
+    (root / "big.txt").write_text("".join(f"{i:03d}" + "x" * 96 + "\n" for i in range(50)))
+
+    first = Workspace.read("big.txt", max_lines=20, session_id="s3", root=str(root))
+    assert "(lines 1-10 of 50" in first
+    assert "start_line=11 to continue" in first
+
+    # The same request only saw lines 1-10, and says so
+    again = Workspace.read("big.txt", max_lines=20, session_id="s3", root=str(root))
+    assert "lines 1-10 " in again and "are unchanged" in again
+    assert "start_line=11 to continue" in again
+
+    # Following the hint returns the lines the truncation dropped
+    rest = Workspace.read("big.txt", start_line=11, max_lines=20, session_id="s3", root=str(root))
+    assert "(lines 11-20 of 50" in rest
+    assert "010xxx" in rest
+    Workspace.end_session("s3")
+
+
+def test_no_session_never_returns_references(root):
+    (root / "a.txt").write_text("hello\n")
+    assert "hello" in Workspace.read("a.txt", root=str(root))
+    assert "hello" in Workspace.read("a.txt", root=str(root))
+
+
+def test_start_past_the_end(root):
+    (root / "a.txt").write_text("one\ntwo\n")
+    assert "has only 2 lines" in Workspace.read("a.txt", start_line=5, root=str(root))
+
+
+@pytest.mark.parametrize("path", ["../outside.txt", "sub/../../outside.txt", "/etc/hostname"])
+def test_paths_outside_the_root_are_rejected(root, path):
+    (root.parent / "outside.txt").write_text("secret\n")
+    (root / "sub").mkdir()
+    with pytest.raises(WorkspaceError, match="outside the workspace"):
+        Workspace.resolve(path, str(root))
+
+
+def test_symlink_escaping_the_root_is_rejected(root):
+    (root.parent / "outside.txt").write_text("secret\n")
+    os.symlink(root.parent / "outside.txt", root / "link.txt")
+    with pytest.raises(WorkspaceError, match="outside the workspace"):
+        Workspace.read("link.txt", root=str(root))
+
+
+def test_symlink_inside_the_root_is_allowed(root):
+    (root / "real.txt").write_text("fine\n")
+    os.symlink(root / "real.txt", root / "link.txt")
+    assert "fine" in Workspace.read("link.txt", root=str(root))
+
+
+def test_root_prefix_sibling_is_rejected(root):
+    # "/tmp/x/root-other" shares a string prefix with "/tmp/x/root" but is outside it
+    (root.parent / "root-other").mkdir()
+    (root.parent / "root-other" / "a.txt").write_text("secret\n")
+    with pytest.raises(WorkspaceError, match="outside the workspace"):
+        Workspace.resolve("../root-other/a.txt", str(root))
+
+
+def test_missing_file(root):
+    with pytest.raises(WorkspaceError, match="File not found"):
+        Workspace.resolve("nope.py", str(root))